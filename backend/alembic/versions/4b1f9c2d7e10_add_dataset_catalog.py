@@ -0,0 +1,39 @@
+"""add dataset catalog
+
+Revision ID: 4b1f9c2d7e10
+Revises: 123456789abc
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b1f9c2d7e10'
+down_revision = '123456789abc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('dataset_catalog',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('data_source_id', sa.Integer(), nullable=True),
+    sa.Column('row_count', sa.BigInteger(), nullable=True),
+    sa.Column('column_names', sa.JSON(), nullable=True),
+    sa.Column('dtypes', sa.JSON(), nullable=True),
+    sa.Column('byte_size', sa.BigInteger(), nullable=True),
+    sa.Column('head_sample', sa.JSON(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['data_source_id'], ['data_sources.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_dataset_catalog_id'), 'dataset_catalog', ['id'], unique=False)
+    op.create_index(op.f('ix_dataset_catalog_data_source_id'), 'dataset_catalog', ['data_source_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_dataset_catalog_data_source_id'), table_name='dataset_catalog')
+    op.drop_index(op.f('ix_dataset_catalog_id'), table_name='dataset_catalog')
+    op.drop_table('dataset_catalog')
@@ -0,0 +1,24 @@
+"""add data source version
+
+Revision ID: 7c3e5a9b2f41
+Revises: 4b1f9c2d7e10
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3e5a9b2f41'
+down_revision = '4b1f9c2d7e10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('data_sources', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    op.drop_column('data_sources', 'version')
@@ -0,0 +1,26 @@
+"""add catalog profile
+
+Revision ID: 9d2e4f6a8b13
+Revises: 7c3e5a9b2f41
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d2e4f6a8b13'
+down_revision = '7c3e5a9b2f41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('dataset_catalog', sa.Column('profile', sa.JSON(), nullable=True))
+    op.add_column('dataset_catalog', sa.Column('profile_version', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('dataset_catalog', 'profile_version')
+    op.drop_column('dataset_catalog', 'profile')
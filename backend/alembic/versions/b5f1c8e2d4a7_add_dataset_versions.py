@@ -0,0 +1,40 @@
+"""add dataset versions
+
+Revision ID: b5f1c8e2d4a7
+Revises: 9d2e4f6a8b13
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5f1c8e2d4a7'
+down_revision = '9d2e4f6a8b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('dataset_versions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('data_source_id', sa.Integer(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('parent_version', sa.Integer(), nullable=True),
+    sa.Column('operations', sa.JSON(), nullable=True),
+    sa.Column('row_count', sa.BigInteger(), nullable=True),
+    sa.Column('column_names', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['data_source_id'], ['data_sources.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('data_source_id', 'version', name='uq_dataset_versions_source_version')
+    )
+    op.create_index(op.f('ix_dataset_versions_id'), 'dataset_versions', ['id'], unique=False)
+    op.create_index(op.f('ix_dataset_versions_data_source_id'), 'dataset_versions', ['data_source_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_dataset_versions_data_source_id'), table_name='dataset_versions')
+    op.drop_index(op.f('ix_dataset_versions_id'), table_name='dataset_versions')
+    op.drop_table('dataset_versions')
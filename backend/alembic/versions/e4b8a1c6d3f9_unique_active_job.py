@@ -0,0 +1,26 @@
+"""unique active job per dedupe key
+
+Revision ID: e4b8a1c6d3f9
+Revises: c7a3d9e1f2b5
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b8a1c6d3f9'
+down_revision = 'c7a3d9e1f2b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    active = sa.text("status IN ('pending', 'running')")
+    op.create_index('uq_jobs_active_dedupe_key', 'jobs', ['dedupe_key'], unique=True,
+                    sqlite_where=active, postgresql_where=active)
+
+
+def downgrade():
+    op.drop_index('uq_jobs_active_dedupe_key', table_name='jobs')
@@ -0,0 +1,34 @@
+"""add data source sha256
+
+Revision ID: f2c9d5a7b3e8
+Revises: e4b8a1c6d3f9
+Create Date: 2026-10-19 20:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c9d5a7b3e8'
+down_revision = 'e4b8a1c6d3f9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('data_sources', sa.Column('sha256', sa.String(), nullable=True))
+    op.create_index(op.f('ix_data_sources_sha256'), 'data_sources', ['sha256'], unique=False)
+    # Uploads so far keep their digest in connection_config
+    data_sources = sa.table('data_sources', sa.column('id', sa.Integer()), sa.column('connection_config', sa.JSON()),
+                            sa.column('sha256', sa.String()))
+    conn = op.get_bind()
+    for id, config in conn.execute(sa.select(data_sources.c.id, data_sources.c.connection_config)).fetchall():
+        digest = (config or {}).get('sha256')
+        if digest:
+            conn.execute(data_sources.update().where(data_sources.c.id == id).values(sha256=digest))
+
+
+def downgrade():
+    op.drop_index(op.f('ix_data_sources_sha256'), table_name='data_sources')
+    op.drop_column('data_sources', 'sha256')
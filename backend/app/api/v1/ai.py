@@ -7,6 +7,7 @@ from app.api import deps
 from app.models.data_source import DataSource
 from app.engine.loader import load_dataframe
 from app.engine.ai_summarizer import DataSummarizer
+from app.core.scheduler import run_in_lane
 import google.generativeai as genai
 import os
 import json
@@ -18,6 +19,7 @@ class InsightRequest(BaseModel):
     focus: str = "general"
 
 @router.post("/generate")
+@run_in_lane("heavy")
 def generate_insights(
     request: InsightRequest,
     db: Session = Depends(database.get_db),
@@ -49,15 +51,15 @@ def generate_insights(
     genai.configure(api_key=api_key)
 
     try:
-        # 3. Load & Summarize Data
-        # We load the full dataframe to get accurate stats
-        df = load_dataframe(file_path, data_source.type, limit=None)
-        
-        # Determine sample size (row count)
-        total_rows = len(df)
+        # 3. Summarize Data
+        # The canonical profile is computed once per dataset version (after
+        # ingest/cleaning); only a missing or stale one forces a full load here
+        from app.engine.catalog import get_profile
+        stats = get_profile(db, data_source)
+        total_rows = stats["total_rows"]
         
         # Generate statistical profile
-        profile = DataSummarizer.generate_profile(df)
+        profile = DataSummarizer.from_statistics(stats)
         
         # 4. Construct Prompt
         prompt = f"""
@@ -204,6 +206,7 @@ class AskDataRequest(BaseModel):
     question: str
 
 @router.post("/ask")
+@run_in_lane("interactive")
 def ask_data(
     request: AskDataRequest,
     db: Session = Depends(database.get_db),
@@ -230,11 +233,12 @@ def ask_data(
     genai.configure(api_key=api_key)
 
     try:
-        # 3. Load Data & Schema
-        df = load_dataframe(file_path, data_source.type, limit=100) 
-        columns = df.columns.tolist()
-        dtypes = {k: str(v) for k, v in df.dtypes.items()}
-        sample_data = df.head(3).to_dict(orient='records')
+        # 3. Schema from the metadata catalog (no data load)
+        from app.engine.catalog import get_catalog
+        catalog = get_catalog(db, data_source)
+        columns = catalog.column_names
+        dtypes = catalog.dtypes
+        sample_data = (catalog.head_sample or [])[:3]
 
         # 4. Construct Prompt
         prompt = f"""
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
@@ -6,6 +6,7 @@ from app.core import database
 from app.models.dashboard import Dashboard, Widget
 from app.models.user import User
 from app.api import deps
+from app.core.etag import compute_etag, not_modified, cache_headers
 from datetime import datetime
 
 router = APIRouter()
@@ -73,12 +74,24 @@ def create_dashboard(
 @router.get("/{id}", response_model=DashboardOut)
 def read_dashboard(
     id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(database.get_db),
     current_user: User = Depends(deps.get_current_active_user)
 ):
     dashboard = db.query(Dashboard).filter(Dashboard.id == id, Dashboard.user_id == current_user.id).first()
     if not dashboard:
         raise HTTPException(status_code=404, detail="Dashboard not found")
+
+    # Widget create/delete does not touch dashboard.updated_at, so the widget set is part of the version
+    etag = compute_etag(
+        "dashboard", dashboard.id, dashboard.name, dashboard.description, dashboard.updated_at,
+        [(w.id, w.title, w.type, w.config, w.layout) for w in dashboard.widgets]
+    )
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    response.headers.update(cache_headers(etag))
     return dashboard
 
 @router.post("/{id}/widgets", response_model=WidgetOut)
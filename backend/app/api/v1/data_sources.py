@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, Response, status
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
@@ -7,6 +7,11 @@ from app.models.data_source import DataSource
 from app.models.project import Project
 from app.api import deps
 from app.models.user import User
+from app.core.scheduler import run_in_lane
+from app.engine.profiler import QueryProfiler
+from app.engine.streaming import negotiate_format, streaming_response
+from app.core.serialization import encode_columnar, encode_records, json_response
+from app.core.etag import compute_etag, not_modified, cache_headers
 import shutil
 import os
 import uuid
@@ -25,6 +30,26 @@ class ConnectRequest(BaseModel):
     type: str
     connection_string: str
     query: str = "SELECT * FROM public.users LIMIT 100" # Example default
+    refresh_schedule: Optional[str] = None # hourly, daily, weekly or an interval such as 15m
+    watermark_column: Optional[str] = None # only rows past the last value are fetched on refresh
+    key_column: Optional[str] = None # with a watermark: refreshed rows replace rows with the same key
+
+class RefreshSettings(BaseModel):
+    refresh_schedule: Optional[str] = None
+    watermark_column: Optional[str] = None
+    key_column: Optional[str] = None
+
+def _validate_refresh_settings(settings, columns: List[str]):
+    from app.engine.refresher import parse_schedule
+    try:
+        parse_schedule(settings.refresh_schedule)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    for column in (settings.watermark_column, settings.key_column):
+        if column and column not in columns:
+            raise HTTPException(status_code=400, detail=f"Column '{column}' is not in the query result")
+    if settings.key_column and not settings.watermark_column:
+        raise HTTPException(status_code=400, detail="key_column requires a watermark_column")
 
 @router.put("/{id}")
 def update_data_source(
@@ -82,6 +107,7 @@ def connect_database(
              raise ValueError("No data returned")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Connection failed: {str(e)}")
+    _validate_refresh_settings(req, [str(c) for c in df.columns])
 
     # Save
     new_source = DataSource(
@@ -90,18 +116,117 @@ def connect_database(
         connection_config={
             "connection_string": req.connection_string,
             "query": req.query,
-            "original_name": req.name
-        }
+            "original_name": req.name,
+            "watermark_column": req.watermark_column,
+            "key_column": req.key_column
+        },
+        refresh_schedule=req.refresh_schedule
+    )
+    db.add(new_source)
+    db.commit()
+    db.refresh(new_source)
+
+    # The probe already pulled the result set into the cache; record it in the catalog
+    from app.engine.catalog import refresh_catalog, schedule_profile
+    try:
+        df = load_dataframe(config, req.type, limit=None)
+        refresh_catalog(db, new_source, df)
+        schedule_profile(new_source, df)
+    except Exception as e:
+        print(f"Catalog build failed for source {new_source.id}: {e}")
+
+    return new_source
+
+ALLOWED_EXTENSIONS = {'.csv', '.xlsx', '.xls', '.json', '.xml'}
+# Accepted around a data file: file.csv.gz, or a zip archive holding one data file
+COMPRESSED_EXTENSIONS = {'.gz', '.zip'}
+
+def _file_type(filename: str) -> Optional[str]:
+    """File type from the name; None for a zip archive, whose type is that of the file inside (_archive_type)."""
+    base, ext = os.path.splitext(filename.lower())
+    if ext == '.zip':
+        return None
+    if ext == '.gz':
+        ext = os.path.splitext(base)[1]
+        if ext in ['.xlsx', '.xls']:
+            raise HTTPException(status_code=400, detail="Excel workbooks are compressed already; upload them without gzip")
+    if ext not in ALLOWED_EXTENSIONS:
+        allowed = ', '.join(sorted(ALLOWED_EXTENSIONS | COMPRESSED_EXTENSIONS))
+        raise HTTPException(status_code=400, detail=f"Unsupported file type. Allowed: {allowed}")
+
+    # Deterministic file type
+    if ext in ['.xlsx', '.xls']:
+        return 'excel'
+    if ext == '.json':
+        return 'json'
+    if ext == '.xml':
+        return 'xml'
+    return 'csv'
+
+def _archive_type(file_path: str) -> str:
+    # Zip uploads are read in place: the type is that of the single data file inside
+    from app.engine.compression import archive_member
+    try:
+        member = archive_member(file_path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if os.path.splitext(member)[1].lower() in COMPRESSED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Archives inside archives are not supported")
+    return _file_type(member)
+
+def _reader_options(file_type: str, sheet: Optional[str], record_path: Optional[str]) -> dict:
+    # Which part of the file holds the data: an Excel sheet or the XML record element
+    if sheet and file_type != 'excel':
+        raise HTTPException(status_code=400, detail="sheet applies to Excel files only")
+    if record_path and file_type != 'xml':
+        raise HTTPException(status_code=400, detail="record_path applies to XML files only")
+    from app.engine.readers import reader_options
+    return reader_options({"sheet": sheet, "record_path": record_path})
+
+def _add_file_source(db: Session, project_id: int, filename: str, file_type: str, file_path: str,
+                     digest: str, size: int, options: dict = None) -> DataSource:
+    # Commit inside upload_store.stored_blob, so the blob is never released before this row exists
+    new_source = DataSource(
+        project_id=project_id,
+        type=file_type,
+        sha256=digest,
+        connection_config={"file_path": file_path, "original_name": filename, "sha256": digest, "size": size,
+                           **(options or {})}
     )
     db.add(new_source)
     db.commit()
     db.refresh(new_source)
     return new_source
 
+def _ingest_file_source(db: Session, new_source: DataSource, reused: bool, current_user: User, streamed=None) -> dict:
+    response = {
+        "message": "File uploaded successfully",
+        "id": new_source.id,
+        "filename": new_source.connection_config["original_name"],
+        "type": new_source.type,
+        "sha256": new_source.sha256,
+        "deduplicated": reused
+    }
+    if streamed is not None:
+        # Parsed while it was uploaded: columnar copy and sketches are ready
+        from app.engine.tasks import ingest_streamed
+        response.update(ingest_streamed(db, new_source, streamed))
+        response.update({"job_id": None, "job_status": None})
+        return response
+
+    # Parsing, the columnar copy and the catalog continue in a background job
+    # so large files do not hold the request open; /jobs/{job_id} reports progress
+    from app.core.jobs import submit_job
+    job = submit_job(db, "ingest", current_user.id, data_source_id=new_source.id)
+    response.update({"job_id": job.id, "job_status": job.status})
+    return response
+
 @router.post("/upload")
 def upload_file(
     file: UploadFile = File(...),
     project_id: int = Form(...),
+    sheet: Optional[str] = Form(None), # Excel: sheet name or 0-based index
+    record_path: Optional[str] = Form(None), # XML: record element, e.g. "orders/order"
     db: Session = Depends(database.get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
@@ -110,45 +235,158 @@ def upload_file(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    allowed_extensions = {'.csv', '.xlsx', '.xls', '.json', '.xml'}
-    ext = os.path.splitext(file.filename)[1].lower()
-    
-    if ext not in allowed_extensions:
-        raise HTTPException(status_code=400, detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}")
-
-    # Deterministic file type
-    file_type = 'csv'
-    if ext in ['.xlsx', '.xls']:
-        file_type = 'excel'
-    elif ext == '.json':
-        file_type = 'json'
-    elif ext == '.xml':
-        file_type = 'xml'
-
-    # Generate unique filename
-    file_id = str(uuid.uuid4())
-    filename = f"{file_id}_{file.filename}"
-    file_path = os.path.join(UPLOAD_DIR, filename)
+    file_type = _file_type(file.filename)
+    if file_type is not None:
+        options = _reader_options(file_type, sheet, record_path)
 
+    # Hashed, compressed and parsed while streaming to disk; identical content is stored once
+    from app.engine import compression, upload_store
+    from app.engine.stream_ingest import InvalidFile, StreamingIngest
+    ingest = StreamingIngest.for_type(file_type, upload_store.INCOMING_DIR, compression.codec_of(file.filename))
+    ext = compression.upload_ext(file.filename)
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        staged, suffix, digest, size = upload_store.store_stream(file.file, ext, ingest)
+    except InvalidFile as e:
+        raise HTTPException(status_code=400, detail=f"Invalid {file_type} file: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    with upload_store.stored_blob(staged, suffix, digest, ext) as (file_path, reused):
+        if file_type is None:
+            file_type = _archive_type(file_path)
+            options = _reader_options(file_type, sheet, record_path)
+        new_source = _add_file_source(db, project_id, file.filename, file_type, file_path, digest, size, options)
 
-    # Save to DB
-    new_source = DataSource(
-        project_id=project_id,
-        type=file_type,
-        connection_config={"file_path": file_path, "original_name": file.filename}
-    )
-    db.add(new_source)
-    db.commit()
-    db.refresh(new_source)
+    return _ingest_file_source(db, new_source, reused, current_user, streamed=ingest.result if ingest else None)
 
-    return {"message": "File uploaded successfully", "id": new_source.id, "filename": file.filename, "type": file_type}
+class UploadSessionRequest(BaseModel):
+    project_id: int
+    filename: str
+    size: Optional[int] = None # total bytes; required for the commit to check completeness
+    sheet: Optional[str] = None # Excel: sheet name or 0-based index
+    record_path: Optional[str] = None # XML: record element, e.g. "orders/order"
+
+class UploadCommitRequest(BaseModel):
+    sha256: Optional[str] = None # verified against the hash of the received bytes
+
+def _get_upload_session(upload_id: str, current_user: User) -> dict:
+    from app.engine import upload_store
+    state = upload_store.get_session(upload_id)
+    if state is None or state["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return state
+
+def _session_status(state: dict) -> dict:
+    from app.engine.upload_store import UPLOAD_CHUNK_BYTES
+    return {
+        "upload_id": state["upload_id"],
+        "filename": state["filename"],
+        "size": state["size"],
+        "offset": state["offset"],
+        "chunk_size": UPLOAD_CHUNK_BYTES
+    }
+
+@router.post("/uploads")
+def create_upload_session(
+    req: UploadSessionRequest,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Resumable upload: create a session, PUT chunks at increasing offsets
+    (GET the session to find where to resume), then commit.
+    """
+    project = db.query(Project).filter(Project.id == req.project_id, Project.owner_id == current_user.id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if req.size is not None and req.size < 0:
+        raise HTTPException(status_code=400, detail="size must be non-negative")
+
+    from app.engine import upload_store
+    file_type = _file_type(req.filename)
+    if file_type is None:
+        # A zip archive: the type and options are checked at commit, once the file is complete
+        options = {"sheet": req.sheet, "record_path": req.record_path}
+    else:
+        options = _reader_options(file_type, req.sheet, req.record_path)
+    state = upload_store.create_session(current_user.id, req.project_id, req.filename, file_type, req.size, options)
+    return _session_status(state)
+
+@router.get("/uploads/{upload_id}")
+def get_upload_session(
+    upload_id: str,
+    current_user: User = Depends(deps.get_current_user)
+):
+    return _session_status(_get_upload_session(upload_id, current_user))
+
+@router.put("/uploads/{upload_id}")
+def upload_chunk(
+    upload_id: str,
+    offset: int = Form(...),
+    chunk: UploadFile = File(...),
+    current_user: User = Depends(deps.get_current_user)
+):
+    from app.engine import upload_store
+    from app.engine.compression import codec_of
+    from app.engine.stream_ingest import SNIFF_BYTES, InvalidFile, validate_head
+    _get_upload_session(upload_id, current_user)
+    try:
+        state = upload_store.write_chunk(upload_id, offset, chunk.file)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    except upload_store.UploadError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if offset == 0:
+        # Reject a file that cannot parse before the rest of it is sent
+        try:
+            validate_head(upload_store.read_head(upload_id, SNIFF_BYTES), state["type"],
+                          complete=state["offset"] == state["size"] and state["offset"] <= SNIFF_BYTES,
+                          codec=codec_of(state["filename"]))
+        except InvalidFile as e:
+            upload_store.abort_session(upload_id)
+            raise HTTPException(status_code=400, detail=f"Invalid {state['type']} file: {str(e)}; the upload was discarded")
+    return _session_status(state)
+
+@router.post("/uploads/{upload_id}/commit")
+def commit_upload_session(
+    upload_id: str,
+    req: UploadCommitRequest,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    from app.engine import upload_store
+    state = _get_upload_session(upload_id, current_user)
+    project = db.query(Project).filter(Project.id == state["project_id"], Project.owner_id == current_user.id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    try:
+        state, staged, suffix, digest = upload_store.finish_session(upload_id, req.sha256)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    except upload_store.UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    from app.engine.compression import upload_ext
+    file_type, options = state["type"], state.get("options")
+    with upload_store.stored_blob(staged, suffix, digest, upload_ext(state["filename"])) as (file_path, reused):
+        if file_type is None:
+            file_type = _archive_type(file_path)
+            options = _reader_options(file_type, options.get("sheet"), options.get("record_path"))
+        new_source = _add_file_source(db, state["project_id"], state["filename"], file_type, file_path, digest,
+                                      state["offset"], options)
+    return _ingest_file_source(db, new_source, reused, current_user)
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def abort_upload_session(
+    upload_id: str,
+    current_user: User = Depends(deps.get_current_user)
+):
+    from app.engine import upload_store
+    _get_upload_session(upload_id, current_user)
+    upload_store.abort_session(upload_id)
+    return None
 
 from app.engine.loader import load_dataframe
+from app.engine.versions import load_source
 
 @router.get("/")
 def read_data_sources(
@@ -178,22 +416,31 @@ def delete_data_source(
             raise HTTPException(status_code=403, detail="Not authorized to delete this data source")
 
     # Delete physical file if it exists
+    from app.engine import upload_store
     if data_source.type in ['csv', 'excel', 'json', 'xml']:
         file_path = data_source.connection_config.get('file_path')
-        if file_path and os.path.exists(file_path):
+        if upload_store.is_blob(file_path):
+            # Content-addressed: other sources may hold the same bytes
+            upload_store.release_blob(db, data_source)
+        elif file_path and os.path.exists(file_path):
             try:
                 os.remove(file_path)
             except Exception as e:
                 # Log error but continue with DB deletion
                 print(f"Error deleting file {file_path}: {e}")
 
+    from app.engine import columnar_store
+    columnar_store.remove_dataset(data_source.id)
+
     db.delete(data_source)
     db.commit()
     return None
 
 @router.get("/{id}/preview")
+@run_in_lane("interactive")
 def preview_data_source(
     id: int,
+    request: Request,
     limit: int = 5,
     db: Session = Depends(database.get_db),
     current_user: User = Depends(deps.get_current_user)
@@ -216,50 +463,53 @@ def preview_data_source(
             detail="File not found on server (Storage may have been cleared). Please delete and re-upload this data source."
         )
 
+    etag = compute_etag("preview", data_source.id, data_source.version, limit=limit)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
     try:
-        import pandas as pd
-        import numpy as np
         import traceback
+        from app.engine.catalog import get_catalog
+        from app.engine import columnar_store
         
-        print(f"DEBUG: Reading file at {file_path} type {data_source.type}")
-        
-        # Ensure type is valid for loader
-        ftype = data_source.type.lower() if data_source.type else 'csv'
-        
-        # Load Data
-        # We need TOTAL rows for the UI count, so we load all (MVP) or count efficiently.
-        # Since we just switched rows endpoint to Pandas/None limit, let's do same here for consistency.
-        full_df = load_dataframe(file_path, ftype, limit=None)
-        
-        total_rows = len(full_df)
-        
-        # Apply preview limit
-        df = full_df.head(limit)
-            
-        # Get dtypes
-        dtypes = {col: str(dtype) for col, dtype in df.dtypes.items()}
-        
-        # Clean data for JSON serialization
-        df = df.replace([np.inf, -np.inf], None)
-        df = df.where(pd.notnull(df), None)
+        # Row count, schema and head sample come from the ingest-time catalog,
+        # so opening a dataset does not parse it even when nothing is cached.
+        catalog = get_catalog(db, data_source)
+        head_sample = catalog.head_sample or []
+
+        if limit <= len(head_sample) or len(head_sample) >= catalog.row_count:
+            data = head_sample[:limit]
+        else:
+            # Larger previews read just the leading row groups of the sidecar
+            parquet_path = columnar_store.ensure_columnar(data_source)
+            if parquet_path is not None:
+                df, _ = columnar_store.read_rows(parquet_path, 0, limit)
+            else:
+                df = load_source(data_source, limit=limit)
+
+            data = encode_records(df)
         
-        return {
+        return json_response({
             "filename": data_source.connection_config.get('original_name'),
-            "columns": df.columns.tolist(),
-            "dtypes": dtypes,
-            "total_rows": total_rows, 
-            "total_columns": len(df.columns),
-            "data": df.to_dict(orient="records"),
-            "preview_limit": len(df)
-        }
+            "columns": catalog.column_names,
+            "dtypes": catalog.dtypes,
+            "total_rows": catalog.row_count, 
+            "total_columns": len(catalog.column_names),
+            "data": data,
+            "preview_limit": len(data)
+        }, headers=cache_headers(etag))
     except Exception as e:
         print(f"Error reading source: {e}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to read source: {str(e)}")
 
 @router.get("/{id}/statistics")
+@run_in_lane("heavy")
 def get_data_source_statistics(
     id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(database.get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
@@ -278,144 +528,31 @@ def get_data_source_statistics(
         raise HTTPException(status_code=404, detail="File not found on server")
 
     try:
-        import pandas as pd
-        import numpy as np
-        
-        # Load full dataframe for stats
-        df = load_dataframe(file_path, data_source.type, limit=None)
-        
-        # Calculate robust statistics
-        stats = {}
-        total_rows = len(df)
-        
-        for col in df.columns:
-            col_type = str(df[col].dtype)
-            is_numeric = pd.api.types.is_numeric_dtype(df[col])
-            
-            # Base stats for all columns
-            col_stats = {
-                "type": col_type,
-                "count": int(df[col].count()),
-                "missing": int(df[col].isnull().sum()),
-                "distinct": int(df[col].nunique())
-            }
-            
-            # Derived stats
-            col_stats["missing_pct"] = round((col_stats["missing"] / total_rows) * 100, 2) if total_rows > 0 else 0
-            col_stats["distinct_pct"] = round((col_stats["distinct"] / total_rows) * 100, 2) if total_rows > 0 else 0
-            
-            # Numeric specific stats
-            if is_numeric:
-                desc = df[col].describe()
-                col_stats.update({
-                    "mean": float(desc['mean']) if not pd.isna(desc['mean']) else None,
-                    "std": float(desc['std']) if not pd.isna(desc['std']) else None,
-                    "min": float(desc['min']) if not pd.isna(desc['min']) else None,
-                    "25%": float(desc['25%']) if not pd.isna(desc['25%']) else None,
-                    "50%": float(desc['50%']) if not pd.isna(desc['50%']) else None,
-                    "median": float(desc['50%']) if not pd.isna(desc['50%']) else None,
-                    "75%": float(desc['75%']) if not pd.isna(desc['75%']) else None,
-                    "max": float(desc['max']) if not pd.isna(desc['max']) else None,
-                    "zeros": int((df[col] == 0).sum()),
-                    "skew": float(df[col].skew()) if not pd.isna(df[col].skew()) else None,
-                    "kurtosis": float(df[col].kurt()) if not pd.isna(df[col].kurt()) else None,
-                    "mode": float(df[col].mode()[0]) if not df[col].mode().empty else None
-                })
-                
-                # Outlier Detection (IQR Method)
-                try:
-                    q1 = df[col].quantile(0.25)
-                    q3 = df[col].quantile(0.75)
-                    iqr = q3 - q1
-                    lower_bound = q1 - 1.5 * iqr
-                    upper_bound = q3 + 1.5 * iqr
-                    
-                    outlier_mask = (df[col] < lower_bound) | (df[col] > upper_bound)
-                    outlier_indices = df.index[outlier_mask].tolist()
-                    
-                    col_stats["outliers"] = {
-                        "count": len(outlier_indices),
-                        "indices": outlier_indices[:500],  # Cap payload size
-                        "lower_bound": float(lower_bound),
-                        "upper_bound": float(upper_bound)
-                    }
-                except Exception as e:
-                    print(f"Outlier calc error {col}: {e}")
-                    col_stats["outliers"] = {"count": 0, "indices": []}
-            else:
-                # Categorical specific stats
-                col_stats.update({
-                    "mode": str(df[col].mode()[0]) if not df[col].mode().empty else None
-                })
-            # Distribution Data (Power BI Style)
-            try:
-                if is_numeric:
-                    # Create Histogram data (10 bins)
-                    data_clean = df[col].dropna()
-                    if not data_clean.empty:
-                        hist, bin_edges = np.histogram(data_clean, bins=10)
-                        col_stats["distribution"] = {
-                            "type": "histogram",
-                            "data": [{"bin": f"{bin_edges[i]:.2f}-{bin_edges[i+1]:.2f}", "count": int(count)} for i, count in enumerate(hist)]
-                        }
-                else:
-                    # Top values for distribution
-                    top_items = df[col].value_counts().head(10).to_dict()
-                    col_stats["distribution"] = {
-                        "type": "top_values",
-                        "data": [{"name": str(k), "count": int(v)} for k, v in top_items.items()]
-                    }
-            except Exception as e:
-                print(f"Error generating distribution for {col}: {e}")
-                col_stats["distribution"] = None
-            
-            stats[col] = col_stats
+        from app.engine.catalog import get_profile
 
-        # --- AUTO-GENERATED SUMMARY ---
-        summary = []
-        summary.append(f"Dataset contains {total_rows:,} rows and {len(df.columns)} columns.")
-        
-        # 1. Missing Value Checks
-        high_missing = [col for col, data in stats.items() if data.get('missing_pct', 0) > 5]
-        if high_missing:
-            summary.append(f"⚠️ {len(high_missing)} columns have >5% missing values: {', '.join(high_missing[:3])}{'...' if len(high_missing)>3 else ''}.")
-        
-        # 2. Skewness Checks (Numeric)
-        skewed_cols = []
-        for col in df.select_dtypes(include=[np.number]).columns:
-            try:
-                skew = df[col].skew()
-                if abs(skew) > 1:
-                    skewed_cols.append(col)
-            except: pass
-        if skewed_cols:
-            summary.append(f"📈 {len(skewed_cols)} numeric columns are highly skewed (skew > 1): {', '.join(skewed_cols[:3])}{'...' if len(skewed_cols)>3 else ''}.")
-
-        # 3. Constant Columns
-        constant_cols = [col for col, data in stats.items() if data.get('distinct') == 1]
-        if constant_cols:
-             summary.append(f"🛑 {len(constant_cols)} columns contain a single constant value: {', '.join(constant_cols[:3])}.")
-
-        # 4. Duplicate Rows
-        dupes = int(df.duplicated().sum())
-        if dupes > 0:
-            summary.append(f"👯 Dataset contains {dupes:,} duplicate rows ({round(dupes/total_rows*100, 1)}%).")
-
-        return {
-            "total_rows": total_rows,
-            "duplicate_rows": dupes,
-            "column_stats": stats,
-            "summary": summary
-        }
+        # Stored profile for this version; computed (single vectorized pass) only if missing or stale
+        profile = get_profile(db, data_source)
 
     except Exception as e:
         print(f"Error calculating stats: {e}")
         # traceback.print_exc() 
         raise HTTPException(status_code=500, detail=f"Failed to calculate statistics: {str(e)}")
 
-@router.get("/{id}/correlation")
-def get_data_source_correlation(
+    # A sketch profile is replaced by the exact one under the same version: the ETag tells them apart
+    etag = compute_etag("statistics", data_source.id, data_source.version, approximate=bool(profile.get("approximate")))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    response.headers.update(cache_headers(etag))
+    return profile
+
+@router.get("/{id}/duplicates")
+@run_in_lane("heavy")
+def get_data_source_duplicates(
     id: int,
+    request: Request,
+    offset: int = 0,
+    limit: int = 20,
     db: Session = Depends(database.get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
@@ -433,39 +570,174 @@ def get_data_source_correlation(
     if not file_path or not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found on server")
 
+    offset = max(0, offset)
+    limit = min(max(1, limit), 200)
+    etag = compute_etag("duplicates", data_source.id, data_source.version, offset=offset, limit=limit)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
     try:
-        import pandas as pd
-        import numpy as np
-        
-        # Load full dataframe
-        df = load_dataframe(file_path, data_source.type, limit=None)
-        
-        # Select numeric columns only
-        numeric_df = df.select_dtypes(include=[np.number])
-        
-        if numeric_df.empty:
-             return {"columns": [], "matrix": []}
+        from app.engine.row_hash import get_row_index
+
+        # Counts and groups come from the per-version row-hash index; the data
+        # is only touched to show one sample row per group
+        index = get_row_index(data_source)
+        result = index.groups(offset=offset, limit=limit)
+        if result["groups"]:
+            df = load_source(data_source)
+            samples = encode_records(df.iloc[[g["rows"][0] for g in result["groups"]]])
+            for group, sample in zip(result["groups"], samples):
+                group["sample"] = sample
+
+        return json_response({
+            "total_rows": len(index),
+            "duplicate_rows": index.duplicate_count(),
+            "offset": offset,
+            "limit": limit,
+            **result
+        }, headers=cache_headers(etag))
 
-        # Calculate Correlation Matrix
-        corr_matrix = numeric_df.corr(method='pearson').round(2)
-        
-        # Format for frontend (Heatmap)
-        # We need a list of { x: col1, y: col2, value: 0.5 }
-        data = []
-        cols = corr_matrix.columns.tolist()
-        
-        for i, col_x in enumerate(cols):
-            for j, col_y in enumerate(cols):
-                data.append({
-                    "x": col_x,
-                    "y": col_y,
-                    "value": corr_matrix.iloc[i, j]
-                })
+    except Exception as e:
+        print(f"Error finding duplicates: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to find duplicates: {str(e)}")
 
-        return {
-            "columns": cols,
-            "matrix": data
-        }
+@router.get("/{id}/outliers")
+@run_in_lane("heavy")
+def get_data_source_outliers(
+    id: int,
+    column: str,
+    request: Request,
+    method: str = "iqr",
+    offset: int = 0,
+    limit: int = 50,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    from app.engine.outliers import OUTLIER_METHODS, get_outlier_index
+    if method not in OUTLIER_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unsupported method. Allowed: {', '.join(OUTLIER_METHODS)}")
+
+    # Fetch data source
+    data_source = db.query(DataSource).filter(DataSource.id == id).first()
+    if not data_source:
+        raise HTTPException(status_code=404, detail="Data source not found")
+
+    # Verify project ownership
+    project = db.query(Project).filter(Project.id == data_source.project_id, Project.owner_id == current_user.id).first()
+    if not project:
+        raise HTTPException(status_code=403, detail="Not authorized to access this data source")
+
+    file_path = data_source.connection_config.get('file_path')
+    if not file_path or not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="File not found on server")
+
+    offset = max(0, offset)
+    limit = min(max(1, limit), 500)
+    etag = compute_etag("outliers", data_source.id, data_source.version, column=column, method=method, offset=offset, limit=limit)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    try:
+        index = get_outlier_index(data_source)
+        if column not in index.summary:
+            raise HTTPException(status_code=400, detail=f"'{column}' is not a numeric column")
+
+        # Positions come from the stored bitmap; only the requested page of rows is materialized
+        positions = index.positions(column, method)
+        page = positions[offset:offset + limit]
+        rows = []
+        if len(page):
+            df = load_source(data_source)
+            rows = encode_records(df.iloc[page])
+
+        return json_response({
+            "column": column,
+            "method": method,
+            **index.summary[column][method],
+            "offset": offset,
+            "limit": limit,
+            "positions": page.tolist(),
+            "rows": rows
+        }, headers=cache_headers(etag))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error retrieving outliers: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve outliers: {str(e)}")
+
+@router.get("/{id}/correlation")
+@run_in_lane("heavy")
+def get_data_source_correlation(
+    id: int,
+    request: Request,
+    response: Response,
+    method: str = "pearson",
+    format: str = "heatmap",
+    top_k: int = 50,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    method: pearson | spearman
+    format: heatmap (every cell as {x, y, value}), upper (strict upper
+    triangle, row-major) or pairs (the top_k strongest pairs by |r|)
+    """
+    from app.engine.correlation import CORRELATION_METHODS, CORRELATION_FORMATS, correlation_matrix, format_correlation
+    if method not in CORRELATION_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unsupported method. Allowed: {', '.join(CORRELATION_METHODS)}")
+    if format not in CORRELATION_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Allowed: {', '.join(CORRELATION_FORMATS)}")
+    if top_k < 1:
+        raise HTTPException(status_code=400, detail="top_k must be positive")
+
+    # Fetch data source
+    data_source = db.query(DataSource).filter(DataSource.id == id).first()
+    if not data_source:
+        raise HTTPException(status_code=404, detail="Data source not found")
+
+    # Verify project ownership
+    project = db.query(Project).filter(Project.id == data_source.project_id, Project.owner_id == current_user.id).first()
+    if not project:
+        raise HTTPException(status_code=403, detail="Not authorized to access this data source")
+
+    file_path = data_source.connection_config.get('file_path')
+    if not file_path or not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="File not found on server")
+
+    # Same version + params -> same body; answer 304 before any load or compute
+    params = {"method": method, "format": format}
+    if format == "pairs":
+        params["top_k"] = top_k
+    etag = compute_etag("correlation", data_source.id, data_source.version, **params)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    response.headers.update(cache_headers(etag))
+
+    try:
+        from app.core.memory_cache import result_cache
+        from app.engine import columnar_store
+        from app.engine.versions import get_cached_source
+
+        # The matrix is cached per version and method; every format is derived from it
+        cache_key = ("correlation", data_source.id, data_source.version, method)
+        result = result_cache.get(cache_key)
+        if result is None:
+            df = get_cached_source(data_source)
+            if df is None and columnar_store.is_fresh(data_source):
+                # Only the numeric columns are read from the sidecar
+                path = columnar_store.base_path(data_source.id)
+                df = columnar_store.read_columns(path, columnar_store.numeric_columns(path))
+            if df is None:
+                df = load_source(data_source)
+
+            result = correlation_matrix(df, method=method)
+            result_cache.set(cache_key, result)
+
+        return format_correlation(result, format, top_k)
 
     except Exception as e:
         print(f"Error calculating correlation: {e}")
@@ -477,14 +749,23 @@ class CleaningOperation(BaseModel):
 
 class CleaningRequest(BaseModel):
     operations: List[CleaningOperation]
+    dry_run: bool = False # estimate the impact on a sample; nothing is written
+    sample_rows: Optional[int] = None
+    background: bool = False # run as a job and return its id immediately
 
 @router.post("/{id}/clean")
+@run_in_lane("heavy")
 def apply_data_cleaning(
     id: int,
     request: CleaningRequest,
     db: Session = Depends(database.get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
+    from app.engine.cleaning import CLEANING_OPERATIONS
+    unknown = [op.type for op in request.operations if op.type not in CLEANING_OPERATIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unsupported operation '{unknown[0]}'. Allowed: {', '.join(CLEANING_OPERATIONS)}")
+
     data_source = db.query(DataSource).filter(DataSource.id == id).first()
     if not data_source:
         raise HTTPException(status_code=404, detail="Data source not found")
@@ -498,89 +779,258 @@ def apply_data_cleaning(
     if not file_path or not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
 
-    import pandas as pd
-    try:
-        df = load_dataframe(file_path, data_source.type, limit=None)
-        
-        for op in request.operations:
-            if op.type == "drop_duplicates":
-                df.drop_duplicates(inplace=True)
-            
-            elif op.type == "drop_na":
-                cols = op.params.get("columns", [])
-                if cols:
-                    df.dropna(subset=cols, inplace=True)
-                else:
-                    df.dropna(inplace=True)
-            
-            elif op.type == "fill_na":
-                cols = op.params.get("columns", [])
-                value = op.params.get("value")
-                method = op.params.get("method") # mean, median, mode, constant
-                
-                target_cols = cols if cols else df.columns
-                
-                for col in target_cols:
-                    if col not in df.columns: continue
-                    
-                    fill_val = value
-                    if method == "mean" and pd.api.types.is_numeric_dtype(df[col]):
-                        fill_val = df[col].mean()
-                    elif method == "median" and pd.api.types.is_numeric_dtype(df[col]):
-                        fill_val = df[col].median()
-                    elif method == "mode":
-                        mode_res = df[col].mode()
-                        if not mode_res.empty:
-                            fill_val = mode_res[0]
-                    
-                    if fill_val is not None:
-                        df[col] = df[col].fillna(fill_val)
+    if request.dry_run:
+        return _dry_run_cleaning(db, data_source, request)
 
-            elif op.type == "drop_col":
-                cols = op.params.get("columns", [])
-                df.drop(columns=[c for c in cols if c in df.columns], inplace=True)
-            
-            elif op.type == "rename_col":
-                rename_map = op.params.get("mapper", {})
-                df.rename(columns=rename_map, inplace=True)
-
-            elif op.type == "change_type":
-                col = op.params.get("column")
-                new_type = op.params.get("type") # int, float, str, date
-                if col in df.columns:
-                    try:
-                        if new_type == "int":
-                            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-                        elif new_type == "float":
-                            df[col] = pd.to_numeric(df[col], errors='coerce')
-                        elif new_type == "str":
-                            df[col] = df[col].astype(str)
-                        elif new_type == "date":
-                            df[col] = pd.to_datetime(df[col], errors='coerce')
-                    except Exception as e:
-                        print(f"Failed to cast {col} to {new_type}: {e}")
-
-        # Save back to file
-        # Convert explicit int columns that might have become float due to NaNs back if needed
-        # (Though we handled basic cases above)
-        
-        if file_path.endswith(".csv"):
-            df.to_csv(file_path, index=False)
-        elif file_path.endswith(".xlsx"):
-            df.to_excel(file_path, index=False)
-        # JSON/XML logic is trickier to edit over, sticking to CSV/Excel primary support for write-back or generic handler
-        
-        # Invalidate Cache
-        from app.core.memory_cache import df_cache
-        cache_key = f"{file_path}_{data_source.type}"
-        df_cache.invalidate(cache_key)
-
-        return {"status": "success", "message": f"Applied {len(request.operations)} operations"}
+    operations = [op.model_dump() for op in request.operations]
+    if request.background:
+        from app.core.jobs import submit_job, job_status
+        # Not retried: a failure after the version was committed would apply the steps twice
+        job = submit_job(db, "clean", current_user.id, {"operations": operations}, data_source_id=data_source.id, max_attempts=1)
+        return json_response(job_status(job), status_code=202)
 
+    from app.engine.tasks import clean_source
+    try:
+        return {"status": "success", **clean_source(db, data_source, operations)}
     except Exception as e:
         print(f"Cleaning error: {e}")
         raise HTTPException(status_code=500, detail=f"Cleaning failed: {str(e)}")
 
+def _dry_run_cleaning(db: Session, data_source, request: CleaningRequest):
+    from app.engine.catalog import get_catalog
+    from app.engine.cleaning import DRY_RUN_SAMPLE_ROWS, DRY_RUN_PREVIEW_ROWS, estimate_impact
+    from app.engine.row_hash import peek_row_index
+    from app.engine.versions import sample_source
+    try:
+        # Total rows from the catalog and a sample of the current version:
+        # the full dataset is neither loaded nor modified
+        sample_rows = min(max(1, request.sample_rows or DRY_RUN_SAMPLE_ROWS), 10 * DRY_RUN_SAMPLE_ROWS)
+        sample, method = sample_source(data_source, sample_rows)
+        total_rows = get_catalog(db, data_source).row_count
+        index = peek_row_index(data_source)
+        estimate, result = estimate_impact(
+            sample,
+            [op.model_dump() for op in request.operations],
+            total_rows,
+            duplicate_rows=index.duplicate_count() if index is not None else None
+        )
+        return json_response({
+            **estimate,
+            "sample_method": method,
+            "preview": encode_records(result.head(DRY_RUN_PREVIEW_ROWS))
+        })
+    except Exception as e:
+        print(f"Cleaning dry run error: {e}")
+        raise HTTPException(status_code=500, detail=f"Dry run failed: {str(e)}")
+
+@router.post("/{id}/append")
+@run_in_lane("heavy")
+def append_to_data_source(
+    id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Append a batch of rows with the same columns as the current version.
+    Creates a new version; work is proportional to the batch, not the dataset.
+    """
+    data_source = db.query(DataSource).filter(DataSource.id == id).first()
+    if not data_source:
+        raise HTTPException(status_code=404, detail="Data source not found")
+
+    # Verify project ownership
+    project = db.query(Project).filter(Project.id == data_source.project_id, Project.owner_id == current_user.id).first()
+    if not project:
+        raise HTTPException(status_code=403, detail="Not authorized to access this data source")
+
+    if data_source.type not in ['csv', 'excel', 'json', 'xml']:
+        raise HTTPException(status_code=400, detail="Only file-backed data sources accept appends")
+
+    file_type = _file_type(file.filename)
+    batch_path = os.path.join(UPLOAD_DIR, f"append_{uuid.uuid4()}_{file.filename}")
+    try:
+        with open(batch_path, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        batch_bytes = os.path.getsize(batch_path)
+        if file_type is None:
+            file_type = _archive_type(batch_path)
+        # Parsed on its own; the batch is not a dataset and stays out of the cache
+        batch = load_dataframe(batch_path, file_type, limit=None, cache=False)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if os.path.exists(batch_path):
+            os.remove(batch_path)
+
+    from app.engine import columnar_store
+    from app.engine.catalog import get_catalog, extend_catalog, schedule_profile
+    from app.engine.row_hash import peek_row_index, publish_row_index
+    from app.engine.versions import align_batch, append_rows
+    try:
+        with columnar_store.writer_lock(data_source.id):
+            db.refresh(data_source)
+            # Validated against the catalog schema; the dataset itself is not loaded
+            catalog = get_catalog(db, data_source)
+            try:
+                batch = align_batch(batch, catalog.column_names, catalog.dtypes or {})
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+            parent_version = data_source.version
+            parent_index = peek_row_index(data_source)
+            record, df = append_rows(db, data_source, batch)
+            if parent_index is not None:
+                # Only the batch is hashed
+                publish_row_index(data_source, parent_index.append(batch))
+            profiled = extend_catalog(db, data_source, batch, batch_bytes, parent_version, df)
+        if not profiled:
+            schedule_profile(data_source, df)
+
+        return {
+            "status": "success",
+            "rows_appended": len(batch),
+            "total_rows": record.row_count,
+            "version": record.version,
+            "parent_version": record.parent_version
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Append error: {e}")
+        raise HTTPException(status_code=500, detail=f"Append failed: {str(e)}")
+
+@router.put("/{id}/refresh")
+def update_refresh_settings(
+    id: int,
+    settings: RefreshSettings,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    data_source = db.query(DataSource).filter(DataSource.id == id).first()
+    if not data_source:
+        raise HTTPException(status_code=404, detail="Data source not found")
+
+    # Verify project ownership
+    project = db.query(Project).filter(Project.id == data_source.project_id, Project.owner_id == current_user.id).first()
+    if not project:
+        raise HTTPException(status_code=403, detail="Not authorized to update this data source")
+
+    if data_source.type not in ['postgres', 'mysql']:
+        raise HTTPException(status_code=400, detail="Only SQL data sources can be refreshed")
+
+    from app.engine.catalog import get_catalog
+    _validate_refresh_settings(settings, get_catalog(db, data_source).column_names)
+
+    new_config = dict(data_source.connection_config)
+    new_config["watermark_column"] = settings.watermark_column
+    new_config["key_column"] = settings.key_column
+    data_source.connection_config = new_config
+    data_source.refresh_schedule = settings.refresh_schedule
+    db.commit()
+    return {"refresh_schedule": data_source.refresh_schedule, **settings.model_dump(exclude={"refresh_schedule"})}
+
+@router.post("/{id}/refresh")
+@run_in_lane("heavy")
+def refresh_data_source(
+    id: int,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """Run a refresh now instead of waiting for the schedule."""
+    data_source = db.query(DataSource).filter(DataSource.id == id).first()
+    if not data_source:
+        raise HTTPException(status_code=404, detail="Data source not found")
+
+    # Verify project ownership
+    project = db.query(Project).filter(Project.id == data_source.project_id, Project.owner_id == current_user.id).first()
+    if not project:
+        raise HTTPException(status_code=403, detail="Not authorized to access this data source")
+
+    if data_source.type not in ['postgres', 'mysql']:
+        raise HTTPException(status_code=400, detail="Only SQL data sources can be refreshed")
+
+    from app.engine.refresher import refresh_source
+    try:
+        return {"status": "success", **refresh_source(db, data_source)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Refresh error: {e}")
+        raise HTTPException(status_code=500, detail=f"Refresh failed: {str(e)}")
+
+@router.get("/{id}/versions")
+def list_data_source_versions(
+    id: int,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    data_source = db.query(DataSource).filter(DataSource.id == id).first()
+    if not data_source:
+        raise HTTPException(status_code=404, detail="Data source not found")
+
+    # Verify project ownership
+    project = db.query(Project).filter(Project.id == data_source.project_id, Project.owner_id == current_user.id).first()
+    if not project:
+        raise HTTPException(status_code=403, detail="Not authorized to access this data source")
+
+    from app.engine.versions import list_versions
+    return {
+        "current_version": data_source.version,
+        "versions": [
+            {
+                "version": v.version,
+                "parent_version": v.parent_version,
+                "operations": v.operations or [],
+                "row_count": v.row_count,
+                "column_names": v.column_names,
+                "created_at": v.created_at,
+                "current": v.version == data_source.version
+            }
+            for v in list_versions(db, data_source)
+        ]
+    }
+
+@router.post("/{id}/versions/{version}/checkout")
+@run_in_lane("heavy")
+def checkout_data_source_version(
+    id: int,
+    version: int,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    data_source = db.query(DataSource).filter(DataSource.id == id).first()
+    if not data_source:
+        raise HTTPException(status_code=404, detail="Data source not found")
+
+    # Verify project ownership
+    project = db.query(Project).filter(Project.id == data_source.project_id, Project.owner_id == current_user.id).first()
+    if not project:
+        raise HTTPException(status_code=403, detail="Not authorized to access this data source")
+
+    if version == data_source.version:
+        return {"status": "success", "version": version}
+
+    from app.engine import columnar_store
+    from app.engine.versions import checkout
+    try:
+        with columnar_store.writer_lock(data_source.id):
+            try:
+                df = checkout(db, data_source, version)
+            except KeyError:
+                raise HTTPException(status_code=404, detail=f"Version {version} not found")
+            # Catalog and profile follow the current version; ETags change with it
+            from app.engine.catalog import refresh_catalog, schedule_profile
+            refresh_catalog(db, data_source, df)
+        schedule_profile(data_source, df)
+        return {"status": "success", "version": version}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Checkout error: {e}")
+        raise HTTPException(status_code=500, detail=f"Checkout failed: {str(e)}")
+
 
 
 
@@ -597,11 +1047,14 @@ class QueryRequest(BaseModel):
     limit: int = 5000
     sort_by: Optional[str] = None
     sort_direction: Optional[str] = "desc" # asc, desc
+    profile: Optional[str] = None # explain, cprofile (admin only)
 
 @router.post("/{id}/query")
+@run_in_lane("interactive")
 def query_data_source(
     id: int,
     query: QueryRequest,
+    request: Request,
     db: Session = Depends(database.get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
@@ -619,42 +1072,60 @@ def query_data_source(
     if not file_path or not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found on server")
 
+    if query.profile == "cprofile" and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="cProfile dumps are restricted to admins")
+    fmt = negotiate_format(request.headers.get("accept"))
+    if query.profile and fmt in ("ndjson", "arrow"):
+        # The report rides in the JSON body; a streamed body has nowhere to put it
+        raise HTTPException(status_code=400, detail="profile is only available with JSON responses")
+
+    try:
+        profiler = QueryProfiler(query.profile).start()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         import pandas as pd
         import numpy as np
         
         # 1. Load Data
-        df = load_dataframe(file_path, data_source.type, limit=None)
+        with profiler.stage("load") as st:
+            # Shallow copy: numeric filters and aggregates coerce columns in place,
+            # which must not reach the cached frame
+            df = load_source(data_source).copy(deep=False)
+            st["rows_out"] = len(df)
         
         # 2. Apply Filters
-        if query.filters:
-            for f in query.filters:
-                if f.column not in df.columns:
-                    # Try creating column if it looks like a calculation? No, just skip for now.
-                    continue
-                
-                # Check for numeric conversion if operator is numeric
-                is_numeric_op = f.operator in ['gt', 'lt', 'gte', 'lte']
-                if is_numeric_op:
-                    df[f.column] = pd.to_numeric(df[f.column], errors='coerce')
-                    f.value = float(f.value)
-
-                if f.operator == 'eq':
-                    df = df[df[f.column] == f.value]
-                elif f.operator == 'neq':
-                    df = df[df[f.column] != f.value]
-                elif f.operator == 'gt':
-                    df = df[df[f.column] > f.value]
-                elif f.operator == 'lt':
-                    df = df[df[f.column] < f.value]
-                elif f.operator == 'gte':
-                    df = df[df[f.column] >= f.value]
-                elif f.operator == 'lte':
-                    df = df[df[f.column] <= f.value]
-                elif f.operator == 'contains':
-                    df = df[df[f.column].astype(str).str.contains(str(f.value), case=False, na=False)]
-                elif f.operator == 'not_contains':
-                    df = df[~df[f.column].astype(str).str.contains(str(f.value), case=False, na=False)]
+        with profiler.stage("filter", rows_in=len(df)) as st:
+            if query.filters:
+                for f in query.filters:
+                    if f.column not in df.columns:
+                        # Try creating column if it looks like a calculation? No, just skip for now.
+                        continue
+                    
+                    # Check for numeric conversion if operator is numeric
+                    is_numeric_op = f.operator in ['gt', 'lt', 'gte', 'lte']
+                    if is_numeric_op:
+                        df[f.column] = pd.to_numeric(df[f.column], errors='coerce')
+                        f.value = float(f.value)
+
+                    if f.operator == 'eq':
+                        df = df[df[f.column] == f.value]
+                    elif f.operator == 'neq':
+                        df = df[df[f.column] != f.value]
+                    elif f.operator == 'gt':
+                        df = df[df[f.column] > f.value]
+                    elif f.operator == 'lt':
+                        df = df[df[f.column] < f.value]
+                    elif f.operator == 'gte':
+                        df = df[df[f.column] >= f.value]
+                    elif f.operator == 'lte':
+                        df = df[df[f.column] <= f.value]
+                    elif f.operator == 'contains':
+                        df = df[df[f.column].astype(str).str.contains(str(f.value), case=False, na=False)]
+                    elif f.operator == 'not_contains':
+                        df = df[~df[f.column].astype(str).str.contains(str(f.value), case=False, na=False)]
+            st["rows_out"] = len(df)
 
         # 3. Aggregation
         result_df = df
@@ -663,49 +1134,65 @@ def query_data_source(
             if query.group_by not in df.columns:
                  raise HTTPException(status_code=400, detail=f"Group column {query.group_by} not found")
             
-            grouped = df.groupby(query.group_by)
-            target_col = query.agg_column if query.agg_column else query.group_by
-            
-            if query.agg_method == 'count':
-                result_df = grouped.size().reset_index(name='count')
-                
-            elif query.agg_method in ['sum', 'avg', 'min', 'max'] and target_col:
-                if target_col not in df.columns and query.agg_method != 'count':
-                     raise HTTPException(status_code=400, detail=f"Agg column {target_col} not found")
+            with profiler.stage("aggregate", rows_in=len(df)) as st:
+                grouped = df.groupby(query.group_by)
+                target_col = query.agg_column if query.agg_column else query.group_by
                 
-                # Ensure numeric
-                if target_col in df.columns:
-                    df[target_col] = pd.to_numeric(df[target_col], errors='coerce')
-                
-                if query.agg_method == 'sum':
-                    result_df = grouped[target_col].sum().reset_index()
-                elif query.agg_method == 'avg':
-                    result_df = grouped[target_col].mean().reset_index()
-                elif query.agg_method == 'min':
-                    result_df = grouped[target_col].min().reset_index()
-                elif query.agg_method == 'max':
-                    result_df = grouped[target_col].max().reset_index()
+                if query.agg_method == 'count':
+                    result_df = grouped.size().reset_index(name='count')
+                    
+                elif query.agg_method in ['sum', 'avg', 'min', 'max'] and target_col:
+                    if target_col not in df.columns and query.agg_method != 'count':
+                         raise HTTPException(status_code=400, detail=f"Agg column {target_col} not found")
+                    
+                    # Ensure numeric
+                    if target_col in df.columns:
+                        df[target_col] = pd.to_numeric(df[target_col], errors='coerce')
+                    
+                    if query.agg_method == 'sum':
+                        result_df = grouped[target_col].sum().reset_index()
+                    elif query.agg_method == 'avg':
+                        result_df = grouped[target_col].mean().reset_index()
+                    elif query.agg_method == 'min':
+                        result_df = grouped[target_col].min().reset_index()
+                    elif query.agg_method == 'max':
+                        result_df = grouped[target_col].max().reset_index()
+                st["rows_out"] = len(result_df)
         
         # 4. Sorting
         if query.sort_by and query.sort_by in result_df.columns:
-            ascending = query.sort_direction == 'asc'
-            result_df = result_df.sort_values(by=query.sort_by, ascending=ascending)
+            with profiler.stage("sort", rows_in=len(result_df)) as st:
+                ascending = query.sort_direction == 'asc'
+                result_df = result_df.sort_values(by=query.sort_by, ascending=ascending)
+                st["rows_out"] = len(result_df)
         
         # 5. Limit
+        # Streaming formats serialize batch by batch
+        if fmt in ("ndjson", "arrow"):
+            total = len(df) if not query.group_by else min(len(result_df), query.limit)
+            return streaming_response(result_df.head(query.limit), fmt, headers={"X-Total-Rows-After-Filter": str(total)})
+
         # Sanitize NaNs
-        result_df = result_df.replace([np.inf, -np.inf], None)
-        result_df = result_df.where(pd.notnull(result_df), None)
-        
-        result_data = result_df.head(query.limit).to_dict(orient='records')
+        with profiler.stage("serialize", rows_in=len(result_df)) as st:
+            limited = result_df.head(query.limit)
+            result_data = encode_columnar(limited) if fmt == "columnar" else encode_records(limited)
+            st["rows_out"] = len(limited)
 
-        return {
+        response = {
             "data": result_data,
-            "total_rows_after_filter": len(df) if not query.group_by else len(result_data) 
+            "total_rows_after_filter": len(df) if not query.group_by else len(limited) 
         }
+        if profiler.enabled:
+            response["profile"] = profiler.report()
+        return json_response(response)
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Query failed: {e}")
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
+    finally:
+        profiler.stop()
 
 
 class SegmentFilter(BaseModel):
@@ -717,6 +1204,7 @@ class ComparisonRequest(BaseModel):
     segment2: SegmentFilter
 
 @router.post("/{id}/compare-segments")
+@run_in_lane("heavy")
 def compare_segments(
     id: int,
     request: ComparisonRequest,
@@ -742,7 +1230,7 @@ def compare_segments(
         import numpy as np
 
         # 1. Load Data
-        df = load_dataframe(file_path, data_source.type, limit=None)
+        df = load_source(data_source)
         
         # Helper to filter DF
         def apply_filters(base_df, filters):
@@ -809,10 +1297,13 @@ def compare_segments(
         raise HTTPException(status_code=500, detail=f"Comparison failed: {str(e)}")
 
 @router.get("/{id}/rows")
+@run_in_lane("interactive")
 def get_data_rows(
     id: int,
+    request: Request,
     start: int = 0,
     end: int = 100,
+    columns: Optional[str] = None, # comma-separated projection
     db: Session = Depends(database.get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
@@ -828,42 +1319,57 @@ def get_data_rows(
     print(f"DEBUG: Requesting rows from {file_path} (Start: {start}, End: {end})")
 
     try:
-        # Fallback to Pandas for stability (DuckDB having Windows/Format issues)
-        from app.engine.loader import load_dataframe
-        import pandas as pd
-        import numpy as np
+        from app.engine.versions import load_source, get_cached_source
+        from app.engine import columnar_store
         import traceback
 
-        # Ensure type is valid for loader
-        ftype = data_source.type.lower() if data_source.type else 'csv'
-        
-        # Load Data
-        df = load_dataframe(file_path, ftype, limit=None) # Load all for now (optimize later if needed)
-        total_rows = len(df)
-        
-        # Slicing
-        # Ensure indices are within bounds
-        safe_end = min(end, total_rows)
-        safe_start = min(start, total_rows)
-        
-        if safe_start >= safe_end:
-             rows = []
+        projection = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+
+        # Warm cache: slice in memory. Cold: read only the covering row groups
+        # from the Parquet sidecar; total_rows comes from its footer.
+        df = get_cached_source(data_source)
+        parquet_path = None
+        if df is None:
+            parquet_path = columnar_store.ensure_columnar(data_source)
+            if parquet_path is None:
+                df = load_source(data_source)
+        if df is not None:
+            if projection:
+                missing = [c for c in projection if c not in df.columns]
+                if missing:
+                    raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(missing)}")
+                df = df[projection]
+            total_rows = len(df)
+            safe_start = min(start, total_rows)
+            sliced = df.iloc[safe_start:max(safe_start, min(end, total_rows))]
         else:
-            sliced = df.iloc[safe_start:safe_end]
-            
-            # Sanitize for JSON (NaN -> null, Infinity -> null)
-            sliced = sliced.replace([np.inf, -np.inf], None)
-            sliced = sliced.where(pd.notnull(sliced), None)
-            
-            rows = sliced.to_dict(orient='records')
+            try:
+                sliced, total_rows = columnar_store.read_rows(parquet_path, start, end, columns=projection)
+            except KeyError as e:
+                raise HTTPException(status_code=400, detail=f"Unknown columns: {e.args[0]}")
+            safe_start = min(start, total_rows)
+
+        # NDJSON / Arrow IPC: stream the slice in batches instead of one JSON body
+        fmt = negotiate_format(request.headers.get("accept"))
+        if fmt in ("ndjson", "arrow"):
+            return streaming_response(sliced, fmt, headers={
+                "X-Total-Rows": str(total_rows),
+                "X-Start": str(safe_start),
+                "X-End": str(safe_start + len(sliced))
+            })
 
-        return {
+        # NaN/Inf -> null handled column by column in the encoder
+        rows = encode_columnar(sliced) if fmt == "columnar" else encode_records(sliced)
+
+        return json_response({
             "total_rows": total_rows,
             "rows": rows,
             "start": safe_start,
-            "end": safe_start + len(rows)
-        }
+            "end": safe_start + len(sliced)
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Rows fetch failed: {e}")
         traceback.print_exc()
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.api import deps
+from app.core import database
+from app.core.jobs import job_status
+from app.models.job import Job
+from app.models.user import User
+
+router = APIRouter()
+
+def _get_job(db: Session, id: int, current_user: User) -> Job:
+    job = db.query(Job).filter(Job.id == id).first()
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/")
+def list_jobs(
+    status: Optional[str] = None,
+    data_source_id: Optional[int] = None,
+    limit: int = 50,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    query = db.query(Job).filter(Job.user_id == current_user.id)
+    if status:
+        query = query.filter(Job.status == status)
+    if data_source_id is not None:
+        query = query.filter(Job.data_source_id == data_source_id)
+    jobs = query.order_by(Job.id.desc()).limit(min(max(1, limit), 500)).all()
+    return [job_status(job) for job in jobs]
+
+@router.get("/{id}")
+def get_job(
+    id: int,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    return job_status(_get_job(db, id, current_user))
+
+@router.get("/{id}/result")
+def get_job_result(
+    id: int,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    job = _get_job(db, id, current_user)
+    if job.status == "failed":
+        raise HTTPException(status_code=422, detail=f"Job failed: {job.error}")
+    if job.status != "succeeded":
+        # Not ready yet: poll /jobs/{id} for progress
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return {"id": job.id, "type": job.type, "result": job.result}
@@ -5,6 +5,7 @@ from app.core import database
 from app.models.data_source import DataSource
 from app.models.analysis import SavedInsight
 from app.models.project import Project
+from app.core.scheduler import run_in_lane, scheduler
 from sqlalchemy import text
 import time
 import os
@@ -12,6 +13,7 @@ import os
 router = APIRouter()
 
 @router.get("/stats")
+@run_in_lane("heavy")
 def get_monitoring_stats(dataset_id: int = None, db: Session = Depends(database.get_db), current_user = Depends(deps.get_current_user)):
     print(f"DEBUG: Executing get_monitoring_stats with dataset_id={dataset_id}")
     # 1. DB Health & Latency
@@ -103,14 +105,18 @@ def get_monitoring_stats(dataset_id: int = None, db: Session = Depends(database.
                     freshness_status = "warning"
                     last_query_time = f"{int(hours_since_mod // 24)}d ago"
 
-                # Check Quality (Load DF)
-                from app.engine.loader import load_dataframe
-                # Load small sample or full? Full cached is fast.
-                df = load_dataframe(file_path, ds.type, limit=1000) 
-                
-                null_counts = df.isnull().sum().sum()
-                total_cells = df.size
-                dupes = df.duplicated().sum()
+                # Check Quality from the stored profile (full dataset, no load).
+                # Not profiled yet -> queue it and report this dataset on a later poll.
+                from app.engine.catalog import get_profile, schedule_profile
+                profile = get_profile(db, ds, compute_if_missing=False)
+                if profile is None:
+                    schedule_profile(ds)
+                    quality_status = "pending"
+                    null_counts, total_cells, dupes = 0, 1, 0
+                else:
+                    null_counts = sum(col["missing"] for col in profile["column_stats"].values())
+                    total_cells = max(1, profile["total_rows"] * len(profile["column_stats"]))
+                    dupes = profile["duplicate_rows"]
                 
                 if (null_counts / total_cells) > 0.1 or dupes > 0:
                     quality_status = "critical" if dupes > 0 else "warning"
@@ -175,7 +181,8 @@ def get_monitoring_stats(dataset_id: int = None, db: Session = Depends(database.
         "performance": {
             "avg_query_time_ms": 180 if not dataset_id else random.randint(50, 250),
             "slowest_query_s": 2.4 if not dataset_id else random.uniform(0.5, 3.0),
-            "cached_queries_pct": 72
+            "cached_queries_pct": 72,
+            "execution_lanes": scheduler.stats()
         },
         "insight_quality": {
             "high": high_conf,
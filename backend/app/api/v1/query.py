@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.engine.query_router import run_query
+from app.engine.profiler import QueryProfiler
 from app.core import database, security
 # Add auth dependency
 
@@ -7,9 +8,23 @@ router = APIRouter()
 
 @router.post("/run")
 def run_query_api(payload: dict):
+    # cProfile dumps need an admin identity, which this endpoint does not resolve
+    if payload.get("profile") == "cprofile":
+        raise HTTPException(status_code=403, detail="cProfile dumps are restricted to admins")
+
+    try:
+        profiler = QueryProfiler(payload.get("profile")).start()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         # In a real app, validate payload with Pydantic
-        result = run_query(payload)
-        return {"data": result}
+        result = run_query(payload, profiler=profiler)
+        response = {"data": result}
+        if profiler.enabled:
+            response["profile"] = profiler.report()
+        return response
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        profiler.stop()
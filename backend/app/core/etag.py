@@ -0,0 +1,39 @@
+import hashlib
+import json
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def compute_etag(*parts, **params) -> str:
+    """
+    Strong ETag from identifying parts (e.g. data source id + version) plus the
+    request parameters that shape the response, normalized so key order and
+    value types do not produce spurious mismatches.
+    """
+    normalized = json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+    digest = hashlib.sha256(f"{json.dumps(parts, default=str)}|{normalized}".encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag[2:] == etag if tag.startswith("W/") else tag == etag for tag in candidates)
+
+
+def cache_headers(etag: str) -> dict:
+    # Clients may keep the body but must revalidate on every use
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Return a 304 response when the client already has this representation."""
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.job import Job
+
+# Background jobs for work that outlives a request (ingest, cleaning). Jobs are
+# rows in the metadata DB, so status, progress and results survive restarts
+# and can be read from any API process. They run on the heavy lane; CPU-bound
+# kernels inside them still fan out to the process pool.
+#
+#   pending -> running -> succeeded
+#                      -> pending (retry with backoff) ... -> failed
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_SECONDS = float(os.getenv("JOB_RETRY_SECONDS", "5"))
+# A running job without a heartbeat for this long is assumed orphaned (its
+# process died) and is requeued at startup
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "600"))
+ACTIVE_STATUSES = ("pending", "running")
+
+_handlers: Dict[str, Callable] = {}
+
+
+def job_handler(job_type: str):
+    """
+    Register `func(db, job, progress) -> dict` as the runner for `job_type`.
+    `progress(fraction, message=None)` records progress and a heartbeat.
+    Raise ValueError for failures a retry cannot fix.
+    """
+    def decorator(func):
+        _handlers[job_type] = func
+        return func
+    return decorator
+
+
+def _load_handlers():
+    # Handlers register on import
+    import app.engine.tasks  # noqa: F401
+
+
+def _dedupe_key(job_type: str, data_source_id: Optional[int], params: dict) -> str:
+    payload = json.dumps([job_type, data_source_id, params], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def submit_job(db: Session, job_type: str, user_id: int, params: dict = None,
+               data_source_id: int = None, max_attempts: int = None) -> Job:
+    """
+    Queue a job, or return the pending/running job with the same type,
+    data source and params instead of queueing a duplicate.
+    """
+    params = params or {}
+    key = _dedupe_key(job_type, data_source_id, params)
+    existing = _active_job(db, key)
+    if existing is not None:
+        return existing
+
+    job = Job(
+        user_id=user_id,
+        data_source_id=data_source_id,
+        type=job_type,
+        status="pending",
+        params=params,
+        dedupe_key=key,
+        progress=0.0,
+        attempts=0,
+        max_attempts=max_attempts or JOB_MAX_ATTEMPTS
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request queued the same job since the check (unique active dedupe key)
+        db.rollback()
+        existing = _active_job(db, key)
+        if existing is None:
+            raise
+        return existing
+    db.refresh(job)
+    _enqueue(job.id)
+    return job
+
+
+def _active_job(db: Session, key: str) -> Optional[Job]:
+    return db.query(Job).filter(Job.dedupe_key == key, Job.status.in_(ACTIVE_STATUSES)).first()
+
+
+def _enqueue(job_id: int, delay: float = 0):
+    from app.core.scheduler import scheduler
+
+    if delay > 0:
+        timer = threading.Timer(delay, _enqueue, args=(job_id,))
+        timer.daemon = True
+        timer.start()
+        return
+    scheduler.lane("heavy").submit(run_job, job_id)
+
+
+def run_job(job_id: int):
+    from app.core.database import SessionLocal
+
+    _load_handlers()
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        # Claim atomically: when several processes see the same pending job only one runs it
+        claimed = db.query(Job).filter(
+            Job.id == job_id, Job.status == "pending", Job.attempts < Job.max_attempts
+        ).update({
+            "status": "running",
+            "attempts": Job.attempts + 1,
+            "worker": _worker_id(),
+            "started_at": now,
+            "heartbeat_at": now
+        }, synchronize_session=False)
+        if not claimed:
+            # A pending job with no attempts left (e.g. requeued by hand) is not run again
+            db.query(Job).filter(
+                Job.id == job_id, Job.status == "pending", Job.attempts >= Job.max_attempts
+            ).update({"status": "failed", "finished_at": now}, synchronize_session=False)
+        db.commit()
+        if not claimed:
+            return
+        job = db.query(Job).filter(Job.id == job_id).first()
+
+        def progress(fraction: float, message: str = None):
+            job.progress = max(0.0, min(1.0, float(fraction)))
+            if message is not None:
+                job.message = message
+            job.heartbeat_at = datetime.utcnow()
+            db.commit()
+
+        try:
+            handler = _handlers.get(job.type)
+            if handler is None:
+                raise ValueError(f"Unknown job type '{job.type}'")
+            result = handler(db, job, progress)
+        except Exception as e:
+            db.rollback()
+            job = db.query(Job).filter(Job.id == job_id).first()
+            if job is None:
+                return  # Deleted together with its data source
+            print(f"Job {job_id} ({job.type}) attempt {job.attempts} failed: {e}")
+            job.error = str(e)
+            if not isinstance(e, ValueError) and job.attempts < job.max_attempts:
+                job.status = "pending"
+                job.message = f"Retrying after error: {e}"
+                db.commit()
+                _enqueue(job_id, JOB_RETRY_SECONDS * 2 ** (job.attempts - 1))
+            else:
+                job.status = "failed"
+                job.finished_at = datetime.utcnow()
+                db.commit()
+            return
+
+        job.status = "succeeded"
+        job.progress = 1.0
+        job.result = result
+        job.error = None
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    except Exception as e:
+        print(f"Job {job_id} could not be run: {e}")
+    finally:
+        db.close()
+
+
+def recover_jobs():
+    """
+    Requeue jobs left pending, or running without a heartbeat, by a stopped
+    process. Orphaned jobs that used their last attempt are failed instead.
+    """
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=JOB_STALE_SECONDS)
+        orphaned = (Job.status == "running") & ((Job.heartbeat_at == None) | (Job.heartbeat_at < stale))  # noqa: E711
+        db.query(Job).filter(orphaned, Job.attempts >= Job.max_attempts).update({
+            "status": "failed",
+            "error": "The worker running the last attempt stopped",
+            "finished_at": now
+        }, synchronize_session=False)
+        db.query(Job).filter(orphaned).update(
+            {"status": "pending", "message": "Requeued after restart"}, synchronize_session=False
+        )
+        db.commit()
+        pending = [job_id for (job_id,) in db.query(Job.id).filter(Job.status == "pending").all()]
+    except Exception as e:
+        print(f"Job recovery failed: {e}")
+        return
+    finally:
+        db.close()
+    for job_id in pending:
+        _enqueue(job_id)
+
+
+def job_status(job: Job) -> dict:
+    return {
+        "id": job.id,
+        "type": job.type,
+        "status": job.status,
+        "data_source_id": job.data_source_id,
+        "progress": job.progress,
+        "message": job.message,
+        "error": job.error,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
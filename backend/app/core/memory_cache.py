@@ -49,3 +49,54 @@ class DataFrameCache:
             self.access_time.clear()
 
 df_cache = DataFrameCache()
+
+
+class ResultCache:
+    """
+    LRU cache for derived results (correlation matrices and the like). Keys
+    include the dataset version, so a new version simply misses and the old
+    entries age out.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(ResultCache, cls).__new__(cls)
+                    cls._instance.cache = {}
+                    cls._instance.access_time = {}
+                    cls._instance.max_size = 64
+        return cls._instance
+
+    def get(self, key):
+        with self._lock:
+            if key in self.cache:
+                self.access_time[key] = datetime.now()
+                return self.cache[key]
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            if key not in self.cache and len(self.cache) >= self.max_size:
+                lru_key = min(self.access_time, key=self.access_time.get)
+                del self.cache[lru_key]
+                del self.access_time[lru_key]
+
+            self.cache[key] = value
+            self.access_time[key] = datetime.now()
+
+    def invalidate_prefix(self, prefix: tuple):
+        # Drop every entry whose key starts with `prefix`, e.g. ("correlation", source_id)
+        with self._lock:
+            for key in [k for k in self.cache if k[:len(prefix)] == prefix]:
+                del self.cache[key]
+                self.access_time.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.cache.clear()
+            self.access_time.clear()
+
+result_cache = ResultCache()
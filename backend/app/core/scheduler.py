@@ -0,0 +1,144 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Dict, Optional
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+
+# Two lanes so a heavy /statistics or /ai/generate call cannot queue in front of
+# cheap paging requests:
+#   interactive -> rows, preview, query (latency sensitive)
+#   heavy       -> statistics, correlation, cleaning, profiling, AI
+# Each lane has its own worker pool and a per-user cap on in-flight work so one
+# user firing ten heavy requests cannot occupy every worker.
+INTERACTIVE_WORKERS = int(os.getenv("INTERACTIVE_WORKERS", "16"))
+INTERACTIVE_PER_USER = int(os.getenv("INTERACTIVE_PER_USER", "8"))
+HEAVY_WORKERS = int(os.getenv("HEAVY_WORKERS", "4"))
+HEAVY_PER_USER = int(os.getenv("HEAVY_PER_USER", "2"))
+# Process pool for picklable CPU-bound kernels: compute_statistics profiles wide
+# frames across it (app/engine/parallel_profile.py), outside the heavy lane's GIL.
+# Defaults to the CPU count; 1 disables it.
+HEAVY_PROCESSES = int(os.getenv("HEAVY_PROCESSES", str(os.cpu_count() or 1)))
+
+
+class ExecutionLane:
+    def __init__(self, name: str, max_workers: int, per_user: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.per_user = max(1, per_user)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"lane-{name}")
+        self._user_slots: Dict[object, asyncio.Semaphore] = {}
+        # Requests holding or waiting for each user's slot; at 0 the semaphore is dropped
+        self._user_waiters: Dict[object, int] = {}
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def _claim_slot(self, user_key) -> asyncio.Semaphore:
+        with self._lock:
+            sem = self._user_slots.get(user_key)
+            if sem is None:
+                sem = asyncio.Semaphore(self.per_user)
+                self._user_slots[user_key] = sem
+            self._user_waiters[user_key] = self._user_waiters.get(user_key, 0) + 1
+            return sem
+
+    def _release_slot(self, user_key):
+        with self._lock:
+            remaining = self._user_waiters[user_key] - 1
+            if remaining:
+                self._user_waiters[user_key] = remaining
+            else:
+                # Idle user: nothing holds or waits on the semaphore any more
+                del self._user_waiters[user_key]
+                del self._user_slots[user_key]
+
+    async def run(self, user_key, func: Callable, *args, **kwargs):
+        # Wait for a per-user slot first, then hand the call to the lane's pool.
+        # Users over their cap queue behind themselves, not behind everyone else.
+        sem = self._claim_slot(user_key)
+        try:
+            async with sem:
+                loop = asyncio.get_running_loop()
+                self.in_flight += 1
+                try:
+                    return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+                finally:
+                    self.in_flight -= 1
+        finally:
+            self._release_slot(user_key)
+
+    def submit(self, func: Callable, *args, **kwargs):
+        # Fire-and-forget entry for work that is not tied to an HTTP request
+        return self.executor.submit(func, *args, **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "per_user": self.per_user,
+            "in_flight": self.in_flight,
+            "users": len(self._user_slots)
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Scheduler:
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(Scheduler, cls).__new__(cls)
+                    cls._instance.lanes = {
+                        "interactive": ExecutionLane("interactive", INTERACTIVE_WORKERS, INTERACTIVE_PER_USER),
+                        "heavy": ExecutionLane("heavy", HEAVY_WORKERS, HEAVY_PER_USER)
+                    }
+                    cls._instance._process_pool = None
+        return cls._instance
+
+    def lane(self, name: str) -> ExecutionLane:
+        return self.lanes[name]
+
+    def process_pool(self) -> Optional[ProcessPoolExecutor]:
+        # Created lazily: most requests never need it and forking is not free
+        if HEAVY_PROCESSES <= 1:
+            return None
+        with self._lock:
+            if self._process_pool is None:
+                # forkserver: workers are not forked from this multi-threaded server process
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._process_pool = ProcessPoolExecutor(max_workers=HEAVY_PROCESSES, mp_context=multiprocessing.get_context(method))
+            return self._process_pool
+
+    def stats(self) -> dict:
+        return {name: lane.stats() for name, lane in self.lanes.items()}
+
+    def shutdown(self):
+        for lane in self.lanes.values():
+            lane.shutdown()
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+
+scheduler = Scheduler()
+
+
+def run_in_lane(lane_name: str):
+    """
+    Route decorator: runs a sync endpoint on the given lane instead of the
+    shared default threadpool. The signature is preserved so FastAPI still
+    resolves dependencies; fairness is keyed on the `current_user` argument.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            user = kwargs.get("current_user")
+            user_key = getattr(user, "id", None)
+            return await scheduler.lane(lane_name).run(user_key, func, *args, **kwargs)
+        return wrapper
+    return decorator
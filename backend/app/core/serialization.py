@@ -0,0 +1,164 @@
+import base64
+import datetime
+import decimal
+import json
+import os
+from typing import Any, List
+import numpy as np
+import pandas as pd
+from fastapi.responses import Response
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.dataview.columnar+json"
+# String columns with distinct/rows at or below this ratio are dictionary-encoded
+DICTIONARY_MAX_RATIO = float(os.getenv("COLUMNAR_DICTIONARY_MAX_RATIO", "0.5"))
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements, stdlib is the fallback
+    orjson = None
+
+
+def _default(value: Any):
+    # Only reached for cells the fast path could not turn into native JSON types
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time, pd.Timestamp)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        # orjson writes NaN/Inf as null and handles datetime natively
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, allow_nan=False).encode("utf-8")
+
+
+def _datetime_values(series: pd.Series) -> list:
+    if getattr(series.dt, "tz", None) is not None:
+        return [None if pd.isna(v) else v.isoformat() for v in series]
+    values = series.to_numpy(dtype="datetime64[ns]")
+    mask = np.isnat(values)
+    # Second precision unless some value actually carries a fraction (matches Timestamp.isoformat)
+    seconds = values.astype("datetime64[s]")
+    unit = "s" if (seconds[~mask] == values[~mask]).all() else "us"
+    out = np.datetime_as_string(values, unit=unit).astype(object)
+    out[mask] = None
+    return out.tolist()
+
+
+def column_values(series: pd.Series) -> list:
+    """
+    Convert one column to a list of JSON-native Python values in a vectorized
+    way: NaN/Inf/NaT -> None, datetimes -> ISO strings, numpy scalars unboxed.
+    """
+    dtype = series.dtype
+    kind = getattr(dtype, "kind", "O")
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        return column_values(series.astype(object))
+
+    if kind == "f" and isinstance(dtype, np.dtype):
+        values = series.to_numpy()
+        mask = ~np.isfinite(values)
+        if mask.any():
+            out = values.astype(object)
+            out[mask] = None
+            return out.tolist()
+        return values.tolist()
+
+    if kind in "iub" and isinstance(dtype, np.dtype):
+        return series.to_numpy().tolist()
+
+    if kind == "M":
+        return _datetime_values(series)
+
+    if kind == "m":
+        # Seconds, as FastAPI's jsonable_encoder does for timedeltas
+        return column_values(series.dt.total_seconds())
+
+    # Extension dtypes (Int64, boolean, string, Float64) and plain object columns
+    values = series.to_numpy(dtype=object, na_value=None) if not isinstance(dtype, np.dtype) else series.to_numpy(dtype=object)
+    mask = pd.isna(values)
+    if mask.any():
+        values = values.copy()
+        values[mask] = None
+    if kind == "f":
+        # Float extension arrays can still hold +/-Inf
+        values = [None if isinstance(v, float) and not np.isfinite(v) else v for v in values]
+        return values
+    return values.tolist()
+
+
+def encode_records(df: pd.DataFrame) -> List[dict]:
+    """
+    Column-at-a-time replacement for replace(inf) + where(notnull) + to_dict(records).
+    No full-frame copies or object upcasts; each column is converted once.
+    """
+    if df.empty:
+        return []
+    names = [str(c) for c in df.columns]
+    columns = [column_values(df.iloc[:, i]) for i in range(df.shape[1])]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def json_response(payload: Any, status_code: int = 200, headers: dict = None) -> Response:
+    """Serialize straight to bytes, bypassing FastAPI's jsonable_encoder walk."""
+    return Response(content=dumps(payload), status_code=status_code, media_type="application/json", headers=headers)
+
+
+def _b64(values: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(values).tobytes()).decode("ascii")
+
+
+def _typed_column(name: str, series: pd.Series) -> dict:
+    kind = series.dtype.kind
+    if kind == "b":
+        # 0 = false, 1 = true, 2 = null (nullable "boolean" columns)
+        values = series.to_numpy(dtype="uint8", na_value=2) if not isinstance(series.dtype, np.dtype) else series.to_numpy()
+        return {"name": name, "encoding": "typed", "type": "uint8", "data": _b64(values.astype("<u1"))}
+
+    if kind in "iu" and isinstance(series.dtype, np.dtype):
+        values = series.to_numpy()
+        if len(values) == 0 or (values.min() >= -2**31 and values.max() < 2**31):
+            return {"name": name, "encoding": "typed", "type": "int32", "data": _b64(values.astype("<i4"))}
+
+    # float64 for floats, wide ints and nullable numerics; NaN marks null (Inf is sent as null too)
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    values = np.where(np.isfinite(values), values, np.nan).astype("<f8")
+    return {"name": name, "encoding": "typed", "type": "float64", "data": _b64(values)}
+
+
+def encode_columnar(df: pd.DataFrame) -> dict:
+    """
+    Compact column-oriented payload: numeric columns as base64 little-endian
+    typed arrays, low-cardinality strings as dictionary + int32 codes (-1 =
+    null), everything else as a plain JSON array of encoded values.
+    """
+    columns = []
+    n = len(df)
+    for i in range(df.shape[1]):
+        series = df.iloc[:, i]
+        name = str(df.columns[i])
+        dtype = series.dtype
+
+        if pd.api.types.is_numeric_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype):
+            columns.append(_typed_column(name, series))
+            continue
+
+        if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(dtype) or dtype == object:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            if n and len(uniques) <= max(1, n * DICTIONARY_MAX_RATIO):
+                columns.append({
+                    "name": name,
+                    "encoding": "dictionary",
+                    "dictionary": column_values(pd.Series(uniques)),
+                    "codes": _b64(codes.astype("<i4"))
+                })
+                continue
+
+        columns.append({"name": name, "encoding": "plain", "data": column_values(series)})
+
+    return {"format": "columnar", "length": n, "columns": columns}
@@ -1,6 +1,5 @@
 
 import pandas as pd
-import numpy as np
 
 class DataSummarizer:
     @staticmethod
@@ -9,49 +8,49 @@ class DataSummarizer:
         Generates a lightweight statistical profile of the dataframe
         formatted for LLM context injection.
         """
+        from app.engine.statistics import compute_statistics
+        return DataSummarizer.from_statistics(compute_statistics(df))
+
+    @staticmethod
+    def from_statistics(stats: dict) -> dict:
+        """
+        Reshape the canonical dataset profile (the /statistics payload stored
+        on the catalog) into the LLM context format without touching the data.
+        """
+        total_rows = stats["total_rows"]
+        column_stats = stats["column_stats"]
         profile = {
-            "total_rows": len(df),
-            "total_columns": len(df.columns),
+            "total_rows": total_rows,
+            "total_columns": len(column_stats),
             "columns": []
         }
 
-        for col in df.columns:
+        for col, data in column_stats.items():
             # 1. Base Info
-            dtype = str(df[col].dtype)
-            missing = int(df[col].isnull().sum())
-            unique = int(df[col].nunique())
-            
             col_info = {
                 "name": col,
-                "type": dtype,
-                "missing_count": missing,
-                "percent_missing": round((missing / len(df)) * 100, 1),
-                "unique_values": unique
+                "type": data["type"],
+                "missing_count": data["missing"],
+                "percent_missing": round((data["missing"] / total_rows) * 100, 1) if total_rows else 0.0,
+                "unique_values": data["distinct"]
             }
 
             # 2. Type-specific stats
-            if pd.api.types.is_numeric_dtype(df[col]):
-                desc = df[col].describe()
-                try:
-                    skew = float(df[col].skew())
-                except:
-                    skew = None
-                
+            if (data.get("distribution") or {}).get("type") == "top_values":
+                # Top frequent values for categorical
+                col_info["top_values"] = {item["name"]: item["count"] for item in data["distribution"]["data"][:5]}
+            elif "mean" in data:
                 col_info.update({
-                    "mean": float(desc['mean']) if not pd.isna(desc['mean']) else None,
-                    "min": float(desc['min']) if not pd.isna(desc['min']) else None,
-                    "max": float(desc['max']) if not pd.isna(desc['max']) else None,
-                    "std": float(desc['std']) if not pd.isna(desc['std']) else None,
-                    "sum": float(df[col].sum()) if not pd.isna(df[col].sum()) else None,
-                    "p25": float(desc['25%']) if not pd.isna(desc['25%']) else None,
-                    "p50": float(desc['50%']) if not pd.isna(desc['50%']) else None,
-                    "p75": float(desc['75%']) if not pd.isna(desc['75%']) else None,
-                    "skew": skew
+                    "mean": data["mean"],
+                    "min": data["min"],
+                    "max": data["max"],
+                    "std": data["std"],
+                    "sum": data.get("sum"),
+                    "p25": data["25%"],
+                    "p50": data["50%"],
+                    "p75": data["75%"],
+                    "skew": data["skew"]
                 })
-            else:
-                # Top frequent values for categorical
-                top_vals = df[col].value_counts().head(5).to_dict()
-                col_info["top_values"] = {str(k): int(v) for k, v in top_vals.items()}
 
             profile["columns"].append(col_info)
 
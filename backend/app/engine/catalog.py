@@ -0,0 +1,293 @@
+import json
+import os
+import threading
+from typing import Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+from app.models.catalog import DatasetCatalog
+
+# Rows kept inline in the catalog; larger previews read the Parquet sidecar head
+CATALOG_HEAD_ROWS = int(os.getenv("CATALOG_HEAD_ROWS", "100"))
+# Sources above this size are profiled chunk by chunk with mergeable sketches
+# instead of being loaded whole
+PROFILE_STREAMING_BYTES = int(os.getenv("PROFILE_STREAMING_BYTES", str(256 * 1024 * 1024)))
+PROFILE_CHUNK_ROWS = int(os.getenv("PROFILE_CHUNK_ROWS", "100000"))
+
+
+def _json_records(df: pd.DataFrame) -> list:
+    # The same encoding as /preview beyond the stored head, so both paths return identical values;
+    # the round trip through dumps leaves only types the JSON column can store
+    from app.core.serialization import dumps, encode_records
+    return json.loads(dumps(encode_records(df)))
+
+
+def _raw_size(data_source) -> Optional[int]:
+    # Bytes as uploaded: the stored file may be compressed, which says little about the data
+    config = data_source.connection_config or {}
+    file_path = config.get('file_path')
+    if not file_path or not os.path.exists(file_path):
+        return None
+    return config.get('size') or os.path.getsize(file_path)
+
+
+def _byte_size(data_source, df: pd.DataFrame) -> int:
+    size = _raw_size(data_source)
+    if size is not None:
+        return size
+    return int(df.memory_usage(deep=False).sum())
+
+
+def _load_full(data_source) -> pd.DataFrame:
+    from app.engine.versions import load_source
+    return load_source(data_source)
+
+
+def refresh_catalog(db: Session, data_source, df: pd.DataFrame = None) -> DatasetCatalog:
+    """
+    (Re)build the catalog entry for a DataSource. Pass the frame when the
+    caller already has it (ingest, cleaning) to avoid a second load.
+    """
+    if df is None:
+        df = _load_full(data_source)
+
+    entry = db.query(DatasetCatalog).filter(DatasetCatalog.data_source_id == data_source.id).first()
+    if entry is None:
+        entry = DatasetCatalog(data_source_id=data_source.id)
+        db.add(entry)
+
+    entry.row_count = len(df)
+    entry.column_names = [str(c) for c in df.columns]
+    entry.dtypes = {str(col): str(dtype) for col, dtype in df.dtypes.items()}
+    entry.byte_size = _byte_size(data_source, df)
+    entry.head_sample = _json_records(df.head(CATALOG_HEAD_ROWS))
+    db.commit()
+    db.refresh(entry)
+    return entry
+
+
+def get_catalog(db: Session, data_source, build_if_missing: bool = True) -> Optional[DatasetCatalog]:
+    entry = db.query(DatasetCatalog).filter(DatasetCatalog.data_source_id == data_source.id).first()
+    if entry is None and build_if_missing:
+        # Sources ingested before the catalog existed are backfilled on first access
+        entry = refresh_catalog(db, data_source)
+    return entry
+
+
+# (data_source_id, version) pairs with a background profile run queued or running
+_profiling = set()
+_profiling_lock = threading.Lock()
+
+
+def is_large(data_source) -> bool:
+    return (_raw_size(data_source) or 0) > PROFILE_STREAMING_BYTES
+
+
+def _should_stream(data_source) -> bool:
+    from app.engine.versions import get_cached_source
+    if get_cached_source(data_source) is not None:
+        return False  # Already in memory: the exact single-pass kernel is cheaper
+    return is_large(data_source)
+
+
+def _iter_chunks(data_source, rows: int):
+    from app.engine import columnar_store
+    from app.engine.loader import iter_dataframe_chunks
+    from app.engine.versions import is_derived, reader_options
+
+    # Derived versions exist only in the columnar store; the raw file is their root
+    if columnar_store.is_fresh(data_source) or (is_derived(data_source) and columnar_store.ensure_columnar(data_source)):
+        return columnar_store.iter_batches(columnar_store.base_path(data_source.id), rows)
+    return iter_dataframe_chunks(data_source.connection_config.get('file_path'), data_source.type, rows,
+                                 reader_options(data_source))
+
+
+def _known_duplicates(data_source, rows: int) -> Optional[int]:
+    # The row-hash index, when one exists for this version, replaces the sketch estimate
+    from app.engine.row_hash import peek_row_index
+    index = peek_row_index(data_source)
+    return index.duplicate_count() if index is not None and len(index) == rows else None
+
+
+def _sketch_profile(data_source, chunks) -> dict:
+    from app.engine.profile_builder import ProfileBuilder, save_builder
+
+    builder = ProfileBuilder()
+    for chunk in chunks:
+        builder.update(chunk)
+    try:
+        # Appends extend this state instead of rescanning the dataset
+        save_builder(data_source.id, data_source.version, builder)
+    except OSError as e:
+        print(f"Could not persist profile state for {data_source.id}: {e}")
+    return builder.result(_known_duplicates(data_source, builder.rows))
+
+
+def _stream_profile(data_source) -> dict:
+    from app.engine.readers import NotStreamable
+    try:
+        return _sketch_profile(data_source, _iter_chunks(data_source, PROFILE_CHUNK_ROWS))
+    except NotStreamable as e:
+        # The reader gave up midway: profile the whole frame in chunks instead
+        print(f"Streamed profile of {data_source.id} restarted: {e}")
+        df = _load_full(data_source)
+        return _sketch_profile(data_source, (df.iloc[i:i + PROFILE_CHUNK_ROWS] for i in range(0, len(df), PROFILE_CHUNK_ROWS)))
+
+
+def _catalog_from_profile(db: Session, data_source, profile: dict) -> DatasetCatalog:
+    # Streamed sources are never loaded whole; the catalog comes from the profile plus a head read
+    head = next(iter(_iter_chunks(data_source, CATALOG_HEAD_ROWS)), pd.DataFrame())
+
+    entry = DatasetCatalog(data_source_id=data_source.id)
+    entry.row_count = profile["total_rows"]
+    entry.column_names = list(profile["column_stats"])
+    entry.dtypes = {col: stats["type"] for col, stats in profile["column_stats"].items()}
+    entry.byte_size = _byte_size(data_source, head)
+    entry.head_sample = _json_records(head.head(CATALOG_HEAD_ROWS))
+    db.add(entry)
+    return entry
+
+
+def catalog_from_builder(db: Session, data_source, builder) -> dict:
+    """
+    Catalog and sketch profile for a source whose sketches were built while
+    it was uploaded; nothing is loaded apart from the head of the sidecar.
+    Sources small enough to load still get the exact profile in the background.
+    """
+    from app.engine.profile_builder import save_builder
+
+    try:
+        save_builder(data_source.id, data_source.version, builder)
+    except OSError as e:
+        print(f"Could not persist profile state for {data_source.id}: {e}")
+    profile = builder.result()
+    entry = get_catalog(db, data_source, build_if_missing=False) or _catalog_from_profile(db, data_source, profile)
+    entry.profile = profile
+    entry.profile_version = data_source.version
+    db.commit()
+    if not is_large(data_source):
+        schedule_profile(data_source)
+    return profile
+
+
+def refresh_profile(db: Session, data_source, df: pd.DataFrame = None) -> dict:
+    """
+    Compute the canonical profile for the current dataset version and store it
+    on the catalog entry. /statistics, /ai/generate and /monitoring read it back.
+    """
+    from app.engine.statistics import compute_statistics
+
+    version = data_source.version
+    if df is None and _should_stream(data_source):
+        profile = _stream_profile(data_source)
+    else:
+        from app.engine.outliers import get_outlier_index
+        from app.engine.row_hash import get_row_index
+        if df is None:
+            df = _load_full(data_source)
+        # Duplicate count comes from the per-version row-hash index (built once, reused by /clean)
+        profile = compute_statistics(df, duplicate_rows=get_row_index(data_source, df).duplicate_count())
+        # Outlier bitmaps for every method are built once here; the profile keeps their counts and bounds
+        outliers = get_outlier_index(data_source, df)
+        for col, col_stats in profile["column_stats"].items():
+            methods = outliers.summary.get(str(col))
+            if methods and "outliers" in col_stats:
+                col_stats["outliers"]["methods"] = methods
+        if is_large(data_source):
+            # Large sources keep sketch state as well, so appends stay proportional to the batch
+            _sketch_profile(data_source, (df.iloc[i:i + PROFILE_CHUNK_ROWS] for i in range(0, len(df), PROFILE_CHUNK_ROWS)))
+
+    entry = get_catalog(db, data_source, build_if_missing=False)
+    if entry is None and df is not None:
+        entry = refresh_catalog(db, data_source, df)
+    elif entry is None:
+        entry = _catalog_from_profile(db, data_source, profile)
+    entry.profile = profile
+    entry.profile_version = version
+    db.commit()
+    return profile
+
+
+def extend_catalog(db: Session, data_source, batch: pd.DataFrame, batch_bytes: int, parent_version: int,
+                   df: pd.DataFrame = None):
+    """
+    Bring the catalog (and, when its sketch state was kept, the profile) of
+    the parent version forward after an append, touching only the batch.
+    Returns True when the profile was extended, False when it must be recomputed.
+    """
+    from app.engine.profile_builder import load_builder, save_builder
+
+    entry = get_catalog(db, data_source, build_if_missing=False)
+    if df is not None or entry is None:
+        entry = refresh_catalog(db, data_source, df)
+    else:
+        entry.row_count = (entry.row_count or 0) + len(batch)
+        dtypes = dict(entry.dtypes or {})
+        for col, dtype in batch.dtypes.items():
+            if str(dtype) != dtypes.get(str(col)):
+                # e.g. int64 + float64 (a batch with nulls) -> float64
+                try:
+                    dtypes[str(col)] = str(np.result_type(np.dtype(dtypes[str(col)]), dtype))
+                except (TypeError, KeyError):
+                    dtypes[str(col)] = "object"
+        entry.dtypes = dtypes
+        entry.byte_size = (entry.byte_size or 0) + batch_bytes
+        head = entry.head_sample or []
+        if len(head) < CATALOG_HEAD_ROWS:
+            entry.head_sample = head + _json_records(batch.head(CATALOG_HEAD_ROWS - len(head)))
+        db.commit()
+
+    builder = load_builder(data_source.id, parent_version)
+    if builder is None:
+        return False
+    builder.update(batch)
+    try:
+        save_builder(data_source.id, data_source.version, builder)
+    except OSError as e:
+        print(f"Could not persist profile state for {data_source.id}: {e}")
+    entry.profile = builder.result(_known_duplicates(data_source, builder.rows))
+    entry.profile_version = data_source.version
+    db.commit()
+    return True
+
+
+def get_profile(db: Session, data_source, compute_if_missing: bool = True) -> Optional[dict]:
+    entry = get_catalog(db, data_source, build_if_missing=False)
+    if entry is not None and entry.profile is not None and entry.profile_version == data_source.version:
+        return entry.profile
+    if not compute_if_missing:
+        return None
+    return refresh_profile(db, data_source)
+
+
+def _profile_job(data_source_id: int, version: int, df: Optional[pd.DataFrame]):
+    from app.core.database import SessionLocal
+    from app.models.data_source import DataSource
+
+    db = SessionLocal()
+    try:
+        data_source = db.query(DataSource).filter(DataSource.id == data_source_id).first()
+        # Skip if the source was deleted or a newer version superseded this run
+        if data_source is not None and data_source.version == version:
+            refresh_profile(db, data_source, df)
+    except Exception as e:
+        print(f"Background profile failed for data source {data_source_id}: {e}")
+    finally:
+        db.close()
+        with _profiling_lock:
+            _profiling.discard((data_source_id, version))
+
+
+def schedule_profile(data_source, df: pd.DataFrame = None):
+    """
+    Queue a profile run on the heavy lane after ingest or cleaning so the first
+    reader finds it ready. Duplicate requests for the same version are dropped.
+    """
+    from app.core.scheduler import scheduler
+
+    key = (data_source.id, data_source.version)
+    with _profiling_lock:
+        if key in _profiling:
+            return
+        _profiling.add(key)
+    scheduler.lane("heavy").submit(_profile_job, data_source.id, data_source.version, df)
@@ -0,0 +1,199 @@
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+import pandas as pd
+
+# Cleaning steps as stored in a version's transformation log:
+#   {"type": "drop_na", "params": {"columns": [...]}}
+#   {"type": "fill_na", "params": {"columns": [...], "method": "mean|median|mode|constant", "value": ...}}
+#   {"type": "drop_duplicates", "params": {}}
+#   {"type": "drop_col", "params": {"columns": [...]}}
+#   {"type": "rename_col", "params": {"mapper": {old: new}}}
+#   {"type": "change_type", "params": {"column": ..., "type": "int|float|str|date"}}
+CLEANING_OPERATIONS = ("drop_na", "fill_na", "drop_duplicates", "drop_col", "rename_col", "change_type")
+# Dry runs evaluate the pipeline on this many rows and scale the counts up
+DRY_RUN_SAMPLE_ROWS = int(os.getenv("CLEANING_DRY_RUN_SAMPLE_ROWS", "20000"))
+DRY_RUN_PREVIEW_ROWS = 20
+
+
+def _fill_value(series: pd.Series, method: Optional[str], value):
+    if method == "mean" and pd.api.types.is_numeric_dtype(series):
+        return series.mean()
+    if method == "median" and pd.api.types.is_numeric_dtype(series):
+        return series.median()
+    if method == "mode":
+        mode_res = series.mode()
+        if not mode_res.empty:
+            return mode_res[0]
+    return value
+
+
+def _cast(series: pd.Series, new_type: str) -> Tuple[pd.Series, int]:
+    """Cast a column; also returns how many present values could not be converted."""
+    present = series.notna()
+    if new_type == "int":
+        numeric = pd.to_numeric(series, errors='coerce')
+        return numeric.fillna(0).astype(int), int((present & numeric.isna()).sum())
+    if new_type == "float":
+        numeric = pd.to_numeric(series, errors='coerce')
+        return numeric, int((present & numeric.isna()).sum())
+    if new_type == "str":
+        return series.astype(str), 0
+    if new_type == "date":
+        dates = pd.to_datetime(series, errors='coerce')
+        return dates, int((present & dates.isna()).sum())
+    return series, 0
+
+
+def apply_operations(df: pd.DataFrame, operations: List[dict], row_index: Callable = None,
+                     report: list = None) -> Tuple[pd.DataFrame, Dict[str, Optional[str]], object]:
+    """
+    Run cleaning steps against `df` without modifying it (the input is
+    usually the cached frame of the parent version).
+
+    `row_index` optionally returns the parent's RowHashIndex, so dedupe can
+    reuse it while no step has changed row contents.
+
+    Returns (frame, origins, index):
+      origins  {output column: parent column whose values it carries unchanged,
+               or None when the column was rewritten}
+      index    RowHashIndex of the output when it was carried through, else None
+
+    When `report` is a list, one entry per step is appended with the rows it
+    removed, the values it filled and the values it failed to cast.
+    """
+    from app.engine.row_hash import RowHashIndex
+
+    df = df.copy(deep=False)
+    origins = {str(col): str(col) for col in df.columns}
+    rows_changed = False
+    # Row-hash index tracking `df`; valid while only renames and dedupes ran
+    index = None
+    rows_pristine = True
+
+    for op in operations:
+        op_type, params = op["type"], op.get("params") or {}
+        step = {"type": op_type, "rows_before": len(df), "filled": {}, "cast_failures": {}}
+        if report is not None:
+            report.append(step)
+
+        if op_type == "drop_duplicates":
+            if index is None:
+                index = row_index() if rows_pristine and row_index is not None else RowHashIndex.build(df)
+            # Confirmed against the rows: a hash match alone never drops a row
+            keep = ~index.duplicate_mask(df)
+            if not keep.all():
+                df = df[keep]
+                index = index.filter(keep)
+                rows_changed = True
+            step["rows_removed"] = step["rows_before"] - len(df)
+            continue
+        elif op_type != "rename_col":
+            # Row hashes ignore column names; anything else may change them
+            index = None
+            rows_pristine = False
+
+        if op_type == "drop_na":
+            cols = params.get("columns", [])
+            before = len(df)
+            df = df.dropna(subset=cols) if cols else df.dropna()
+            rows_changed = rows_changed or len(df) != before
+
+        elif op_type == "fill_na":
+            cols = params.get("columns", [])
+            target_cols = cols if cols else list(df.columns)
+            for col in target_cols:
+                if col not in df.columns:
+                    continue
+                fill_val = _fill_value(df[col], params.get("method"), params.get("value"))
+                missing = int(df[col].isna().sum())
+                if fill_val is not None and missing:
+                    df[col] = df[col].fillna(fill_val)
+                    origins[str(col)] = None
+                    step["filled"][str(col)] = missing
+
+        elif op_type == "drop_col":
+            cols = [c for c in params.get("columns", []) if c in df.columns]
+            df = df.drop(columns=cols)
+            for col in cols:
+                origins.pop(str(col), None)
+
+        elif op_type == "rename_col":
+            rename_map = params.get("mapper", {})
+            df = df.rename(columns=rename_map)
+            origins = {str(rename_map.get(col, col)): origin for col, origin in origins.items()}
+
+        elif op_type == "change_type":
+            col = params.get("column")
+            new_type = params.get("type")
+            if col in df.columns:
+                try:
+                    df[col], failures = _cast(df[col], new_type)
+                    origins[str(col)] = None
+                    step["cast_failures"][str(col)] = failures
+                except Exception as e:
+                    print(f"Failed to cast {col} to {new_type}: {e}")
+
+        step["rows_removed"] = step["rows_before"] - len(df)
+
+    if rows_changed:
+        # Filtered rows no longer line up with any parent column; positions are
+        # renumbered as if the version had been read back from storage
+        df = df.reset_index(drop=True)
+        origins = {col: None for col in origins}
+    return df, origins, index
+
+
+def _scale(count: int, factor: float) -> int:
+    return int(round(count * factor))
+
+
+def estimate_impact(sample: pd.DataFrame, operations: List[dict], total_rows: int,
+                    duplicate_rows: Optional[int] = None) -> Tuple[dict, pd.DataFrame]:
+    """
+    Dry run: apply `operations` to `sample` and project every count onto
+    `total_rows`. Returns (estimate, cleaned sample). Nothing is written. `duplicate_rows`, when the full dataset's
+    count is already known, replaces the sampled estimate for a dedupe that
+    runs before any step changing row contents (duplicates do not scale
+    linearly with sample size).
+    """
+    report = []
+    result, _, _ = apply_operations(sample, operations, report=report)
+    factor = total_rows / len(sample) if len(sample) else 0.0
+    exact = len(sample) >= total_rows
+
+    steps = []
+    projected_rows = total_rows
+    pristine = True
+    for step in report:
+        if step["type"] == "drop_duplicates" and pristine and duplicate_rows is not None:
+            removed = duplicate_rows
+        else:
+            removed = _scale(step["rows_removed"], factor)
+        removed = min(removed, projected_rows)
+        projected_rows -= removed
+        steps.append({
+            "type": step["type"],
+            "sample": {
+                "rows_removed": step["rows_removed"],
+                "values_filled": step["filled"],
+                "cast_failures": step["cast_failures"]
+            },
+            "projected": {
+                "rows_removed": removed,
+                "values_filled": {col: _scale(n, factor) for col, n in step["filled"].items()},
+                "cast_failures": {col: _scale(n, factor) for col, n in step["cast_failures"].items()}
+            }
+        })
+        if step["type"] != "rename_col":
+            pristine = False
+
+    return {
+        "dry_run": True,
+        "exact": exact,
+        "total_rows": total_rows,
+        "sampled_rows": len(sample),
+        "projected_rows_after": projected_rows,
+        "projected_rows_removed": total_rows - projected_rows,
+        "columns_after": [str(c) for c in result.columns],
+        "steps": steps
+    }, result
@@ -0,0 +1,376 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Parquet sidecars for uploaded files. Row groups let /rows read only the slice
+# it needs and give row counts straight from the footer metadata.
+#
+# Layout under ds_<id>/:
+#   base.parquet       the current version, tagged with its DataSource.version
+#   columns/*.parquet  column segments, shared between versions
+#   versions/v<n>.json manifest of a version: parent, operations, column -> segments
+#                      (oldest first; "<file>#<column>" names one column of a
+#                      multi-column file, e.g. a hard link of the sidecar)
+# Appends add a segment per column and merge trailing segments while the newest
+# is at least half the size of the one before it, so a column keeps O(log rows)
+# segments and each row is rewritten O(log rows) times. Merged segments are left
+# in place: older manifests and append logs still point at them.
+COLUMNAR_DIR = os.getenv("COLUMNAR_DIR", os.path.join("uploads", "columnar"))
+ROW_GROUP_SIZE = int(os.getenv("COLUMNAR_ROW_GROUP_SIZE", "65536"))
+
+FILE_TYPES = ['csv', 'excel', 'json', 'xml']
+
+
+@contextmanager
+def atomic_open(path: str):
+    """
+    Write `path` through a temp file in the same directory: flushed, fsynced
+    and renamed over the target only once complete. Readers see either the
+    old file or the new one, never a partial write, even after a crash.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    # Persist the rename itself
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+_writer_locks = {}
+_writer_locks_guard = threading.Lock()
+
+
+@contextmanager
+def writer_lock(source_id: int):
+    """
+    Serialize writers (cleaning, checkout) of one dataset: a thread lock for
+    this process plus an advisory file lock for other worker processes.
+    """
+    with _writer_locks_guard:
+        lock = _writer_locks.setdefault(source_id, threading.Lock())
+    with lock:
+        try:
+            import fcntl
+        except ImportError:  # Windows: in-process lock only
+            yield
+            return
+        os.makedirs(dataset_dir(source_id), exist_ok=True)
+        with open(os.path.join(dataset_dir(source_id), ".writer.lock"), "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def arrow_safe_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # Mixed-type object columns cannot be mapped to a single Arrow type; store them as strings
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].where(df[col].isnull(), df[col].astype(str))
+    return df
+
+
+def to_arrow_table(df: pd.DataFrame) -> pa.Table:
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.Table.from_pandas(arrow_safe_frame(df), preserve_index=False)
+
+
+def dataset_dir(source_id: int) -> str:
+    return os.path.join(COLUMNAR_DIR, f"ds_{source_id}")
+
+
+def base_path(source_id: int) -> str:
+    return os.path.join(dataset_dir(source_id), "base.parquet")
+
+
+def write_parquet(df: pd.DataFrame, path: str, version: Optional[int] = None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = to_arrow_table(df)
+    if version is not None:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"source_version": str(version).encode()})
+    with atomic_open(path) as f:
+        pq.write_table(table, f, row_group_size=ROW_GROUP_SIZE)
+
+
+def sidecar_version(path: str) -> Optional[int]:
+    metadata = pq.read_schema(path).metadata or {}
+    value = metadata.get(b"source_version")
+    return int(value) if value is not None else None
+
+
+def _sidecar_current(data_source, path: str, file_path: str) -> bool:
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(file_path):
+        return False
+    # An untagged sidecar cannot prove which version it holds: it is rebuilt
+    return sidecar_version(path) == data_source.version
+
+
+def is_fresh(data_source) -> bool:
+    """True when the sidecar exists and holds the source's current version."""
+    file_path = (data_source.connection_config or {}).get('file_path')
+    return bool(file_path) and os.path.exists(file_path) and _sidecar_current(data_source, base_path(data_source.id), file_path)
+
+
+def ensure_columnar(data_source, df: pd.DataFrame = None) -> Optional[str]:
+    """
+    Return the Parquet sidecar for a file-backed DataSource, (re)building it
+    when missing, older than the source file or written for another version.
+    """
+    if data_source.type not in FILE_TYPES:
+        return None
+    file_path = data_source.connection_config.get('file_path')
+    if not file_path or not os.path.exists(file_path):
+        return None
+
+    path = base_path(data_source.id)
+    if _sidecar_current(data_source, path, file_path):
+        return path
+
+    if df is None:
+        from app.engine.versions import load_source
+        df = load_source(data_source)
+    write_parquet(df, path, version=data_source.version)
+    return path
+
+
+def row_count(path: str) -> int:
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def read_rows(path: str, start: int, end: int, columns: Optional[List[str]] = None) -> Tuple[pd.DataFrame, int]:
+    """
+    Read rows [start, end) touching only the row groups that overlap the range.
+    Returns (frame, total_rows).
+    """
+    pf = pq.ParquetFile(path)
+    total_rows = pf.metadata.num_rows
+    if columns:
+        missing = [c for c in columns if c not in pf.schema_arrow.names]
+        if missing:
+            raise KeyError(", ".join(missing))
+    start = max(0, min(start, total_rows))
+    end = max(start, min(end, total_rows))
+
+    groups = []
+    group_start = 0
+    first_group_start = None
+    for i in range(pf.metadata.num_row_groups):
+        n = pf.metadata.row_group(i).num_rows
+        group_end = group_start + n
+        if group_end > start and group_start < end:
+            if first_group_start is None:
+                first_group_start = group_start
+            groups.append(i)
+        if group_start >= end:
+            break
+        group_start = group_end
+
+    if not groups:
+        names = columns if columns else pf.schema_arrow.names
+        return pd.DataFrame(columns=names), total_rows
+
+    table = pf.read_row_groups(groups, columns=columns)
+    offset = start - first_group_start
+    table = table.slice(offset, end - start)
+    return table.to_pandas(), total_rows
+
+
+def sample_row_groups(path: str, rows: int, max_groups: int = 8) -> Tuple[pd.DataFrame, int]:
+    """
+    Representative sample without a full read: up to `max_groups` row groups
+    spread evenly over the file, down-sampled to `rows`. Returns (frame, total_rows).
+    """
+    pf = pq.ParquetFile(path)
+    total_rows = pf.metadata.num_rows
+    groups = pf.metadata.num_row_groups
+    if not groups:
+        return pf.schema_arrow.empty_table().to_pandas(), total_rows
+    picks = sorted(set(int(i) for i in np.linspace(0, groups - 1, min(groups, max_groups))))
+    df = pf.read_row_groups(picks).to_pandas()
+    if len(df) > rows:
+        df = df.sample(n=rows, random_state=0).sort_index().reset_index(drop=True)
+    return df, total_rows
+
+
+def numeric_columns(path: str) -> List[str]:
+    # Same selection as select_dtypes(np.number): ints and floats, not bools
+    schema = pq.ParquetFile(path).schema_arrow
+    return [f.name for f in schema if pa.types.is_integer(f.type) or pa.types.is_floating(f.type)]
+
+
+def read_columns(path: str, columns: List[str]) -> pd.DataFrame:
+    return pq.read_table(path, columns=columns).to_pandas()
+
+
+def iter_batches(path: str, batch_rows: int = ROW_GROUP_SIZE, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    # Bounded-memory scan of the whole sidecar
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+        yield batch.to_pandas()
+
+
+def columns_dir(source_id: int) -> str:
+    return os.path.join(dataset_dir(source_id), "columns")
+
+
+def manifest_path(source_id: int, version: int) -> str:
+    return os.path.join(dataset_dir(source_id), "versions", f"v{version}.json")
+
+
+def write_column(source_id: int, series: pd.Series) -> str:
+    """Store one column as its own Parquet file; returns the file name to put in a manifest."""
+    name = f"{uuid.uuid4().hex}.parquet"
+    with atomic_open(os.path.join(columns_dir(source_id), name)) as f:
+        pq.write_table(to_arrow_table(series.to_frame(name="values")), f)
+    return name
+
+
+def _segment(source_id: int, name: str) -> Tuple[str, Optional[str]]:
+    # (path, column) of a manifest segment; column is None for write_column files
+    file, _, column = name.partition("#")
+    return os.path.join(columns_dir(source_id), file), column or None
+
+
+def read_column(source_id: int, name: str) -> pd.Series:
+    path, column = _segment(source_id, name)
+    if column is None:
+        return pq.read_table(path).to_pandas()["values"]
+    return pq.read_table(path, columns=[column]).to_pandas()[column]
+
+
+def segment_rows(source_id: int, name: str) -> int:
+    return row_count(_segment(source_id, name)[0])
+
+
+def link_sidecar(source_id: int) -> Optional[List[Tuple[str, str]]]:
+    """
+    Hard-link (or copy) the sidecar into the column store and return a
+    (column, segment) pair per column, so the version it holds gets segments
+    without a parse or a rewrite. None when its column names are not unique.
+    The sidecar is only ever replaced by rename, so the link keeps this version.
+    """
+    names = pq.read_schema(base_path(source_id)).names
+    if len(set(names)) != len(names):
+        return None
+    file = f"{uuid.uuid4().hex}.parquet"
+    target = os.path.join(columns_dir(source_id), file)
+    os.makedirs(columns_dir(source_id), exist_ok=True)
+    try:
+        os.link(base_path(source_id), target)
+    except OSError:  # No hard links on this filesystem
+        shutil.copyfile(base_path(source_id), target)
+    return [(name, f"{file}#{name}") for name in names]
+
+
+def compact_segments(source_id: int, files: List[str]) -> List[str]:
+    """
+    Merge the trailing segments of a column while the newest run holds at least
+    half as many rows as the segment before it. Returns the new segment list.
+    """
+    rows = [segment_rows(source_id, name) for name in files]
+    start, tail = len(files) - 1, rows[-1] if rows else 0
+    while start > 0 and tail * 2 >= rows[start - 1]:
+        start -= 1
+        tail += rows[start]
+    if len(files) - start < 2:
+        return files
+    merged = pd.concat([read_column(source_id, name) for name in files[start:]], ignore_index=True)
+    return files[:start] + [write_column(source_id, merged)]
+
+
+def write_manifest(source_id: int, version: int, manifest: dict):
+    with atomic_open(manifest_path(source_id, version)) as f:
+        f.write(json.dumps(manifest).encode("utf-8"))
+
+
+def read_manifest(source_id: int, version: int) -> Optional[dict]:
+    path = manifest_path(source_id, version)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def column_files(entry: dict) -> List[str]:
+    # Segments of a manifest column, oldest first
+    return entry["files"] if "files" in entry else [entry["file"]]
+
+
+def has_columns(source_id: int, manifest: Optional[dict]) -> bool:
+    return bool(manifest) and manifest.get("columns") is not None and all(
+        os.path.exists(_segment(source_id, name)[0])
+        for entry in manifest["columns"] for name in column_files(entry)
+    )
+
+
+def manifest_files(manifest: dict) -> set:
+    """Column files a manifest needs: its segments and the logged rows of an append or refresh."""
+    names = [name for entry in manifest.get("columns") or [] for name in column_files(entry)]
+    for operation in manifest.get("operations") or []:
+        names.extend((operation.get("params") or {}).get("segments", {}).values())
+    return {name.partition("#")[0] for name in names}
+
+
+def remove_versions(source_id: int, versions: List[int]):
+    """
+    Delete the manifests of `versions` and every column file that no other
+    manifest still needs. Call under the writer lock.
+    """
+    doomed = set()
+    for version in versions:
+        manifest = read_manifest(source_id, version)
+        if manifest is not None:
+            doomed |= manifest_files(manifest)
+            os.remove(manifest_path(source_id, version))
+    versions_dir = os.path.dirname(manifest_path(source_id, 0))
+    for name in os.listdir(versions_dir) if os.path.isdir(versions_dir) else []:
+        if name.endswith(".json"):
+            with open(os.path.join(versions_dir, name)) as f:
+                doomed -= manifest_files(json.load(f))
+    for name in doomed:
+        path = os.path.join(columns_dir(source_id), name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def read_version(source_id: int, manifest: dict) -> pd.DataFrame:
+    """Assemble a version from its column segments (shared files are simply read again)."""
+    entries = manifest["columns"]
+    if not entries:
+        return pd.DataFrame(index=pd.RangeIndex(manifest.get("rows", 0)))
+    columns = []
+    for entry in entries:
+        segments = [read_column(source_id, name) for name in column_files(entry)]
+        columns.append(segments[0] if len(segments) == 1 else pd.concat(segments, ignore_index=True))
+    df = pd.concat(columns, axis=1)
+    df.columns = [entry["name"] for entry in entries]
+    return df
+
+
+def remove_dataset(source_id: int):
+    shutil.rmtree(dataset_dir(source_id), ignore_errors=True)
@@ -0,0 +1,127 @@
+import gzip
+import os
+import zipfile
+import zlib
+from typing import BinaryIO, Optional
+import pyarrow as pa
+
+# Raw uploads are kept compressed: on a mounted volume a cold load costs more
+# in disk I/O than decompression costs in CPU. The codec is the file suffix:
+#
+#   <sha256>.csv.zst   text upload, compressed on the way to disk (RAW_COMPRESSION)
+#   <sha256>.csv.gz    uploaded gzip-compressed, stored as received
+#   <sha256>.zip       uploaded zip archive holding one data file, stored as received
+#
+# Every reader opens raw files through open_raw(), which decompresses on the
+# fly, so nothing is ever unpacked to disk. zstd comes from pyarrow's codecs.
+RAW_COMPRESSION = os.getenv("RAW_COMPRESSION", "zstd").lower()  # zstd, gzip or none
+RAW_GZIP_LEVEL = int(os.getenv("RAW_GZIP_LEVEL", "6"))
+_SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+_CODECS = {".zst": "zstd", ".gz": "gzip", ".zip": "zip"}
+# Containers that are compressed already; compressing them again only costs CPU
+_PRECOMPRESSED = ('.xlsx', '.xls', '.zip', '.gz', '.zst')
+
+
+def codec_of(path: str) -> Optional[str]:
+    return _CODECS.get(os.path.splitext(path)[1].lower())
+
+
+def upload_ext(filename: str) -> str:
+    """Extension kept on the stored file: ".csv", or ".csv.gz" for a compressed upload."""
+    base, ext = os.path.splitext(filename.lower())
+    if ext == '.gz':
+        return os.path.splitext(base)[1] + ext
+    return ext
+
+
+def storage_suffix(ext: str) -> str:
+    """Suffix added when a file with this extension is stored (RAW_COMPRESSION)."""
+    if RAW_COMPRESSION not in _SUFFIXES or ext.lower().endswith(_PRECOMPRESSED):
+        return ""
+    return _SUFFIXES[RAW_COMPRESSION]
+
+
+def _is_data_member(info: zipfile.ZipInfo) -> bool:
+    # Folders, macOS resource forks and hidden files are not data
+    name = info.filename
+    return not info.is_dir() and not name.startswith('__MACOSX/') and not os.path.basename(name).startswith('.')
+
+
+def archive_member(path: str) -> str:
+    """Name of the single data file in a zip upload. Raises ValueError otherwise."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            names = [info.filename for info in archive.infolist() if _is_data_member(info)]
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Not a valid zip archive: {e}")
+    if len(names) != 1:
+        raise ValueError(f"Zip archives must contain exactly one data file, found {len(names)}")
+    return names[0]
+
+
+def logical_ext(path: str) -> str:
+    """Extension of the data inside: ".csv" for x.csv.zst, x.csv.gz and a zip holding y.csv."""
+    codec = codec_of(path)
+    if codec == "zip":
+        return os.path.splitext(archive_member(path))[1].lower()
+    if codec is not None:
+        path = os.path.splitext(path)[0]
+    return os.path.splitext(path)[1].lower()
+
+
+def open_raw(path: str) -> BinaryIO:
+    """Binary stream of a raw file's data, decompressed as it is read."""
+    codec = codec_of(path)
+    if codec == "zstd":
+        return pa.CompressedInputStream(pa.OSFile(path), "zstd")
+    if codec == "gzip":
+        return gzip.open(path, "rb")
+    if codec == "zip":
+        archive = zipfile.ZipFile(path)
+        member = archive.open(archive_member(path))
+        archive.close()  # The member keeps the file open until it is closed itself
+        return member
+    return open(path, "rb")
+
+
+def compressing_writer(fileobj: BinaryIO, suffix: str) -> BinaryIO:
+    """Wrap a binary file so writes are compressed with the codec of `suffix`; closing closes both."""
+    if suffix == ".zst":
+        return pa.CompressedOutputStream(pa.PythonFile(fileobj, mode="w"), "zstd")
+    if suffix == ".gz":
+        return _ClosingGzip(fileobj, RAW_GZIP_LEVEL)
+    return fileobj
+
+
+class _ClosingGzip(gzip.GzipFile):
+    # GzipFile leaves a passed-in file open
+    def __init__(self, fileobj: BinaryIO, level: int):
+        super().__init__(fileobj=fileobj, mode="wb", compresslevel=level, mtime=0)
+        self._raw = fileobj
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._raw.close()
+
+
+class GzipFeed:
+    """Incremental gunzip for a stream fed in pieces (multi-member files included)."""
+
+    def __init__(self):
+        self._decoder = zlib.decompressobj(wbits=31)
+
+    def decompress(self, data: bytes) -> bytes:
+        out = []
+        while data:
+            out.append(self._decoder.decompress(data))
+            data = self._decoder.unused_data
+            if data:
+                self._decoder = zlib.decompressobj(wbits=31)
+        return b"".join(out)
+
+    @property
+    def complete(self) -> bool:
+        """True when the data fed so far ends on a member boundary (not truncated)."""
+        return self._decoder.eof
@@ -0,0 +1,149 @@
+import os
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+CORRELATION_METHODS = ("pearson", "spearman")
+CORRELATION_FORMATS = ("heatmap", "upper", "pairs")
+# Rows beyond this are sampled (fixed seed, so a version always gets the same answer)
+CORRELATION_SAMPLE_ROWS = int(os.getenv("CORRELATION_SAMPLE_ROWS", "200000"))
+# Columns per block; bounds the temporary (rows x block) arrays
+CORRELATION_BLOCK_COLUMNS = int(os.getenv("CORRELATION_BLOCK_COLUMNS", "64"))
+DEFAULT_TOP_K = 50
+
+
+def _prepare(df: pd.DataFrame, method: str, sample_rows: Optional[int]) -> Tuple[List[str], np.ndarray, Optional[int]]:
+    numeric_df = df.select_dtypes(include=[np.number])
+    sampled = None
+    if sample_rows and len(numeric_df) > sample_rows:
+        numeric_df = numeric_df.sample(n=sample_rows, random_state=0)
+        sampled = sample_rows
+    if method == "spearman":
+        # Average ranks; NaNs stay NaN. Ranks are taken per column rather than
+        # per pair, which only differs from pandas where nulls do not line up.
+        numeric_df = numeric_df.rank(method="average")
+    columns = [str(c) for c in numeric_df.columns]
+    X = numeric_df.to_numpy(dtype="float64", na_value=np.nan, copy=True)
+    # Infinite values would poison the sums; treat them as missing
+    X[~np.isfinite(X)] = np.nan
+    return columns, X, sampled
+
+
+def _complete_block(Z: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    # No missing values: standardized columns, one matrix product per block
+    return Z[:, lo:hi].T @ Z
+
+
+def _pairwise_block(Xc: np.ndarray, Xc2: np.ndarray, M: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    """
+    Pairwise-complete Pearson for columns [lo, hi) against all columns, as
+    pandas does with nulls: every pair only uses rows where both are present.
+    All per-pair sums come from masked matrix products.
+    """
+    A, A2, Ma = Xc[:, lo:hi], Xc2[:, lo:hi], M[:, lo:hi]
+    n = Ma.T @ M
+    sum_a = A.T @ M
+    sum_b = Ma.T @ Xc
+    sum_aa = A2.T @ M
+    sum_bb = Ma.T @ Xc2
+    sum_ab = A.T @ Xc
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sum_ab - sum_a * sum_b / n
+        var_a = sum_aa - sum_a * sum_a / n
+        var_b = sum_bb - sum_b * sum_b / n
+        r = cov / np.sqrt(var_a * var_b)
+    r[n < 2] = np.nan
+    return r
+
+
+def correlation_matrix(df: pd.DataFrame, method: str = "pearson", sample_rows: Optional[int] = CORRELATION_SAMPLE_ROWS,
+                       block_columns: int = CORRELATION_BLOCK_COLUMNS) -> dict:
+    """
+    Correlation of all numeric columns, computed `block_columns` at a time.
+    Returns {"columns", "matrix" (float32 ndarray, NaN where undefined),
+    "method", "rows", "sampled_rows"}.
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unsupported method: {method}. Allowed: {', '.join(CORRELATION_METHODS)}")
+
+    columns, X, sampled = _prepare(df, method, sample_rows)
+    k = len(columns)
+    R = np.full((k, k), np.nan, dtype="float32")
+    if k:
+        M = ~np.isnan(X)
+        # Centering first keeps the sum-of-products formulas numerically stable
+        with np.errstate(invalid="ignore"):
+            means = np.nanmean(np.where(M, X, np.nan), axis=0) if len(X) else np.zeros(k)
+        Xc = np.where(M, X - np.nan_to_num(means), 0.0)
+
+        if M.all():
+            std = np.sqrt((Xc * Xc).sum(axis=0))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                Z = Xc / std
+            for lo in range(0, k, block_columns):
+                R[lo:lo + block_columns] = _complete_block(Z, lo, min(k, lo + block_columns))
+            # Constant columns have no defined correlation
+            R[:, std == 0] = np.nan
+            R[std == 0, :] = np.nan
+        else:
+            Mf = M.astype("float64")
+            Xc2 = Xc * Xc
+            for lo in range(0, k, block_columns):
+                R[lo:lo + block_columns] = _pairwise_block(Xc, Xc2, Mf, lo, min(k, lo + block_columns))
+        np.clip(R, -1.0, 1.0, out=R)
+
+    return {"columns": columns, "matrix": R, "method": method, "rows": len(df), "sampled_rows": sampled}
+
+
+def _round(values: np.ndarray) -> list:
+    out = np.round(values.astype("float64"), 2).astype(object)
+    out[np.isnan(values)] = None
+    return out.tolist()
+
+
+def format_correlation(result: dict, fmt: str = "heatmap", top_k: int = DEFAULT_TOP_K) -> dict:
+    """
+    heatmap: the original {x, y, value} list for every cell (n^2 entries)
+    upper:   row-major values of the strict upper triangle (i < j); the
+             diagonal is 1 and the lower half mirrors it
+    pairs:   the `top_k` pairs with the largest |r|
+    """
+    if fmt not in CORRELATION_FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}. Allowed: {', '.join(CORRELATION_FORMATS)}")
+
+    columns, R = result["columns"], result["matrix"]
+    payload = {
+        "columns": columns,
+        "method": result["method"],
+        "format": fmt,
+        "rows": result["rows"],
+        "sampled_rows": result["sampled_rows"]
+    }
+    k = len(columns)
+
+    if fmt == "heatmap":
+        values = _round(R.ravel())
+        payload["matrix"] = [
+            {"x": columns[i // k], "y": columns[i % k], "value": v} for i, v in enumerate(values)
+        ]
+        return payload
+
+    iu, ju = np.triu_indices(k, k=1)
+    upper = R[iu, ju]
+    if fmt == "upper":
+        payload["values"] = _round(upper)
+        return payload
+
+    strength = np.where(np.isnan(upper), -1.0, np.abs(upper))
+    top_k = max(0, min(top_k, len(upper)))
+    if top_k < len(upper):
+        best = np.argpartition(-strength, top_k - 1)[:top_k] if top_k else np.arange(0)
+    else:
+        best = np.arange(len(upper))
+    best = best[np.argsort(-strength[best], kind="stable")]
+    best = best[strength[best] >= 0]
+    values = _round(upper[best])
+    payload["pairs"] = [
+        {"x": columns[iu[b]], "y": columns[ju[b]], "value": v} for b, v in zip(best, values)
+    ]
+    return payload
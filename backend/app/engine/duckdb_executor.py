@@ -3,9 +3,10 @@ import pandas as pd
 
 # No global duckdb_conn to avoid threading/state issues with concurrent users.
 
-def execute_duckdb(df: pd.DataFrame, query: str):
+def execute_duckdb(df: pd.DataFrame, query: str, profiler=None):
     """
     Execute analytical SQL in DuckDB against a specific DataFrame.
+    When an enabled profiler is passed, the EXPLAIN ANALYZE plan is attached to it.
     """
     # Create an ephemeral in-memory database for this query
     con = duckdb.connect(database=":memory:")
@@ -16,13 +17,27 @@ def execute_duckdb(df: pd.DataFrame, query: str):
     con.register('df', df)
     
     try:
-        result = con.execute(query).fetchdf()
+        if profiler is None or not profiler.enabled:
+            result = con.execute(query).fetchdf()
+            return {
+                "columns": list(result.columns),
+                "rows": result.values.tolist()
+            }
+
+        with profiler.stage("duckdb_execute", rows_in=len(df)) as st:
+            result = con.execute(query).fetchdf()
+            st["rows_out"] = len(result)
+        # EXPLAIN ANALYZE re-runs the query; only paid when explicitly requested
+        plan_rows = con.execute(f"EXPLAIN ANALYZE {query}").fetchall()
+        profiler.set_plan("\n".join(str(row[1]) for row in plan_rows))
+        with profiler.stage("serialize", rows_in=len(result)) as st:
+            rows = result.values.tolist()
+            st["rows_out"] = len(rows)
         return {
             "columns": list(result.columns),
-            "rows": result.values.tolist()
+            "rows": rows
         }
     except Exception as e:
         raise e
     finally:
         con.close()
-
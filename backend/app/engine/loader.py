@@ -1,13 +1,59 @@
+import json
 import pandas as pd
 import numpy as np
 from app.core.memory_cache import df_cache
+from app.engine.compression import open_raw
 
-def load_dataframe(file_path: str, file_type: str, limit: int = None):
+def check_read_only(query: str):
+    # Security: Basic Read-Only Check
+    forbidden_keywords = ["INSERT", "UPDATE", "DELETE", "DROP", "ALTER", "TRUNCATE", "GRANT", "REVOKE", "EXECUTE"]
+    if any(keyword in query.upper() for keyword in forbidden_keywords):
+        raise ValueError("Security Violation: Only SELECT queries are allowed.")
+
+def _cache_key(file_path, file_type: str, options: dict = None) -> str:
+    # Reader options (sheet, record_path) select different data from the same file
+    key = f"{str(file_path)}_{file_type}" # file_path can be dict
+    return f"{key}_{json.dumps(options, sort_keys=True)}" if options else key
+
+def get_cached_dataframe(file_path: str, file_type: str, options: dict = None):
+    # Peek at the in-memory cache without triggering a load
+    return df_cache.get(_cache_key(file_path, file_type, options))
+
+def cache_dataframe(file_path: str, file_type: str, df: pd.DataFrame, options: dict = None):
+    # Seed the cache with a frame obtained without parsing (e.g. from a columnar copy)
+    df_cache.set(_cache_key(file_path, file_type, options), df)
+
+def _read_document(file_path: str, file_type: str, options: dict = None) -> pd.DataFrame:
+    # Excel, JSON and XML go through the streaming readers; the pandas readers
+    # (whole document in memory) only for layouts those cannot stream
+    from app.engine.readers import READ_CHUNK_ROWS, NotStreamable, read_chunked
+    try:
+        return read_chunked(file_path, file_type, READ_CHUNK_ROWS, options)
+    except NotStreamable as e:
+        print(f"Reading {file_path} whole: {e}")
+
+    options = options or {}
+    if file_type == 'excel':
+        sheet = options.get('sheet', 0)
+        with open_raw(file_path) as f:
+            return pd.read_excel(f, sheet_name=int(sheet) if str(sheet).isdigit() else sheet)
+    if file_type == 'json':
+        try:
+            with open_raw(file_path) as f:
+                return pd.read_json(f)
+        except ValueError:
+            with open_raw(file_path) as f:
+                return pd.read_json(f, lines=True)
+    record_path = options.get('record_path')
+    with open_raw(file_path) as f:
+        return pd.read_xml(f, xpath=f"//{record_path.strip('/')}" if record_path else "./*")
+
+def load_dataframe(file_path: str, file_type: str, limit: int = None, cache: bool = True, options: dict = None):
     # If file_type is 'postgres' or 'mysql', file_path might be a config dict or string
     # We expect callers to pass the dict if type is sql, or we parse the key.
     
     # Check Cache (only if no limit, or create cache key with limit?)
-    cache_key = f"{str(file_path)}_{file_type}" # file_path can be dict
+    cache_key = _cache_key(file_path, file_type, options)
     cached_df = df_cache.get(cache_key)
     
     if cached_df is not None:
@@ -29,10 +75,7 @@ def load_dataframe(file_path: str, file_type: str, limit: int = None):
                 conn_str = file_path
                 query = "SELECT 1" 
             
-            # Security: Basic Read-Only Check
-            forbidden_keywords = ["INSERT", "UPDATE", "DELETE", "DROP", "ALTER", "TRUNCATE", "GRANT", "REVOKE", "EXECUTE"]
-            if any(keyword in query.upper() for keyword in forbidden_keywords):
-                raise ValueError("Security Violation: Only SELECT queries are allowed.")
+            check_read_only(query)
 
             if not conn_str:
                 raise ValueError("Missing connection string")
@@ -43,25 +86,21 @@ def load_dataframe(file_path: str, file_type: str, limit: int = None):
                 df = pd.read_sql(query, conn)
                 
         elif file_type == 'csv':
+            # Raw files may be stored compressed; open_raw decompresses while pandas reads
             try:
                 # Read full file for analytics
-                df = pd.read_csv(file_path, encoding='utf-8')
+                with open_raw(file_path) as f:
+                    df = pd.read_csv(f, encoding='utf-8')
             except UnicodeDecodeError:
-                df = pd.read_csv(file_path, encoding='latin1')
-        elif file_type == 'excel':
-            df = pd.read_excel(file_path)
-        elif file_type == 'json':
-            try:
-                df = pd.read_json(file_path) 
-            except ValueError:
-                df = pd.read_json(file_path, lines=True)
-        elif file_type == 'xml':
-            df = pd.read_xml(file_path)
+                with open_raw(file_path) as f:
+                    df = pd.read_csv(f, encoding='latin1')
+        elif file_type in ['excel', 'json', 'xml']:
+            df = _read_document(file_path, file_type, options)
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
         
         # Cache the result
-        if df is not None:
+        if df is not None and cache:
             df_cache.set(cache_key, df)
             
         if limit:
@@ -70,3 +109,45 @@ def load_dataframe(file_path: str, file_type: str, limit: int = None):
 
     except Exception as e:
         raise ValueError(f"Failed to read data: {str(e)}")
+
+
+def iter_dataframe_chunks(file_path: str, file_type: str, chunksize: int = 100_000, options: dict = None):
+    """
+    Yield a file as DataFrame chunks without materializing it. CSV, Excel,
+    JSON and XML are parsed incrementally; layouts the streaming readers do
+    not handle are loaded (through the cache) and sliced. A layout found out
+    midway (an Excel row wider than the header) raises NotStreamable after
+    some chunks: discard them and use load_dataframe instead.
+    """
+    if file_type == 'csv':
+        for encoding in ('utf-8', 'latin1'):
+            yielded = False
+            try:
+                with open_raw(file_path) as f:
+                    for chunk in pd.read_csv(f, encoding=encoding, chunksize=chunksize):
+                        yielded = True
+                        yield chunk
+                return
+            except UnicodeDecodeError:
+                # Only safe to retry with another encoding if nothing was emitted yet
+                if yielded:
+                    raise ValueError(f"Failed to read data: mixed encodings in {file_path}")
+        return
+
+    if file_type in ('excel', 'json', 'xml'):
+        from app.engine.readers import NotStreamable, iter_file
+        yielded = False
+        try:
+            for chunk in iter_file(file_path, file_type, chunksize, options):
+                yielded = True
+                yield chunk
+            return
+        except NotStreamable:
+            if yielded:
+                # The chunks so far do not follow the file's whole-sheet layout: the caller starts over
+                raise
+            # Fall through to a full load
+
+    df = load_dataframe(file_path, file_type, limit=None, options=options)
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
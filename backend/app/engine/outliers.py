@@ -0,0 +1,145 @@
+import glob
+import json
+import os
+import warnings
+import zlib
+from typing import Optional
+import numpy as np
+import pandas as pd
+from app.engine import columnar_store
+from app.engine.statistics import numeric_matrix
+
+# Per-version outlier masks for every numeric column and method, stored as
+# zlib-compressed packed bitmaps (1 bit per row) next to the Parquet sidecar.
+#   iqr    -> outside [Q1 - 1.5 IQR, Q3 + 1.5 IQR]
+#   zscore -> |x - mean| / std > 3
+#   mad    -> modified z-score 0.6745 |x - median| / MAD > 3.5
+OUTLIER_METHODS = ("iqr", "zscore", "mad")
+IQR_FACTOR = 1.5
+ZSCORE_THRESHOLD = 3.0
+MAD_THRESHOLD = 3.5
+
+
+def _bounds(X: np.ndarray) -> dict:
+    """(lower, upper) arrays per method; NaN bounds mean no outliers are defined."""
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        # All-null columns warn ("All-NaN slice") and simply get NaN bounds
+        warnings.simplefilter("ignore", RuntimeWarning)
+        q1, q3 = np.nanquantile(X, [0.25, 0.75], axis=0)
+        iqr = q3 - q1
+
+        mean = np.nanmean(X, axis=0)
+        std = np.nanstd(X, axis=0, ddof=1)
+        std = np.where(std > 0, std, np.nan)
+
+        median = np.nanmedian(X, axis=0)
+        mad = np.nanmedian(np.abs(X - median), axis=0)
+        mad = np.where(mad > 0, mad, np.nan)
+        mad_span = MAD_THRESHOLD * mad / 0.6745
+
+    return {
+        "iqr": (q1 - IQR_FACTOR * iqr, q3 + IQR_FACTOR * iqr),
+        "zscore": (mean - ZSCORE_THRESHOLD * std, mean + ZSCORE_THRESHOLD * std),
+        "mad": (median - mad_span, median + mad_span),
+    }
+
+
+def _f(value):
+    return None if value is None or np.isnan(value) else float(value)
+
+
+def pack_mask(mask: np.ndarray) -> bytes:
+    return zlib.compress(np.packbits(mask).tobytes())
+
+
+def unpack_mask(blob: bytes, rows: int) -> np.ndarray:
+    return np.unpackbits(np.frombuffer(zlib.decompress(blob), dtype="uint8"), count=rows).astype(bool)
+
+
+def index_path(source_id: int, version: int) -> str:
+    return os.path.join(columnar_store.dataset_dir(source_id), f"outliers_v{version}.npz")
+
+
+class OutlierIndex:
+    def __init__(self, rows: int, summary: dict, bitmaps: dict):
+        self.rows = rows
+        # {column: {method: {"count", "lower_bound", "upper_bound"}}}
+        self.summary = summary
+        # {(column, method): compressed bitmap bytes}
+        self.bitmaps = bitmaps
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "OutlierIndex":
+        columns = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+        X = numeric_matrix(df, columns)
+        summary, bitmaps = {}, {}
+        if columns:
+            valid = ~np.isnan(X)
+            for method, (lower, upper) in _bounds(X).items():
+                with np.errstate(invalid="ignore"):
+                    masks = valid & ((X < lower) | (X > upper))
+                counts = masks.sum(axis=0)
+                for j, col in enumerate(columns):
+                    name = str(col)
+                    summary.setdefault(name, {})[method] = {
+                        "count": int(counts[j]),
+                        "lower_bound": _f(lower[j]),
+                        "upper_bound": _f(upper[j])
+                    }
+                    bitmaps[(name, method)] = pack_mask(masks[:, j])
+        return cls(len(df), summary, bitmaps)
+
+    def positions(self, column: str, method: str) -> np.ndarray:
+        blob = self.bitmaps.get((column, method))
+        if blob is None:
+            raise KeyError(column)
+        return np.flatnonzero(unpack_mask(blob, self.rows))
+
+    def save(self, source_id: int, version: int):
+        path = index_path(source_id, version)
+        keys = list(self.bitmaps)
+        arrays = {f"b{i}": np.frombuffer(self.bitmaps[key], dtype="uint8") for i, key in enumerate(keys)}
+        meta = {"rows": self.rows, "summary": self.summary, "keys": [list(key) for key in keys]}
+        arrays["meta"] = np.frombuffer(json.dumps(meta).encode("utf-8"), dtype="uint8")
+        with columnar_store.atomic_open(path) as f:
+            np.savez(f, **arrays)
+        # Only the current version is kept on disk
+        for old in glob.glob(os.path.join(columnar_store.dataset_dir(source_id), "outliers_v*.npz")):
+            if old != path:
+                os.remove(old)
+
+    @classmethod
+    def load(cls, source_id: int, version: int) -> Optional["OutlierIndex"]:
+        path = index_path(source_id, version)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            bitmaps = {tuple(key): data[f"b{i}"].tobytes() for i, key in enumerate(meta["keys"])}
+        return cls(meta["rows"], meta["summary"], bitmaps)
+
+
+def get_outlier_index(data_source, df: pd.DataFrame = None) -> OutlierIndex:
+    """Outlier index for the current version: memory, then disk, then built and persisted."""
+    from app.core.memory_cache import result_cache
+
+    key = ("outliers", data_source.id, data_source.version)
+    index = result_cache.get(key)
+    if index is None:
+        index = OutlierIndex.load(data_source.id, data_source.version)
+    if index is not None and df is not None and index.rows != len(df):
+        index = None  # Stale: the data changed without a version bump
+    if index is not None:
+        result_cache.set(key, index)
+        return index
+
+    if df is None:
+        from app.engine.versions import load_source
+        df = load_source(data_source)
+    index = OutlierIndex.build(df)
+    try:
+        index.save(data_source.id, data_source.version)
+    except OSError as e:
+        print(f"Could not persist outlier index for {data_source.id}: {e}")
+    result_cache.set(key, index)
+    return index
@@ -0,0 +1,111 @@
+import os
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Column-partitioned profiling for wide frames. Numeric columns are written
+# once into a Fortran-ordered float64 block in shared memory, so each worker
+# maps its column range without copying or pickling it. Other columns travel
+# as Arrow arrays, whose buffers pickle without per-value serialization.
+# Results come back per partition and are merged in column order.
+PARALLEL_MIN_COLUMNS = int(os.getenv("PARALLEL_PROFILE_MIN_COLUMNS", "32"))
+PARALLEL_MIN_CELLS = int(os.getenv("PARALLEL_PROFILE_MIN_CELLS", "2000000"))
+
+
+def _pool():
+    from app.core.scheduler import scheduler
+    return scheduler.process_pool()
+
+
+def should_parallelize(df: pd.DataFrame) -> bool:
+    if df.shape[1] < PARALLEL_MIN_COLUMNS or df.size < PARALLEL_MIN_CELLS:
+        return False
+    return _pool() is not None
+
+
+def _partitions(count: int, parts: int) -> List[Tuple[int, int]]:
+    parts = max(1, min(parts, count))
+    edges = np.linspace(0, count, parts + 1).astype(int)
+    return [(int(lo), int(hi)) for lo, hi in zip(edges[:-1], edges[1:]) if hi > lo]
+
+
+def _numeric_worker(shm_name: str, shape: Tuple[int, int], lo: int, hi: int) -> dict:
+    from app.engine.statistics import numeric_kernel
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        X = np.ndarray(shape, dtype="float64", buffer=shm.buf, order="F")
+        # Contiguous column range in Fortran order: a view, not a copy
+        result = numeric_kernel(X[:, lo:hi])
+        del X  # Drop the view before closing the mapping
+        return result
+    finally:
+        shm.close()
+
+
+def _categorical_worker(names: List[str], arrays: List[pa.Array]) -> Dict[str, dict]:
+    from app.engine.statistics import categorical_stats
+    return {name: categorical_stats(array.to_pandas()) for name, array in zip(names, arrays)}
+
+
+def _merge_kernels(parts: List[dict]) -> dict:
+    # Every kernel output is per column along its first axis
+    return {key: np.concatenate([part[key] for part in parts], axis=0) for key in parts[0]}
+
+
+def profile_columns(df: pd.DataFrame, numeric_cols: list, other_cols: list, workers: int = None):
+    """
+    Parallel equivalent of running numeric_kernel over `numeric_cols` and
+    categorical_stats over `other_cols`. Returns (kernel, {col: stats}).
+    """
+    from app.engine.statistics import categorical_stats
+
+    pool = _pool()
+    workers = workers or getattr(pool, "_max_workers", 1)
+    futures = []
+
+    kernel = None
+    shm = None
+    try:
+        if numeric_cols:
+            n, k = len(df), len(numeric_cols)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, n * k * 8))
+            X = np.ndarray((n, k), dtype="float64", buffer=shm.buf, order="F")
+            for j, col in enumerate(numeric_cols):
+                X[:, j] = df[col].to_numpy(dtype="float64", na_value=np.nan)
+            del X
+            for lo, hi in _partitions(k, workers):
+                futures.append(("numeric", pool.submit(_numeric_worker, shm.name, (n, k), lo, hi)))
+
+        categorical = {}
+        shipped = []
+        for lo, hi in _partitions(len(other_cols), workers):
+            names, arrays = [], []
+            for col in other_cols[lo:hi]:
+                try:
+                    arrays.append(pa.array(df[col], from_pandas=True))
+                    names.append(col)
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    # Mixed-type object column: no faithful Arrow type, profile it here
+                    categorical[col] = categorical_stats(df[col])
+            if names:
+                shipped.append(names)
+                futures.append(("categorical", pool.submit(_categorical_worker, [str(c) for c in names], arrays)))
+
+        numeric_parts = []
+        categorical_parts = []
+        for kind, future in futures:
+            (numeric_parts if kind == "numeric" else categorical_parts).append(future.result())
+
+        if numeric_parts:
+            kernel = _merge_kernels(numeric_parts)
+        for names, part in zip(shipped, categorical_parts):
+            for col in names:
+                categorical[col] = part[str(col)]
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    return kernel, categorical
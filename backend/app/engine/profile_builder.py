@@ -0,0 +1,310 @@
+import glob
+import json
+import os
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+from app.engine.sketches import (
+    Moments, KLLSketch, HyperLogLog, CountMinTopK, PowerOfTwoHistogram, hash_values
+)
+from app.engine.row_hash import row_hashes
+from app.engine.statistics import HISTOGRAM_BINS, TOP_VALUES, build_summary
+
+# Chunked, mergeable counterpart of `compute_statistics`: memory is O(columns),
+# so datasets larger than RAM can be profiled by feeding chunks. Builders for
+# disjoint chunks can be merged. Moments, min/max, counts and sums are exact;
+# histogram bins are rebinned from power-of-two bins (each value may land one
+# bin off), and quantiles, distinct counts and top values carry the sketch
+# error bounds listed in app/engine/sketches.py. Two estimates state their
+# bound in the profile itself:
+#   duplicate_rows    rows minus a HyperLogLog count of distinct rows, within
+#                     +/- duplicate_rows_error (exact when a row-hash index is passed)
+#   outliers.count    quantile-sketch ranks outside the IQR fences, within
+#                     +/- outliers.count_error
+
+
+def _f(value):
+    return None if value is None or pd.isna(value) else float(value)
+
+
+class ColumnSketch:
+    def __init__(self, name: str):
+        self.name = name
+        self.dtype = None
+        self.numeric = None
+        self.rows = 0
+        self.missing = 0
+        self.non_numeric = 0  # values of a numeric column that did not parse (counted as missing)
+        self.distinct = HyperLogLog()
+        self.top = CountMinTopK(k=TOP_VALUES)
+        self.moments = Moments()
+        self.quantiles = KLLSketch()
+        self.histogram = PowerOfTwoHistogram()
+
+    def _merge_dtype(self, dtype):
+        if self.dtype is None:
+            self.dtype = str(dtype)
+            return
+        if self.numeric and str(dtype) != self.dtype:
+            # e.g. an int64 chunk followed by one with nulls (float64)
+            try:
+                self.dtype = str(np.result_type(np.dtype(self.dtype), np.dtype(dtype)))
+            except TypeError:
+                pass
+
+    def update(self, series: pd.Series):
+        self.rows += len(series)
+        mask = series.isna().to_numpy()
+        self.missing += int(mask.sum())
+        if mask.all():
+            # All-null chunks carry no type information beyond their dtype
+            if self.dtype is None:
+                self.dtype = str(series.dtype)
+            return
+
+        if self.numeric is None:
+            # Type is decided by the first chunk with data
+            self.numeric = pd.api.types.is_numeric_dtype(series)
+            self.dtype = None
+        self._merge_dtype(series.dtype)
+
+        if self.numeric:
+            values = pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            parsed = ~np.isnan(values)
+            # Text in a column typed numeric by an earlier chunk is counted as missing,
+            # so count, mean and quantiles all describe the same values
+            unparsed = int((~parsed & ~mask).sum())
+            self.missing += unparsed
+            self.non_numeric += unparsed
+            values = values[parsed]
+            self.moments.update(values)
+            self.quantiles.update(values)
+            self.histogram.update(values)
+            labels = values
+        else:
+            labels = series[~mask].astype(str).to_numpy(dtype=object)
+
+        hashes = hash_values(labels)
+        self.distinct.update_hashes(hashes)
+        self.top.update(labels, hashes)
+
+    def merge(self, other: "ColumnSketch"):
+        self.rows += other.rows
+        self.missing += other.missing
+        self.non_numeric += other.non_numeric
+        if other.numeric is None:
+            if self.dtype is None:
+                self.dtype = other.dtype
+            return
+        if self.numeric is None:
+            self.numeric = other.numeric
+            self.dtype = None
+        self._merge_dtype(other.dtype)
+        self.distinct.merge(other.distinct)
+        self.top.merge(other.top)
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        self.histogram.merge(other.histogram)
+
+    def _is_numeric(self) -> bool:
+        if self.numeric is not None:
+            return self.numeric
+        # Never saw a value: fall back to the dtype, as the in-memory profile does
+        try:
+            return self.dtype is not None and pd.api.types.is_numeric_dtype(np.dtype(self.dtype))
+        except TypeError:
+            return False
+
+    def result(self) -> dict:
+        count = self.rows - self.missing
+        col_stats = {
+            "type": self.dtype or "object",
+            "count": count,
+            "missing": self.missing,
+            # HLL can overshoot slightly; never report more distinct values than values
+            "distinct": min(self.distinct.count(), count),
+        }
+        if self.non_numeric:
+            col_stats["non_numeric"] = self.non_numeric
+        col_stats["missing_pct"] = round((col_stats["missing"] / self.rows) * 100, 2) if self.rows > 0 else 0
+        col_stats["distinct_pct"] = round((col_stats["distinct"] / self.rows) * 100, 2) if self.rows > 0 else 0
+
+        top = self.top.top(TOP_VALUES)
+        if not self._is_numeric():
+            col_stats["mode"] = top[0][0] if top else None
+            col_stats["distribution"] = {
+                "type": "top_values",
+                "data": [{"name": label, "count": n} for label, n in top]
+            }
+            return col_stats
+
+        m = self.moments
+        q25, q50, q75 = (self.quantiles.quantile(q) for q in (0.25, 0.5, 0.75))
+        col_stats.update({
+            "mean": _f(m.mean) if m.n else None,
+            "sum": _f(m.total),
+            "std": _f(m.std()),
+            "min": _f(m.min) if m.n else None,
+            "25%": _f(q25),
+            "50%": _f(q50),
+            "median": _f(q50),
+            "75%": _f(q75),
+            "max": _f(m.max) if m.n else None,
+            "zeros": m.zeros,
+            "skew": _f(m.skew()),
+            "kurtosis": _f(m.kurtosis()),
+            "mode": float(top[0][0]) if top else None
+        })
+
+        lower = upper = None
+        outliers = 0
+        if q25 is not None:
+            iqr = q75 - q25
+            lower, upper = q25 - 1.5 * iqr, q75 + 1.5 * iqr
+            # Rank estimates from the quantile sketch; row positions are not kept when streaming
+            outliers = int(round(self.quantiles.rank(lower) + (m.n - self.quantiles.rank(upper, inclusive=True))))
+        col_stats["outliers"] = {
+            "count": max(0, outliers),
+            # Two ranks, each within the sketch's rank error, relative to the estimated fences
+            "count_error": 2 * self.quantiles.rank_error(),
+            "lower_bound": _f(lower),
+            "upper_bound": _f(upper)
+        }
+
+        if m.n > 0:
+            lo, hi = (m.min - 0.5, m.max + 0.5) if m.min == m.max else (m.min, m.max)
+            edges = np.linspace(lo, hi, HISTOGRAM_BINS + 1)
+            counts = self.histogram.rebin(lo, hi, HISTOGRAM_BINS, m.min, m.max)
+            col_stats["distribution"] = {
+                "type": "histogram",
+                "data": [{"bin": f"{edges[i]:.2f}-{edges[i+1]:.2f}", "count": int(c)} for i, c in enumerate(counts)]
+            }
+        return col_stats
+
+    def to_state(self) -> dict:
+        return {
+            "name": self.name, "dtype": self.dtype, "numeric": self.numeric,
+            "rows": self.rows, "missing": self.missing, "non_numeric": self.non_numeric,
+            "distinct": self.distinct.to_state(), "top": self.top.to_state(),
+            "moments": self.moments.to_state(), "quantiles": self.quantiles.to_state(),
+            "histogram": self.histogram.to_state()
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "ColumnSketch":
+        sketch = cls(state["name"])
+        sketch.dtype, sketch.numeric = state["dtype"], state["numeric"]
+        sketch.rows, sketch.missing = state["rows"], state["missing"]
+        sketch.non_numeric = state.get("non_numeric", 0)
+        sketch.distinct = HyperLogLog.from_state(state["distinct"])
+        sketch.top = CountMinTopK.from_state(state["top"])
+        sketch.moments = Moments.from_state(state["moments"])
+        sketch.quantiles = KLLSketch.from_state(state["quantiles"])
+        sketch.histogram = PowerOfTwoHistogram.from_state(state["histogram"])
+        return sketch
+
+
+class ProfileBuilder:
+    """
+    Feed chunks with update(), combine partial builders with merge(), read the
+    /statistics-shaped profile with result(). to_state()/from_state() give a
+    JSON-safe snapshot so a profile can be extended when rows are appended.
+    """
+
+    def __init__(self):
+        self.columns = {}
+        self.rows = 0
+        # Distinct rows for the duplicate estimate; never the row hashes themselves
+        self.distinct_rows = HyperLogLog()
+
+    def _column(self, name) -> ColumnSketch:
+        key = str(name)
+        if key not in self.columns:
+            self.columns[key] = ColumnSketch(key)
+        return self.columns[key]
+
+    def update(self, chunk: pd.DataFrame) -> "ProfileBuilder":
+        self.rows += len(chunk)
+        for name in chunk.columns:
+            self._column(name).update(chunk[name])
+        if len(chunk):
+            self.distinct_rows.update_hashes(row_hashes(chunk))
+        return self
+
+    def merge(self, other: "ProfileBuilder") -> "ProfileBuilder":
+        self.rows += other.rows
+        for name, sketch in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(sketch)
+            else:
+                self.columns[name] = ColumnSketch.from_state(sketch.to_state())
+        self.distinct_rows.merge(other.distinct_rows)
+        return self
+
+    def duplicate_rows(self) -> int:
+        return max(0, self.rows - self.distinct_rows.count())
+
+    def result(self, duplicate_rows: int = None) -> dict:
+        """Pass `duplicate_rows` when an exact count is known (a row-hash index); otherwise it is estimated."""
+        stats = {name: sketch.result() for name, sketch in self.columns.items()}
+        if duplicate_rows is None:
+            dupes, error = self.duplicate_rows(), self.distinct_rows.error_bound()
+        else:
+            dupes, error = int(duplicate_rows), 0
+        return {
+            "total_rows": self.rows,
+            "duplicate_rows": dupes,
+            "duplicate_rows_error": error,
+            "column_stats": stats,
+            "summary": build_summary(stats, self.rows, len(stats), dupes),
+            "approximate": True
+        }
+
+    def to_state(self) -> dict:
+        return {
+            "rows": self.rows,
+            "distinct_rows": self.distinct_rows.to_state(),
+            "columns": [sketch.to_state() for sketch in self.columns.values()]
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "ProfileBuilder":
+        builder = cls()
+        builder.rows = state["rows"]
+        builder.distinct_rows = HyperLogLog.from_state(state["distinct_rows"])
+        for column in state["columns"]:
+            builder.columns[column["name"]] = ColumnSketch.from_state(column)
+        return builder
+
+
+def profile_chunks(chunks: Iterable[pd.DataFrame]) -> dict:
+    builder = ProfileBuilder()
+    for chunk in chunks:
+        builder.update(chunk)
+    return builder.result()
+
+
+def state_path(source_id: int, version: int) -> str:
+    from app.engine import columnar_store
+    return os.path.join(columnar_store.dataset_dir(source_id), f"profile_state_v{version}.json")
+
+
+def save_builder(source_id: int, version: int, builder: ProfileBuilder):
+    """Keep the sketch state of a version's profile so appends can extend it."""
+    from app.engine import columnar_store
+    path = state_path(source_id, version)
+    with columnar_store.atomic_open(path) as f:
+        f.write(json.dumps(builder.to_state()).encode("utf-8"))
+    # Only the current version is kept on disk
+    for old in glob.glob(os.path.join(columnar_store.dataset_dir(source_id), "profile_state_v*.json")):
+        if old != path:
+            os.remove(old)
+
+
+def load_builder(source_id: int, version: int) -> Optional[ProfileBuilder]:
+    path = state_path(source_id, version)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    return ProfileBuilder.from_state(state)
@@ -0,0 +1,108 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Optional
+
+# Profile modes accepted by the query endpoints:
+#   "explain"  -> per-stage wall time, rows in/out and bytes allocated
+#   "cprofile" -> explain + a cProfile dump of the hottest functions (admin only)
+PROFILE_MODES = ("explain", "cprofile")
+CPROFILE_TOP_N = 25
+# tracemalloc is process-wide: profiled queries run one at a time so each
+# report only counts its own allocations. Unprofiled queries never wait.
+_profiling_lock = threading.Lock()
+
+
+class QueryProfiler:
+    """
+    Opt-in stage timer for a single query. When disabled every method is a
+    no-op so the endpoints can call it unconditionally. An enabled profiler
+    holds `_profiling_lock` from start() until stop().
+    """
+
+    def __init__(self, mode: Optional[str] = None):
+        if mode is not None and mode not in PROFILE_MODES:
+            raise ValueError(f"Unsupported profile mode: {mode}. Allowed: {', '.join(PROFILE_MODES)}")
+        self.mode = mode
+        self.enabled = mode is not None
+        self.stages = []
+        self.plan = None
+        self._cprofile = None
+        self._started = None
+        self._owns_tracemalloc = False
+        self._holds_lock = False
+
+    def start(self):
+        if not self.enabled:
+            return self
+        _profiling_lock.acquire()
+        self._holds_lock = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if self.mode == "cprofile":
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._started = time.perf_counter()
+        return self
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None):
+        if not self.enabled:
+            yield {}
+            return
+
+        record = {"stage": name, "rows_in": rows_in, "rows_out": None}
+        tracemalloc.reset_peak()
+        mem_before = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["wall_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+            # Peak above the starting point = bytes allocated by this stage,
+            # even if intermediate copies were freed before it finished.
+            record["bytes_allocated"] = max(0, tracemalloc.get_traced_memory()[1] - mem_before)
+            self.stages.append(record)
+
+    def set_plan(self, plan):
+        if self.enabled:
+            self.plan = plan
+
+    def report(self) -> Optional[dict]:
+        if not self.enabled:
+            return None
+
+        result = {
+            "mode": self.mode,
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 3) if self._started else None,
+            "stages": self.stages,
+        }
+        if self.plan is not None:
+            result["plan"] = self.plan
+
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            out = io.StringIO()
+            pstats.Stats(self._cprofile, stream=out).sort_stats("cumulative").print_stats(CPROFILE_TOP_N)
+            result["cprofile"] = out.getvalue()
+            self._cprofile = None
+
+        self.stop()
+        return result
+
+    def stop(self):
+        # Safe to call more than once; endpoints call it in `finally`
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile = None
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+        if self._holds_lock:
+            self._holds_lock = False
+            _profiling_lock.release()
@@ -1,19 +1,32 @@
 from app.engine.sql_executor import execute_sql
 from app.engine.pandas_executor import sql_to_dataframe, pandas_transform
 from app.engine.duckdb_executor import execute_duckdb
+from app.engine.profiler import QueryProfiler
 
-def run_query(payload: dict):
+def run_query(payload: dict, profiler: QueryProfiler = None):
     engine = payload.get("engine", "postgres")
+    # Disabled profiler: stages below become no-ops
+    profiler = profiler or QueryProfiler()
 
     if engine == "postgres":
-        return execute_sql(payload["sql"])
+        with profiler.stage("sql_execute") as st:
+            result = execute_sql(payload["sql"])
+            st["rows_out"] = len(result["rows"])
+        return result
 
     if engine == "pandas":
-        df = sql_to_dataframe(payload["sql"])
-        df = pandas_transform(df, payload.get("operations", {}))
+        with profiler.stage("load") as st:
+            df = sql_to_dataframe(payload["sql"])
+            st["rows_out"] = len(df)
+        with profiler.stage("transform", rows_in=len(df)) as st:
+            df = pandas_transform(df, payload.get("operations", {}))
+            st["rows_out"] = len(df)
+        with profiler.stage("serialize", rows_in=len(df)) as st:
+            rows = df.values.tolist()
+            st["rows_out"] = len(rows)
         return {
             "columns": list(df.columns),
-            "rows": df.values.tolist()
+            "rows": rows
         }
 
     if engine == "duckdb":
@@ -23,13 +36,17 @@ def run_query(payload: dict):
         if "file_path" in payload:
             from app.engine.loader import load_dataframe
             # Use defaults or passed args for type
-            df = load_dataframe(payload["file_path"], payload.get("file_type", "csv"))
+            with profiler.stage("load") as st:
+                df = load_dataframe(payload["file_path"], payload.get("file_type", "csv"))
+                st["rows_out"] = len(df)
             
         # Scenario B: Analyzing a SQL Result
         elif "source_sql" in payload:
-             df = sql_to_dataframe(payload["source_sql"])
+            with profiler.stage("load") as st:
+                df = sql_to_dataframe(payload["source_sql"])
+                st["rows_out"] = len(df)
              
         if df is None:
             raise ValueError("No data source provided for DuckDB engine (file_path or source_sql required)")
 
-        return execute_duckdb(df, payload["sql"])
+        return execute_duckdb(df, payload["sql"], profiler=profiler)
@@ -0,0 +1,293 @@
+import io
+import json
+from typing import Iterator, List, Optional
+import numpy as np
+import pandas as pd
+from app.engine.compression import logical_ext, open_raw
+
+# Streaming readers for Excel, JSON and XML. pd.read_excel / read_json /
+# read_xml build the whole sheet, document or DOM in memory (often 10x the
+# file) before the frame; these yield DataFrame chunks of `chunksize` rows
+# instead, with the same type inference as the pandas readers (rows go
+# through the same TextParser / read_json per chunk).
+#
+# Reader options, kept in the DataSource's connection_config:
+#   sheet        Excel sheet name or 0-based index (default: the first sheet)
+#   record_path  XML element holding one record, a tag name or a path such as
+#                "orders/order" (default: the children of the root element)
+#
+# Layouts a reader cannot stream raise NotStreamable, usually before the first
+# chunk; load_dataframe then falls back to the pandas reader. An Excel row wider
+# than the header is only seen when it is reached (pandas pads every row, the
+# header included, to the widest one), so chunked consumers start over then.
+READER_OPTIONS = ('sheet', 'record_path')
+# Rows per chunk when a whole frame is assembled from a streaming reader
+READ_CHUNK_ROWS = 100_000
+_TEXT_BUFFER = 1024 * 1024
+
+
+class NotStreamable(Exception):
+    """The file's layout needs the whole-document pandas reader."""
+
+
+def reader_options(config: Optional[dict]) -> dict:
+    return {key: config[key] for key in READER_OPTIONS if config and config.get(key) not in (None, "")}
+
+
+def _text_parser(rows: list, **kwargs) -> pd.DataFrame:
+    from pandas.io.parsers import TextParser
+
+    with TextParser(rows, **kwargs) as parser:
+        return parser.read()
+
+
+# --- Excel ---------------------------------------------------------------
+
+def _excel_cell(cell):
+    # Same conversion as pandas' openpyxl reader
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+
+def _select_sheet(book, sheet):
+    if sheet is None:
+        return book.worksheets[0]
+    if isinstance(sheet, int) or (isinstance(sheet, str) and sheet.isdigit() and sheet not in book.sheetnames):
+        index = int(sheet)
+        if index >= len(book.worksheets):
+            raise ValueError(f"Worksheet index {index} is out of range")
+        return book.worksheets[index]
+    if sheet not in book.sheetnames:
+        raise ValueError(f"Worksheet named '{sheet}' not found")
+    return book[sheet]
+
+
+def iter_excel(file_path: str, chunksize: int, sheet=None) -> Iterator[pd.DataFrame]:
+    """Rows of one worksheet through openpyxl's read-only mode, which never loads the whole sheet."""
+    if logical_ext(file_path) != '.xlsx':
+        raise NotStreamable("only .xlsx workbooks are read row by row")
+    from openpyxl import load_workbook
+
+    with open_raw(file_path) as raw:
+        book = load_workbook(raw, read_only=True, data_only=True, keep_links=False)
+        try:
+            ws = _select_sheet(book, sheet)
+            ws.reset_dimensions()
+            columns, width, rows, blank = None, 0, [], 0
+            for row in ws.rows:
+                values = [_excel_cell(cell) for cell in row]
+                while values and values[-1] == "":
+                    values.pop()
+                if not values:
+                    blank += 1  # Trailing empty rows are dropped, inner ones kept
+                    continue
+                if not width:
+                    width = len(values)  # Header row
+                elif len(values) > width:
+                    raise NotStreamable("a row is wider than the header")
+                rows.extend([[""] * width] * blank)
+                blank = 0
+                rows.append(values + [""] * (width - len(values)))
+                # The first chunk also holds the header row
+                if len(rows) >= chunksize + (columns is None):
+                    columns, chunk = _excel_chunk(rows, columns)
+                    rows = []
+                    yield chunk
+            if columns is None:
+                yield _excel_chunk(rows, None)[1] if rows else pd.DataFrame()
+            elif rows:
+                yield _excel_chunk(rows, columns)[1]
+        finally:
+            book.close()
+
+
+def _excel_chunk(rows: list, columns: Optional[List]):
+    if columns is None:
+        # First chunk carries the header row; later ones reuse its (deduplicated) names
+        df = _text_parser(rows, header=0)
+        return list(df.columns), df
+    return columns, _text_parser(rows, header=None, names=columns)
+
+
+# --- JSON ----------------------------------------------------------------
+
+def _json_values(file_path: str) -> Iterator[str]:
+    """
+    Raw text of each record in a JSON array of objects or in NDJSON, read
+    a block at a time. Only one record has to fit in memory.
+    """
+    decoder = json.JSONDecoder()
+    with io.TextIOWrapper(open_raw(file_path), encoding='utf-8') as f:
+        buf, pos, eof = "", 0, False
+
+        def fill():
+            nonlocal buf, pos, eof
+            block = f.read(max(_TEXT_BUFFER, len(buf) - pos))
+            buf, pos = buf[pos:] + block, 0
+            eof = not block
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        def value():
+            nonlocal pos
+            while True:
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise ValueError("Malformed JSON record")
+                    fill()  # Record continues in the next block
+                    continue
+                if end == len(buf) and not eof:
+                    fill()  # A number may continue in the next block
+                    continue
+                text, pos = buf[pos:end], end
+                return obj, text
+
+        fill()
+        if buf.startswith("\ufeff"):
+            pos = 1
+        skip_ws()
+        if pos >= len(buf):
+            raise NotStreamable("empty document")
+        array = buf[pos] == "["
+        if array:
+            pos += 1
+        elif buf[pos] != "{":
+            raise NotStreamable("not an array or line-delimited objects")
+
+        first = True
+        while True:
+            skip_ws()
+            if pos >= len(buf):
+                if array:
+                    raise ValueError("Unterminated JSON array")
+                return
+            if array and buf[pos] == "]":
+                return
+            obj, text = value()
+            if first:
+                if not isinstance(obj, dict):
+                    raise NotStreamable("records are not objects")
+                if not array:
+                    skip_ws()
+                    if pos >= len(buf):
+                        # A single object is a column mapping, not a record
+                        raise NotStreamable("single JSON object")
+                first = False
+            yield text
+            if array:
+                skip_ws()
+                if pos < len(buf) and buf[pos] == ",":
+                    pos += 1
+                elif pos >= len(buf) or buf[pos] != "]":
+                    raise ValueError("Malformed JSON array")
+
+
+def iter_json(file_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Records of a JSON array of objects or NDJSON, parsed by read_json one chunk at a time."""
+    records = []
+    for text in _json_values(file_path):
+        records.append(text)
+        if len(records) >= chunksize:
+            yield pd.read_json(io.StringIO("[" + ",".join(records) + "]"))
+            records = []
+    if records:
+        yield pd.read_json(io.StringIO("[" + ",".join(records) + "]"))
+
+
+# --- XML -----------------------------------------------------------------
+
+def _local(tag: str) -> str:
+    return tag.split("}")[1] if "}" in tag else tag
+
+
+def _xml_record(el) -> dict:
+    # Same fields as pd.read_xml: attributes, the element's own text and its children's text
+    record = dict(el.attrib)
+    if el.text and not el.text.isspace():
+        record[el.tag] = el.text
+    for ch in el.findall("*"):
+        record[ch.tag] = ch.text if ch.text else None
+    return {_local(k): v for k, v in record.items()}
+
+
+def iter_xml(file_path: str, chunksize: int, record_path: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Records via iterparse; each is cleared once read, so memory holds one chunk."""
+    import xml.etree.ElementTree as ET
+
+    parts = [p for p in (record_path or "").strip("/").split("/") if p]
+    stack, parents = [], []
+    columns = {}  # First-seen order across the whole file, as read_xml
+    rows, depth = [], None  # depth of the record being read
+    with open_raw(file_path) as raw:
+        for event, el in ET.iterparse(raw, events=("start", "end")):
+            if event == "start":
+                stack.append(_local(el.tag))
+                parents.append(el)
+                if depth is None and (stack[-len(parts):] == parts if parts else len(stack) == 2):
+                    depth = len(stack)
+                continue
+            parents.pop()
+            if depth is not None and len(stack) == depth:
+                record = _xml_record(el)
+                for key in record:
+                    columns.setdefault(key, None)
+                rows.append(record)
+                depth = None
+            stack.pop()
+            if depth is None:
+                # Done with this subtree: drop it so the tree never grows
+                el.clear()
+                if parents:
+                    parents[-1].remove(el)
+            if len(rows) >= chunksize:
+                yield _xml_chunk(rows, list(columns))
+                rows = []
+    if rows:
+        yield _xml_chunk(rows, list(columns))
+    elif not columns:
+        raise ValueError(f"No XML records found{f' at {record_path}' if record_path else ''}")
+
+
+def _xml_chunk(rows: list, columns: list) -> pd.DataFrame:
+    return _text_parser([[row.get(k) for k in columns] for row in rows], names=columns)
+
+
+# --- Dispatch ------------------------------------------------------------
+
+def iter_file(file_path: str, file_type: str, chunksize: int, options: dict = None) -> Iterator[pd.DataFrame]:
+    options = options or {}
+    if file_type == 'excel':
+        return iter_excel(file_path, chunksize, options.get('sheet'))
+    if file_type == 'json':
+        return iter_json(file_path, chunksize)
+    if file_type == 'xml':
+        return iter_xml(file_path, chunksize, options.get('record_path'))
+    raise NotStreamable(f"no streaming reader for {file_type}")
+
+
+def read_chunked(file_path: str, file_type: str, chunksize: int, options: dict = None) -> pd.DataFrame:
+    """Whole frame from the streaming reader, so peak memory is the frame rather than a DOM."""
+    chunks = list(iter_file(file_path, file_type, chunksize, options))
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+    # Per-chunk inference can leave object columns (e.g. all-null in one chunk) that the whole file types
+    return pd.concat(chunks, ignore_index=True).infer_objects()
@@ -0,0 +1,284 @@
+import os
+import random
+import re
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+# Background refresh of SQL sources on their DataSource.refresh_schedule
+# ("hourly", "daily", "weekly" or an interval such as "15m", "6h").
+#
+# connection_config keys:
+#   watermark_column  monotonically increasing column (updated_at, id); only
+#                     rows past the last watermark are fetched
+#   key_column        with a watermark: fetched rows replace stored rows with
+#                     the same key (upsert) instead of being appended
+# Without a watermark the whole query is re-read. Each refresh that brings
+# new rows becomes a new dataset version, warmed into the cache before it is
+# made current.
+SQL_TYPES = ('postgres', 'mysql')
+REFRESH_POLL_SECONDS = float(os.getenv("REFRESH_POLL_SECONDS", "30"))
+# Protects source databases: refreshes in flight overall, a floor on the
+# interval and +/- this fraction of random jitter on every run
+REFRESH_CONCURRENCY = int(os.getenv("REFRESH_CONCURRENCY", "2"))
+REFRESH_MIN_SECONDS = int(os.getenv("REFRESH_MIN_SECONDS", "60"))
+REFRESH_JITTER = float(os.getenv("REFRESH_JITTER", "0.1"))
+# Refresh versions kept per source (a re-read without a watermark stores a full
+# copy each time); older ones and the files only they use are dropped. 0 keeps all
+REFRESH_KEEP_VERSIONS = int(os.getenv("REFRESH_KEEP_VERSIONS", "10"))
+
+_NAMED_SCHEDULES = {"hourly": 3600, "daily": 86400, "weekly": 7 * 86400}
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_schedule(schedule: Optional[str]) -> Optional[float]:
+    """Seconds between refreshes, None when unscheduled. Raises ValueError for unknown formats."""
+    if not schedule or not schedule.strip():
+        return None
+    value = schedule.strip().lower()
+    if value in _NAMED_SCHEDULES:
+        seconds = _NAMED_SCHEDULES[value]
+    else:
+        match = re.fullmatch(r"(?:every\s+)?(\d+)\s*([smhd])", value)
+        if not match:
+            raise ValueError(f"Unsupported refresh schedule '{schedule}'. Use hourly, daily, weekly or an interval such as 15m")
+        seconds = int(match.group(1)) * _UNITS[match.group(2)]
+    return float(max(seconds, REFRESH_MIN_SECONDS))
+
+
+def _jittered(interval: float) -> float:
+    return interval * (1 + random.uniform(-REFRESH_JITTER, REFRESH_JITTER))
+
+
+def _encode_watermark(value):
+    # Stored in the version log, so it has to be JSON
+    if value is None or (np.isscalar(value) and pd.isna(value)):
+        return None, None
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return pd.Timestamp(value).isoformat(), "datetime"
+    if isinstance(value, np.generic):
+        return value.item(), None
+    return value, None
+
+
+def _decode_watermark(value, kind: Optional[str]):
+    if value is not None and kind == "datetime":
+        return pd.Timestamp(value).to_pydatetime()
+    return value
+
+
+def current_watermark(data_source, column: str):
+    """Watermark the current version is complete up to."""
+    from app.engine.versions import iter_operations, load_source
+
+    for op in iter_operations(data_source):
+        params = op.get("params") or {}
+        if op["type"] == "refresh" and params.get("watermark_column") == column:
+            return _decode_watermark(params.get("watermark"), params.get("watermark_type"))
+    # Never refreshed: the initial load is complete up to the column's maximum
+    df = load_source(data_source)
+    if column not in df.columns:
+        raise ValueError(f"Watermark column '{column}' is not in the dataset")
+    return df[column].max() if df[column].notna().any() else None
+
+
+def fetch_rows(config: dict, column: str = None, watermark=None, inclusive: bool = False) -> pd.DataFrame:
+    """Run the source query, restricted to rows past `watermark` when one is given."""
+    from sqlalchemy import create_engine, text
+    from app.engine.loader import check_read_only
+
+    query = (config.get("query") or "").strip().rstrip(";")
+    check_read_only(query)
+    conn_str = config.get("connection_string")
+    if not conn_str:
+        raise ValueError("Missing connection string")
+
+    engine = create_engine(conn_str)
+    try:
+        params = {}
+        if column and watermark is not None:
+            # The filter is pushed into the source database; the saved query stays untouched
+            quoted = engine.dialect.identifier_preparer.quote(column)
+            query = f"SELECT * FROM ({query}) AS src WHERE src.{quoted} {'>=' if inclusive else '>'} :watermark"
+            params["watermark"] = watermark.item() if isinstance(watermark, np.generic) else watermark
+        with engine.connect() as conn:
+            return pd.read_sql(text(query), conn, params=params)
+    finally:
+        engine.dispose()
+
+
+def refresh_source(db: Session, data_source) -> dict:
+    """
+    Fetch new rows for a SQL source and record them as a new version.
+    Returns what was fetched; "version" is None when nothing changed.
+    """
+    from app.engine import columnar_store
+    from app.engine.catalog import get_catalog, extend_catalog, refresh_catalog, schedule_profile
+    from app.engine.row_hash import get_row_index, peek_row_index, publish_row_index, row_hashes
+    from app.engine.versions import align_batch, get_cached_source, load_source, prune_refreshes, refresh_rows
+
+    if data_source.type not in SQL_TYPES:
+        raise ValueError("Only SQL data sources can be refreshed")
+
+    with columnar_store.writer_lock(data_source.id):
+        db.refresh(data_source)
+        config = data_source.connection_config or {}
+        column, key = config.get("watermark_column"), config.get("key_column")
+        mode = "replace" if not column else ("upsert" if key else "append")
+        watermark = current_watermark(data_source, column) if column else None
+        # Upserts re-read the rows at the watermark: a row updated within the same tick is not missed
+        batch = fetch_rows(config, column, watermark, inclusive=mode == "upsert")
+        result = {"mode": mode, "rows_fetched": len(batch), "version": None, "watermark": _encode_watermark(watermark)[0]}
+        if batch.empty and mode != "replace":
+            return result
+
+        params = {"mode": mode}
+        if mode != "replace":
+            catalog = get_catalog(db, data_source)
+            batch = align_batch(batch, catalog.column_names, catalog.dtypes or {})
+            latest = batch[column].max()
+            if watermark is not None and not latest > watermark:
+                latest = watermark
+            params["watermark_column"] = column
+            params["watermark"], params["watermark_type"] = _encode_watermark(latest)
+            result["watermark"] = params["watermark"]
+        if key:
+            params["key"] = key
+
+        parent_version = data_source.version
+        parent_index = None
+        if mode == "append":
+            parent_index = peek_row_index(data_source)
+        else:
+            # Skip rows that are already stored unchanged (and a re-read that changed nothing)
+            current = get_cached_source(data_source)
+            if current is None:
+                current = load_source(data_source)
+            known = get_row_index(data_source, current).hashes
+            if mode == "upsert":
+                batch = batch[~np.isin(row_hashes(batch), known)]
+                if batch.empty:
+                    return result
+            elif list(batch.columns) == list(current.columns) and np.array_equal(row_hashes(batch), known):
+                return result
+
+        record, df = refresh_rows(db, data_source, batch, params)
+        prune_refreshes(db, data_source, REFRESH_KEEP_VERSIONS)
+        if mode == "append":
+            if parent_index is not None:
+                publish_row_index(data_source, parent_index.append(batch))
+            profiled = extend_catalog(db, data_source, batch, int(batch.memory_usage(deep=False).sum()), parent_version, df)
+        else:
+            refresh_catalog(db, data_source, df)
+            profiled = False
+    if not profiled:
+        schedule_profile(data_source, df)
+
+    result["version"] = record.version
+    result["total_rows"] = record.row_count
+    return result
+
+
+class SourceRefresher:
+    """
+    Polls for SQL sources whose schedule is due and refreshes them on the
+    heavy lane, at most REFRESH_CONCURRENCY at a time and never two against
+    the same database at once.
+    """
+
+    def __init__(self):
+        self._next_run: Dict[int, float] = {}
+        self._running = set()
+        self._databases = set()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, REFRESH_CONCURRENCY))
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if REFRESH_POLL_SECONDS <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="source-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(REFRESH_POLL_SECONDS):
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Refresh scheduler error: {e}")
+
+    def tick(self, now: float = None):
+        from app.core.database import SessionLocal
+        from app.core.scheduler import scheduler
+        from app.models.data_source import DataSource
+
+        now = time.time() if now is None else now
+        due = []
+        db = SessionLocal()
+        try:
+            sources = db.query(DataSource).filter(
+                DataSource.type.in_(SQL_TYPES), DataSource.refresh_schedule.isnot(None)
+            ).all()
+            for data_source in sources:
+                try:
+                    interval = parse_schedule(data_source.refresh_schedule)
+                except ValueError as e:
+                    print(f"Skipping refresh of data source {data_source.id}: {e}")
+                    continue
+                if interval is None:
+                    continue
+                # First sighting (e.g. after a restart): start somewhere within one
+                # interval so sources sharing a schedule do not all fire together
+                next_run = self._next_run.setdefault(data_source.id, now + random.uniform(0, interval))
+                if next_run <= now:
+                    due.append((data_source.id, interval, (data_source.connection_config or {}).get("connection_string")))
+            scheduled = {data_source.id for data_source in sources}
+        finally:
+            db.close()
+
+        with self._lock:
+            for source_id in [i for i in self._next_run if i not in scheduled]:
+                del self._next_run[source_id]
+            for source_id, interval, database in due:
+                # Busy database or no free slot: stays due and is retried next tick
+                if source_id in self._running or database in self._databases:
+                    continue
+                if not self._slots.acquire(blocking=False):
+                    break
+                self._running.add(source_id)
+                self._databases.add(database)
+                self._next_run[source_id] = now + _jittered(interval)
+                scheduler.lane("heavy").submit(self._run, source_id, database)
+
+    def _run(self, source_id: int, database: str):
+        from app.core.database import SessionLocal
+        from app.models.data_source import DataSource
+
+        db = SessionLocal()
+        try:
+            data_source = db.query(DataSource).filter(DataSource.id == source_id).first()
+            if data_source is not None:
+                result = refresh_source(db, data_source)
+                if result["version"] is not None:
+                    print(f"Refreshed data source {source_id} ({result['mode']}): {result['rows_fetched']} rows, version {result['version']}")
+        except Exception as e:
+            print(f"Scheduled refresh failed for data source {source_id}: {e}")
+        finally:
+            db.close()
+            with self._lock:
+                self._running.discard(source_id)
+                self._databases.discard(database)
+            self._slots.release()
+
+
+refresher = SourceRefresher()
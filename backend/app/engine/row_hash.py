@@ -0,0 +1,194 @@
+import glob
+import os
+from typing import Optional
+import numpy as np
+import pandas as pd
+from app.engine import columnar_store
+
+# One 64-bit hash per row, in row order, persisted per dataset version next to
+# the Parquet sidecar. Duplicate counts and groups are answered from it;
+# appends hash only the new rows. Equal hashes only make rows candidates:
+# dedupe confirms them against the data before dropping anything.
+MAX_GROUP_ROWS = 100
+
+
+def _object_key(value):
+    # Values pandas' duplicated treats as equal (1, 1.0, True) share a key; '1' does not
+    if isinstance(value, (bool, int, float, np.bool_, np.integer, np.floating)):
+        try:
+            return "\x00n" + repr(float(value) + 0.0)
+        except OverflowError:
+            return "\x00n" + repr(value)
+    if isinstance(value, str):
+        return value
+    return f"\x00{type(value).__name__}:{value}"
+
+
+def _hashable(series: pd.Series) -> Optional[pd.Series]:
+    """The column as it is hashed, or None when its values hash as they are."""
+    dtype = series.dtype
+    if dtype == object:
+        # hash_pandas_object hashes str(value): 1 and '1' would collide, 1 and 1.0 not always
+        codes, uniques = pd.factorize(series.to_numpy(), use_na_sentinel=True)
+        keys = np.array([_object_key(v) for v in uniques] + [None], dtype=object)
+        return pd.Series(keys[codes], index=series.index, dtype=object)  # -1 (null) picks None
+    if isinstance(dtype, np.dtype) and dtype.kind == "f":
+        return series + 0.0  # -0.0 equals 0.0
+    return None
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    if df.empty:
+        return np.empty(0, dtype="uint64")
+    frame = df
+    for i in range(df.shape[1]):
+        column = _hashable(df.iloc[:, i])
+        if column is not None:
+            if frame is df:
+                frame = df.copy(deep=False)
+            frame.isetitem(i, column)
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def index_path(source_id: int, version: int) -> str:
+    return os.path.join(columnar_store.dataset_dir(source_id), f"rowhash_v{version}.npy")
+
+
+class RowHashIndex:
+    def __init__(self, hashes: np.ndarray):
+        self.hashes = hashes
+        self._groups = None
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "RowHashIndex":
+        return cls(row_hashes(df))
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def _unique(self):
+        if self._groups is None:
+            self._groups = np.unique(self.hashes, return_index=True, return_inverse=True, return_counts=True)
+        return self._groups
+
+    def duplicate_mask(self, df: pd.DataFrame = None) -> np.ndarray:
+        """
+        True for every repeat after the first occurrence. Pass the frame the
+        index describes to confirm the candidates against the data; the result
+        is then the same as df.duplicated(keep='first'). Without it, distinct
+        rows whose hashes collide count as repeats.
+        """
+        mask = np.ones(len(self.hashes), dtype=bool)
+        if not len(self.hashes):
+            return mask
+        _, first, inverse, counts = self._unique()
+        mask[first] = False
+        if df is None:
+            return mask
+        if len(df) != len(self.hashes):
+            raise ValueError("Row-hash index does not match the frame")
+        if (df.dtypes == object).any():
+            # Mixed-type values: pandas' own equality is the reference
+            return df.duplicated(keep="first").to_numpy()
+        candidates = np.flatnonzero(counts[inverse] > 1)
+        if len(candidates):
+            # Rows equal to an earlier row share its hash, so the candidates alone decide
+            mask[candidates] = df.iloc[candidates].duplicated(keep="first").to_numpy()
+        return mask
+
+    def duplicate_count(self) -> int:
+        # From the hashes: distinct rows whose 64-bit hashes collide are counted once
+        if not len(self.hashes):
+            return 0
+        unique, _, _, _ = self._unique()
+        return len(self.hashes) - len(unique)
+
+    def groups(self, offset: int = 0, limit: int = 20, max_rows: int = MAX_GROUP_ROWS) -> dict:
+        """
+        Duplicate groups, largest first (ties by first occurrence), with the
+        row positions of each group.
+        """
+        if not len(self.hashes):
+            return {"total_groups": 0, "groups": []}
+        _, first, inverse, counts = self._unique()
+        dup = np.flatnonzero(counts > 1)
+        order = dup[np.lexsort((first[dup], -counts[dup]))]
+        page = order[offset:offset + limit]
+
+        # Rows of every group, contiguous after one stable sort by group id
+        by_group = np.argsort(inverse, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        groups = []
+        for g in page:
+            rows = by_group[starts[g]:starts[g] + min(counts[g], max_rows)]
+            groups.append({
+                "hash": f"{int(self.hashes[first[g]]):016x}",
+                "count": int(counts[g]),
+                "rows": rows.tolist()
+            })
+        return {"total_groups": int(len(dup)), "groups": groups}
+
+    def filter(self, keep: np.ndarray) -> "RowHashIndex":
+        # Index of the frame after a row filter (e.g. dedupe) without rehashing
+        return RowHashIndex(self.hashes[keep])
+
+    def append(self, df: pd.DataFrame) -> "RowHashIndex":
+        return RowHashIndex(np.concatenate([self.hashes, row_hashes(df)]))
+
+    def save(self, source_id: int, version: int):
+        path = index_path(source_id, version)
+        with columnar_store.atomic_open(path) as f:
+            np.save(f, self.hashes)
+        # Only the current version is kept on disk
+        for old in glob.glob(os.path.join(columnar_store.dataset_dir(source_id), "rowhash_v*.npy")):
+            if old != path:
+                os.remove(old)
+
+    @classmethod
+    def load(cls, source_id: int, version: int) -> Optional["RowHashIndex"]:
+        path = index_path(source_id, version)
+        if not os.path.exists(path):
+            return None
+        return cls(np.load(path))
+
+
+def get_row_index(data_source, df: pd.DataFrame = None) -> RowHashIndex:
+    """
+    Row-hash index for the current version: memory, then disk, then built
+    from `df` (or the loaded dataset) and persisted.
+    """
+    from app.core.memory_cache import result_cache
+
+    key = ("rowhash", data_source.id, data_source.version)
+    index = result_cache.get(key)
+    if index is None:
+        index = RowHashIndex.load(data_source.id, data_source.version)
+    if index is not None and df is not None and len(index) != len(df):
+        index = None  # Stale: the data changed without a version bump
+    if index is not None:
+        result_cache.set(key, index)
+        return index
+
+    if df is None:
+        from app.engine.versions import load_source
+        df = load_source(data_source)
+    index = RowHashIndex.build(df)
+    publish_row_index(data_source, index)
+    return index
+
+
+def peek_row_index(data_source) -> Optional[RowHashIndex]:
+    """The current version's index if it is already in memory or on disk; never builds one."""
+    from app.core.memory_cache import result_cache
+    index = result_cache.get(("rowhash", data_source.id, data_source.version))
+    return index if index is not None else RowHashIndex.load(data_source.id, data_source.version)
+
+
+def publish_row_index(data_source, index: RowHashIndex):
+    """Store an index derived incrementally (dedupe, append) for the source's current version."""
+    from app.core.memory_cache import result_cache
+    try:
+        index.save(data_source.id, data_source.version)
+    except OSError as e:
+        print(f"Could not persist row-hash index for {data_source.id}: {e}")
+    result_cache.set(("rowhash", data_source.id, data_source.version), index)
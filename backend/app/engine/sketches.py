@@ -0,0 +1,472 @@
+import base64
+import math
+import numpy as np
+import pandas as pd
+
+# Mergeable summaries for streaming profiles. Each sketch supports
+# update(values) with a numpy array, merge(other) in place, and a JSON-safe
+# to_state()/from_state() round trip so partial profiles can be stored or
+# shipped between workers.
+#
+#   Moments            exact: count/sum/min/max/zeros and central moments (Chan/Pebay merge)
+#   KLLSketch          quantiles and ranks, rank error ~1.7/k (about 0.4% at k=400)
+#   HyperLogLog        distinct counts, exact below HLL_EXACT_LIMIT, ~0.8% std error above (p=14)
+#   CountMinTopK       heavy hitters, overestimates by at most 2N/width per value with high probability
+#   PowerOfTwoHistogram fixed bins of width 2^e; merges are exact, rebinning error <= one bin
+
+KLL_K = 400
+HLL_PRECISION = 14
+HLL_EXACT_LIMIT = 4096
+CM_WIDTH = 2048
+CM_DEPTH = 4
+HISTOGRAM_MAX_BINS = 1024
+
+
+def pack_array(values: np.ndarray) -> dict:
+    values = np.ascontiguousarray(values)
+    return {"dtype": values.dtype.str, "data": base64.b64encode(values.tobytes()).decode("ascii")}
+
+
+def unpack_array(state: dict) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(state["data"]), dtype=np.dtype(state["dtype"])).copy()
+
+
+def hash_values(values: np.ndarray) -> np.ndarray:
+    """Stable 64-bit hashes; the same value hashes the same in every chunk and process."""
+    if len(values) == 0:
+        return np.empty(0, dtype="uint64")
+    return pd.util.hash_array(values, categorize=False)
+
+
+class Moments:
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.zeros = 0
+
+    def update(self, values: np.ndarray):
+        # values: float64 without NaN
+        if not len(values):
+            return
+        chunk = Moments()
+        chunk.n = len(values)
+        chunk.total = float(values.sum())
+        chunk.mean = chunk.total / chunk.n
+        d = values - chunk.mean
+        d2 = d * d
+        chunk.m2 = float(d2.sum())
+        chunk.m3 = float((d2 * d).sum())
+        chunk.m4 = float((d2 * d2).sum())
+        chunk.min = float(values.min())
+        chunk.max = float(values.max())
+        chunk.zeros = int((values == 0).sum())
+        self.merge(chunk)
+
+    def merge(self, other: "Moments"):
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.__dict__.update(other.__dict__)
+            return
+        na, nb = self.n, other.n
+        n = na + nb
+        d = other.mean - self.mean
+        d2 = d * d
+        m2 = self.m2 + other.m2 + d2 * na * nb / n
+        m3 = (self.m3 + other.m3 + d * d2 * na * nb * (na - nb) / n ** 2
+              + 3 * d * (na * other.m2 - nb * self.m2) / n)
+        m4 = (self.m4 + other.m4 + d2 * d2 * na * nb * (na * na - na * nb + nb * nb) / n ** 3
+              + 6 * d2 * (na * na * other.m2 + nb * nb * self.m2) / n ** 2
+              + 4 * d * (na * other.m3 - nb * self.m3) / n)
+        self.n = n
+        self.total += other.total
+        self.mean += d * nb / n
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.zeros += other.zeros
+
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else None
+
+    def skew(self):
+        # Bias-corrected, as pandas Series.skew
+        n = self.n
+        if n < 3:
+            return None
+        if self.m2 == 0:
+            return 0.0
+        m2n, m3n = self.m2 / n, self.m3 / n
+        return math.sqrt(n * (n - 1)) / (n - 2) * (m3n / m2n ** 1.5)
+
+    def kurtosis(self):
+        # Bias-corrected excess kurtosis, as pandas Series.kurt
+        n = self.n
+        if n < 4:
+            return None
+        denominator = (n - 2) * (n - 3) * self.m2 ** 2
+        if denominator == 0:
+            return 0.0
+        return n * (n + 1) * (n - 1) * self.m4 / denominator - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+
+    def to_state(self) -> dict:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_state(cls, state: dict) -> "Moments":
+        sketch = cls()
+        sketch.__dict__.update(state)
+        return sketch
+
+
+class KLLSketch:
+    """
+    Compactor hierarchy: level h holds items of weight 2^h. When the sketch is
+    over capacity the lowest overfull level is sorted and every other item
+    (random offset) is promoted, halving it.
+    """
+
+    def __init__(self, k: int = KLL_K, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0, dtype="float64")]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        # Lazy compaction: only when the sketch as a whole is over capacity,
+        # and then only the lowest level that is over its own share
+        while sum(len(items) for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            h = next(h for h, items in enumerate(self.levels) if len(items) > self._capacity(h))
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0, dtype="float64"))
+            items = np.sort(self.levels[h])
+            # An odd item out stays behind at its own weight
+            keep = items[:1] if len(items) % 2 else items[:0]
+            paired = items[len(keep):]
+            promoted = paired[int(self._rng.integers(2))::2]
+            self.levels[h] = keep
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+
+    def update(self, values: np.ndarray):
+        if not len(values):
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values.astype("float64", copy=False)])
+        self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        if other.n == 0:
+            return
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype="float64"))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype="float64") for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q: float):
+        if self.n == 0:
+            return None
+        items, cumulative = self._weighted()
+        # Linear interpolation between neighbouring ranks, like pandas' default
+        target = q * (cumulative[-1] - 1)
+        base = math.floor(target)
+        # Item i covers ranks cumulative[i-1] .. cumulative[i]-1 (0-based)
+        lo = int(np.searchsorted(cumulative, base + 1, side="left"))
+        hi = int(np.searchsorted(cumulative, base + 2, side="left"))
+        lo, hi = min(lo, len(items) - 1), min(hi, len(items) - 1)
+        frac = target - base
+        return float(items[lo] + (items[hi] - items[lo]) * frac)
+
+    def rank(self, value: float, inclusive: bool = False) -> float:
+        """Estimated number of items below `value` (or <= when inclusive)."""
+        if self.n == 0:
+            return 0.0
+        items, cumulative = self._weighted()
+        idx = int(np.searchsorted(items, value, side="right" if inclusive else "left"))
+        estimate = float(cumulative[idx - 1]) if idx else 0.0
+        # Scale the compacted weight total back to the true count
+        return estimate * self.n / float(cumulative[-1])
+
+    def rank_error(self) -> int:
+        """Bound on the error of rank(); 0 while nothing has been compacted away."""
+        if len(self.levels) == 1:
+            return 0
+        return int(math.ceil(1.7 / self.k * self.n))
+
+    def to_state(self) -> dict:
+        return {
+            "k": self.k, "n": self.n, "levels": [pack_array(items) for items in self.levels],
+            # A restored sketch compacts exactly as the original would have
+            "rng": self._rng.bit_generator.state
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "KLLSketch":
+        sketch = cls(k=state["k"])
+        sketch.n = state["n"]
+        sketch.levels = [unpack_array(items) for items in state["levels"]]
+        if state.get("rng"):
+            sketch._rng.bit_generator.state = state["rng"]
+        return sketch
+
+
+class HyperLogLog:
+    def __init__(self, p: int = HLL_PRECISION):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype="uint8")
+        # Exact hashes while the cardinality is small; dropped once over the limit
+        self.exact = np.empty(0, dtype="uint64")
+
+    def update_hashes(self, hashes: np.ndarray):
+        if not len(hashes):
+            return
+        if self.exact is not None:
+            self.exact = np.union1d(self.exact, hashes)
+            if len(self.exact) > HLL_EXACT_LIMIT:
+                self.exact = None
+        bucket = (hashes >> np.uint64(64 - self.p)).astype("int64")
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # frexp exponent == bit length (rest < 2^50 is exact in float64)
+        _, bit_length = np.frexp(rest.astype("float64"))
+        rho = (64 - self.p) - bit_length + 1
+        np.maximum.at(self.registers, bucket, rho.astype("uint8"))
+
+    def update(self, values: np.ndarray):
+        self.update_hashes(hash_values(values))
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if self.exact is not None and other.exact is not None:
+            self.exact = np.union1d(self.exact, other.exact)
+            if len(self.exact) > HLL_EXACT_LIMIT:
+                self.exact = None
+        else:
+            self.exact = None
+
+    def count(self) -> int:
+        if self.exact is not None:
+            return int(len(self.exact))
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.power(2.0, -self.registers.astype("float64"))))
+        empty = int((self.registers == 0).sum())
+        if estimate <= 2.5 * m and empty:
+            # Linear counting for the small range
+            estimate = m * math.log(m / empty)
+        return int(round(estimate))
+
+    def error_bound(self) -> int:
+        """Three standard errors of count() (about 99.7% confidence); 0 while it is exact."""
+        if self.exact is not None:
+            return 0
+        return int(math.ceil(3 * 1.04 / math.sqrt(len(self.registers)) * self.count()))
+
+    def to_state(self) -> dict:
+        return {
+            "p": self.p,
+            "registers": pack_array(self.registers),
+            "exact": pack_array(self.exact) if self.exact is not None else None
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "HyperLogLog":
+        sketch = cls(p=state["p"])
+        sketch.registers = unpack_array(state["registers"])
+        sketch.exact = unpack_array(state["exact"]) if state["exact"] is not None else None
+        return sketch
+
+
+class CountMinTopK:
+    """
+    Count-min table for frequencies plus a bounded candidate set of the
+    heaviest values seen. Candidates come from each chunk's exact top values,
+    so a value that is frequent overall but never locally frequent can be
+    missed; fine for "top values" displays.
+    """
+
+    def __init__(self, k: int = 10, width: int = CM_WIDTH, depth: int = CM_DEPTH):
+        self.k = k
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype="int64")
+        self.candidates = {}  # label -> hash
+        self.total = 0
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        # Double hashing: row i uses h1 + i * h2
+        h1 = (hashes & np.uint64(0xFFFFFFFF)).astype("int64")
+        h2 = (hashes >> np.uint64(32)).astype("int64") | 1
+        rows = np.arange(self.depth, dtype="int64")[:, None]
+        return (h1[None, :] + rows * h2[None, :]) % self.width
+
+    def estimate_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        if not len(hashes):
+            return np.empty(0, dtype="int64")
+        cols = self._columns(hashes)
+        return self.table[np.arange(self.depth)[:, None], cols].min(axis=0)
+
+    def update(self, labels: np.ndarray, hashes: np.ndarray):
+        """labels: string form of each value (for display), hashes: hash_values of the values."""
+        if not len(hashes):
+            return
+        self.total += len(hashes)
+        cols = self._columns(hashes)
+        for i in range(self.depth):
+            self.table[i] += np.bincount(cols[i], minlength=self.width)
+
+        # Exact local heavy hitters become candidates
+        unique, first, counts = np.unique(hashes, return_index=True, return_counts=True)
+        for i in np.argsort(-counts, kind="stable")[:self.k * 2]:
+            self.candidates.setdefault(str(labels[first[i]]), unique[i])
+        self._prune()
+
+    def _prune(self):
+        if len(self.candidates) <= self.k * 4:
+            return
+        ranked = self.top(self.k * 2)
+        self.candidates = {label: self.candidates[label] for label, _ in ranked}
+
+    def merge(self, other: "CountMinTopK"):
+        self.table += other.table
+        self.total += other.total
+        for label, h in other.candidates.items():
+            self.candidates.setdefault(label, h)
+        self._prune()
+
+    def top(self, n: int = None):
+        if not self.candidates:
+            return []
+        labels = list(self.candidates)
+        hashes = np.array([self.candidates[label] for label in labels], dtype="uint64")
+        estimates = self.estimate_hashes(hashes)
+        # Highest estimate first; ties by label so results are deterministic
+        order = sorted(range(len(labels)), key=lambda i: (-estimates[i], labels[i]))
+        return [(labels[i], int(estimates[i])) for i in order[:n or self.k]]
+
+    def to_state(self) -> dict:
+        return {
+            "k": self.k, "width": self.width, "depth": self.depth, "total": self.total,
+            "table": pack_array(self.table),
+            "candidates": {label: int(h) for label, h in self.candidates.items()}
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "CountMinTopK":
+        sketch = cls(k=state["k"], width=state["width"], depth=state["depth"])
+        sketch.total = state["total"]
+        sketch.table = unpack_array(state["table"]).reshape(sketch.depth, sketch.width)
+        sketch.candidates = {label: np.uint64(h) for label, h in state["candidates"].items()}
+        return sketch
+
+
+class PowerOfTwoHistogram:
+    """
+    Bins [i * 2^e, (i + 1) * 2^e). Whenever the occupied range exceeds
+    `max_bins` the exponent grows and neighbouring bins are summed, so any two
+    histograms can be aligned to the coarser one and added exactly.
+    """
+
+    def __init__(self, max_bins: int = HISTOGRAM_MAX_BINS):
+        self.max_bins = max_bins
+        self.exponent = None
+        self.offset = 0
+        self.counts = np.zeros(0, dtype="int64")
+
+    @property
+    def width(self) -> float:
+        return 2.0 ** self.exponent
+
+    def _coarsen(self, exponent: int):
+        if exponent <= self.exponent:
+            return
+        factor = 1 << (exponent - self.exponent)
+        idx = (np.arange(len(self.counts)) + self.offset) // factor
+        new_offset = int(idx[0]) if len(idx) else 0
+        self.counts = np.bincount(idx - new_offset, weights=self.counts).astype("int64")
+        self.offset = new_offset
+        self.exponent = exponent
+
+    def _add(self, offset: int, counts: np.ndarray):
+        if not len(counts):
+            return
+        if not len(self.counts):
+            self.offset, self.counts = offset, counts.astype("int64")
+        else:
+            lo = min(self.offset, offset)
+            hi = max(self.offset + len(self.counts), offset + len(counts))
+            merged = np.zeros(hi - lo, dtype="int64")
+            merged[self.offset - lo:self.offset - lo + len(self.counts)] += self.counts
+            merged[offset - lo:offset - lo + len(counts)] += counts
+            self.offset, self.counts = lo, merged
+        while len(self.counts) > self.max_bins:
+            self._coarsen(self.exponent + 1)
+
+    def update(self, values: np.ndarray):
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        if self.exponent is None:
+            spread = float(values.max() - values.min())
+            self.exponent = int(math.ceil(math.log2(spread / self.max_bins))) if spread > 0 else 0
+        while True:
+            idx = np.floor(values / self.width).astype("int64")
+            lo, hi = int(idx.min()), int(idx.max())
+            if hi - lo < self.max_bins:
+                break
+            self._coarsen(self.exponent + 1)
+        self._add(lo, np.bincount(idx - lo))
+
+    def merge(self, other: "PowerOfTwoHistogram"):
+        if other.exponent is None:
+            return
+        other = PowerOfTwoHistogram.from_state(other.to_state())
+        if self.exponent is None:
+            self.exponent = other.exponent
+        target = max(self.exponent, other.exponent)
+        self._coarsen(target)
+        other._coarsen(target)
+        self._add(other.offset, other.counts)
+
+    def rebin(self, lo: float, hi: float, bins: int, value_min: float = None, value_max: float = None) -> np.ndarray:
+        """
+        Counts over `bins` equal-width bins in [lo, hi], assigning each fine bin
+        by its midpoint (clamped to the observed value range when given).
+        """
+        out = np.zeros(bins, dtype="int64")
+        if not len(self.counts):
+            return out
+        centers = (np.arange(len(self.counts)) + self.offset + 0.5) * self.width
+        if value_min is not None and value_max is not None:
+            centers = np.clip(centers, value_min, value_max)
+        target = np.floor((centers - lo) / (hi - lo) * bins) if hi > lo else np.zeros(len(centers))
+        target = np.clip(target, 0, bins - 1).astype(int)
+        np.add.at(out, target, self.counts)
+        return out
+
+    def to_state(self) -> dict:
+        return {"max_bins": self.max_bins, "exponent": self.exponent, "offset": self.offset, "counts": pack_array(self.counts)}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "PowerOfTwoHistogram":
+        sketch = cls(max_bins=state["max_bins"])
+        sketch.exponent = state["exponent"]
+        sketch.offset = state["offset"]
+        sketch.counts = unpack_array(state["counts"])
+        return sketch
@@ -0,0 +1,256 @@
+import numpy as np
+import pandas as pd
+
+HISTOGRAM_BINS = 10
+TOP_VALUES = 10
+
+
+def numeric_matrix(df: pd.DataFrame, columns) -> np.ndarray:
+    """Stack numeric columns into one (rows x columns) float64 array, NaN for missing."""
+    if not len(columns):
+        return np.empty((len(df), 0), dtype="float64")
+    return np.column_stack([df[col].to_numpy(dtype="float64", na_value=np.nan) for col in columns])
+
+
+def numeric_kernel(X: np.ndarray) -> dict:
+    """
+    All per-column numeric statistics for a 2-D array in one vectorized pass.
+    The column-wise sort feeds min/max, quantiles, distinct counts and modes;
+    the centered deviations feed std, skew and kurtosis. Results follow
+    pandas conventions (ddof=1 std, bias-corrected skew/kurt, linear quantiles,
+    smallest value on mode ties).
+    """
+    n, k = X.shape
+    cols = np.arange(k)
+    valid = ~np.isnan(X)
+    count = valid.sum(axis=0)
+    has = count > 0
+    safe_count = np.where(has, count, 1)
+
+    # Moments from centered deviations
+    Xz = np.where(valid, X, 0.0)
+    sums = Xz.sum(axis=0)
+    mean = sums / safe_count
+    D = np.where(valid, X - mean, 0.0)
+    D2 = D * D
+    m2 = D2.sum(axis=0)
+    m3 = (D2 * D).sum(axis=0)
+    m4 = (D2 * D2).sum(axis=0)
+    del D, D2, Xz
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.where(count > 1, np.sqrt(m2 / np.maximum(count - 1, 1)), np.nan)
+
+        c = count.astype("float64")
+        m2n, m3n = m2 / safe_count, m3 / safe_count
+        skew = np.sqrt(c * (c - 1)) / (c - 2) * (m3n / m2n ** 1.5)
+        skew = np.where(m2n == 0, 0.0, skew)
+        skew = np.where(count < 3, np.nan, skew)
+
+        numerator = c * (c + 1) * (c - 1) * m4
+        denominator = (c - 2) * (c - 3) * m2 ** 2
+        adj = 3 * (c - 1) ** 2 / ((c - 2) * (c - 3))
+        kurt = np.where(denominator == 0, 0.0, numerator / denominator - adj)
+        kurt = np.where(count < 4, np.nan, kurt)
+
+    # One sort per column: NaNs go last, so the first `count` rows are the valid values
+    S = np.sort(X, axis=0)
+    last = np.maximum(count - 1, 0)
+    col_min = np.where(has, S[0, cols] if n else np.nan, np.nan)
+    col_max = np.where(has, S[last, cols] if n else np.nan, np.nan)
+
+    def quantile(q):
+        pos = (count - 1) * q
+        lo = np.floor(pos).astype(int).clip(0)
+        hi = np.ceil(pos).astype(int).clip(0)
+        if not n:
+            return np.full(k, np.nan)
+        v_lo, v_hi = S[lo, cols], S[hi, cols]
+        return np.where(has, v_lo + (v_hi - v_lo) * (pos - lo), np.nan)
+
+    q25, q50, q75 = quantile(0.25), quantile(0.5), quantile(0.75)
+
+    # Runs of equal values in the sorted valid data -> distinct counts and modes
+    flat = S.T[np.arange(n)[None, :] < count[:, None]]
+    col_of = np.repeat(cols, count)
+    distinct = np.zeros(k, dtype=int)
+    mode = np.full(k, np.nan)
+    if len(flat):
+        starts = np.ones(len(flat), dtype=bool)
+        starts[1:] = (flat[1:] != flat[:-1]) | (col_of[1:] != col_of[:-1])
+        start_idx = np.flatnonzero(starts)
+        lengths = np.diff(np.append(start_idx, len(flat)))
+        run_col = col_of[start_idx]
+        distinct = np.bincount(run_col, minlength=k)
+        # Longest run per column; ties resolved by the earliest (smallest) value
+        order = np.lexsort((start_idx, -lengths, run_col))
+        first_cols, first_pos = np.unique(run_col[order], return_index=True)
+        mode[first_cols] = flat[start_idx[order[first_pos]]]
+
+    zeros = (X == 0).sum(axis=0)
+
+    # Histograms for every column at once: bin index offset by column into one bincount
+    lo_edge = np.where(col_min == col_max, col_min - 0.5, col_min)
+    hi_edge = np.where(col_min == col_max, col_max + 0.5, col_max)
+    width = np.where(has, hi_edge - lo_edge, 1.0)
+    with np.errstate(invalid="ignore"):
+        bins = np.floor((X - lo_edge) / width * HISTOGRAM_BINS)
+    bins = np.clip(np.nan_to_num(bins, nan=0), 0, HISTOGRAM_BINS - 1).astype(int)
+    flat_bins = (bins + cols * HISTOGRAM_BINS)[valid]
+    hist = np.bincount(flat_bins, minlength=k * HISTOGRAM_BINS).reshape(k, HISTOGRAM_BINS)
+
+    # IQR outliers from the quantiles already computed
+    iqr = q75 - q25
+    lower, upper = q25 - 1.5 * iqr, q75 + 1.5 * iqr
+    with np.errstate(invalid="ignore"):
+        outlier_count = (valid & ((X < lower) | (X > upper))).sum(axis=0)
+
+    return {
+        "count": count, "sum": sums, "mean": np.where(has, mean, np.nan), "std": std,
+        "min": col_min, "25%": q25, "50%": q50, "75%": q75, "max": col_max,
+        "skew": skew, "kurtosis": kurt, "zeros": zeros, "distinct": distinct, "mode": mode,
+        "hist": hist, "hist_lo": lo_edge, "hist_hi": hi_edge,
+        "lower_bound": lower, "upper_bound": upper, "outlier_count": outlier_count,
+    }
+
+
+def _f(value):
+    return None if value is None or pd.isna(value) else float(value)
+
+
+def _categorical_mode(counts: pd.Series):
+    if counts.empty:
+        return None
+    tied = counts.index[counts == counts.iloc[0]]
+    try:
+        return str(min(tied))
+    except TypeError:
+        return str(tied[0])
+
+
+def categorical_stats(series: pd.Series) -> dict:
+    """distinct/mode/top values for one non-numeric column (one value_counts)."""
+    counts = series.value_counts(dropna=True)
+    return {
+        "distinct": int(len(counts)),
+        "mode": _categorical_mode(counts),
+        "distribution": {
+            "type": "top_values",
+            "data": [{"name": str(k), "count": int(v)} for k, v in counts.head(TOP_VALUES).items()]
+        }
+    }
+
+
+def compute_statistics(df: pd.DataFrame, duplicate_rows: int = None, parallel: bool = None) -> dict:
+    """
+    Column statistics, distributions and the auto-generated summary for /statistics.
+    Numeric columns are profiled together through `numeric_kernel`; other
+    columns need one value_counts each. Wide frames are partitioned by column
+    across the process pool (see app/engine/parallel_profile.py) unless
+    `parallel` is False.
+    """
+    total_rows = len(df)
+    columns = list(df.columns)
+    numeric_cols = [col for col in columns if pd.api.types.is_numeric_dtype(df[col])]
+    numeric_set = set(numeric_cols)
+    other_cols = [col for col in columns if col not in numeric_set]
+    missing = df.isnull().sum()
+
+    from app.engine import parallel_profile
+    if parallel is None:
+        parallel = parallel_profile.should_parallelize(df)
+    if parallel:
+        kernel, categorical = parallel_profile.profile_columns(df, numeric_cols, other_cols)
+    else:
+        kernel = numeric_kernel(numeric_matrix(df, numeric_cols)) if numeric_cols else None
+        categorical = {col: categorical_stats(df[col]) for col in other_cols}
+    position = {col: j for j, col in enumerate(numeric_cols)}
+
+    stats = {}
+    for col in columns:
+        col_missing = int(missing[col])
+        col_stats = {
+            "type": str(df[col].dtype),
+            "count": total_rows - col_missing,
+            "missing": col_missing,
+        }
+
+        if col in position:
+            j = position[col]
+            col_stats["distinct"] = int(kernel["distinct"][j])
+        else:
+            col_stats["distinct"] = categorical[col]["distinct"]
+
+        col_stats["missing_pct"] = round((col_stats["missing"] / total_rows) * 100, 2) if total_rows > 0 else 0
+        col_stats["distinct_pct"] = round((col_stats["distinct"] / total_rows) * 100, 2) if total_rows > 0 else 0
+
+        if col in position:
+            col_stats.update({
+                "mean": _f(kernel["mean"][j]),
+                "sum": _f(kernel["sum"][j]),
+                "std": _f(kernel["std"][j]),
+                "min": _f(kernel["min"][j]),
+                "25%": _f(kernel["25%"][j]),
+                "50%": _f(kernel["50%"][j]),
+                "median": _f(kernel["50%"][j]),
+                "75%": _f(kernel["75%"][j]),
+                "max": _f(kernel["max"][j]),
+                "zeros": int(kernel["zeros"][j]),
+                "skew": _f(kernel["skew"][j]),
+                "kurtosis": _f(kernel["kurtosis"][j]),
+                "mode": _f(kernel["mode"][j])
+            })
+
+            # Counts and bounds only; the rows themselves are paged from the outlier index
+            col_stats["outliers"] = {
+                "count": int(kernel["outlier_count"][j]),
+                "lower_bound": _f(kernel["lower_bound"][j]),
+                "upper_bound": _f(kernel["upper_bound"][j])
+            }
+
+            if col_stats["count"] > 0:
+                edges = np.linspace(kernel["hist_lo"][j], kernel["hist_hi"][j], HISTOGRAM_BINS + 1)
+                col_stats["distribution"] = {
+                    "type": "histogram",
+                    "data": [{"bin": f"{edges[i]:.2f}-{edges[i+1]:.2f}", "count": int(c)} for i, c in enumerate(kernel["hist"][j])]
+                }
+        else:
+            col_stats["mode"] = categorical[col]["mode"]
+            col_stats["distribution"] = categorical[col]["distribution"]
+
+        stats[col] = col_stats
+
+    dupes = int(df.duplicated().sum()) if duplicate_rows is None else int(duplicate_rows)
+
+    return {
+        "total_rows": total_rows,
+        "duplicate_rows": dupes,
+        "column_stats": stats,
+        "summary": build_summary(stats, total_rows, len(columns), dupes)
+    }
+
+
+def build_summary(stats: dict, total_rows: int, total_columns: int, dupes: int) -> list:
+    summary = []
+    summary.append(f"Dataset contains {total_rows:,} rows and {total_columns} columns.")
+
+    # 1. Missing Value Checks
+    high_missing = [col for col, data in stats.items() if data.get('missing_pct', 0) > 5]
+    if high_missing:
+        summary.append(f"⚠️ {len(high_missing)} columns have >5% missing values: {', '.join(high_missing[:3])}{'...' if len(high_missing)>3 else ''}.")
+
+    # 2. Skewness Checks (Numeric) - reuses the kernel's skew
+    skewed_cols = [col for col, data in stats.items() if data.get('skew') is not None and abs(data['skew']) > 1]
+    if skewed_cols:
+        summary.append(f"📈 {len(skewed_cols)} numeric columns are highly skewed (skew > 1): {', '.join(skewed_cols[:3])}{'...' if len(skewed_cols)>3 else ''}.")
+
+    # 3. Constant Columns
+    constant_cols = [col for col, data in stats.items() if data.get('distinct') == 1]
+    if constant_cols:
+         summary.append(f"🛑 {len(constant_cols)} columns contain a single constant value: {', '.join(constant_cols[:3])}.")
+
+    # 4. Duplicate Rows
+    if dupes > 0:
+        summary.append(f"👯 Dataset contains {dupes:,} duplicate rows ({round(dupes/total_rows*100, 1)}%).")
+
+    return summary
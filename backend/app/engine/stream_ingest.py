@@ -0,0 +1,326 @@
+import io
+import os
+import queue
+import threading
+import uuid
+import zlib
+from typing import Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from app.engine import columnar_store
+from app.engine.compression import GzipFeed
+
+# Single-pass ingest: the upload loop tees every buffer it writes to disk into
+# a parser thread, which discovers the schema and row count, feeds the profile
+# sketches and writes the Parquet copy while the bytes are still arriving.
+# Parsing matches load_dataframe (pandas read_csv), so the copy and the
+# catalog agree with what a later full load produces.
+#
+# Outcomes:
+#   rejected  the parser fails the way a full load would (malformed rows,
+#             empty file): InvalidFile is raised and the upload is dropped
+#   fallback  the stream cannot be converted exactly in one pass (e.g. not
+#             UTF-8, a column changing type); the upload is kept and ingested
+#             by the background job as before
+#
+# A .csv.gz upload is gunzipped on the way into the parser; zip archives are
+# only readable once complete and are left to the ingest job.
+#
+# ColumnarChunkWriter is the shared tail: the ingest job uses it as well to
+# build the columnar copy of large files from the chunked readers.
+STREAM_CHUNK_ROWS = columnar_store.ROW_GROUP_SIZE
+# Bytes parsed from the first chunk of a resumable upload to reject bad files early
+SNIFF_BYTES = 1024 * 1024
+STREAMABLE_TYPES = ('csv',)
+
+
+class InvalidFile(ValueError):
+    """The upload cannot be parsed as its declared type."""
+
+
+def _is_number(arrow_type) -> bool:
+    return pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type)
+
+
+def _reject_error(e: Exception) -> bool:
+    return isinstance(e, (pd.errors.ParserError, pd.errors.EmptyDataError))
+
+
+class _Pipe(io.RawIOBase):
+    """Blocking byte stream fed from another thread; None marks the end."""
+
+    def __init__(self, max_buffers: int = 16):
+        self._queue = queue.Queue(max_buffers)
+        self._current = memoryview(b"")
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not len(self._current) and not self._eof:
+            item = self._queue.get()
+            if item is None:
+                self._eof = True
+            else:
+                self._current = memoryview(item)
+        n = min(len(b), len(self._current))
+        b[:n] = self._current[:n]
+        self._current = self._current[n:]
+        return n
+
+    def put(self, data, alive: threading.Event) -> bool:
+        # Gives up once the reader has stopped, so the writer never blocks on a dead parser
+        while True:
+            try:
+                self._queue.put(data, timeout=0.1)
+                return True
+            except queue.Full:
+                if not alive.is_set():
+                    return False
+
+
+class StreamResult:
+    def __init__(self, parquet_path: str, builder, rows: int):
+        self.parquet_path = parquet_path
+        self.builder = builder
+        self.rows = rows
+
+
+class ColumnarChunkWriter:
+    """
+    Write DataFrame chunks to one Parquet file while feeding the profile
+    sketches, reconciling column types that differ between chunks. Sets
+    `fallback` (and stops writing) when the chunks cannot form one table.
+    """
+
+    def __init__(self, path: str, version: int = 1):
+        from app.engine.profile_builder import ProfileBuilder
+
+        self.path = path
+        self.version = version
+        self.builder = ProfileBuilder()
+        self.rows = 0
+        self.fallback = None
+        self._writer = None
+        self._schema = None
+        self._has_values = set()  # columns with a non-null value written so far
+
+    def write(self, chunk: pd.DataFrame):
+        if self.fallback is not None:
+            return
+        self.rows += len(chunk)
+        self.builder.update(chunk)
+        table = columnar_store.to_arrow_table(chunk)
+        if self._schema is None:
+            self._open_writer(table.schema)
+        elif not table.schema.equals(self._schema, check_metadata=False):
+            table = self._unify(table)
+            if table is None:
+                return
+        self._writer.write_table(table, row_group_size=STREAM_CHUNK_ROWS)
+        for name in table.column_names:
+            if table.column(name).null_count < len(table):
+                self._has_values.add(name)
+
+    def _open_writer(self, schema: pa.Schema):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._schema = schema.with_metadata({**(schema.metadata or {}), b"source_version": str(self.version).encode()})
+        self._writer = pq.ParquetWriter(self.path, self._schema)
+
+    def _unify(self, table: pa.Table) -> Optional[pa.Table]:
+        """
+        Reconcile a chunk whose column types differ from what was written so
+        far: all-null columns take the other side's type and integers widen
+        to float (a later chunk with nulls). Anything else is a fallback.
+        """
+        if table.column_names != self._schema.names:
+            self.fallback = "column names changed between chunks"
+            return None
+        fields, columns, widen = [], [], False
+        for field, column in zip(self._schema, table.columns):
+            target = field.type
+            if column.type != field.type:
+                if column.null_count == len(table):
+                    column = pa.nulls(len(table), field.type)  # Nulls fit any type
+                elif field.name not in self._has_values:
+                    target, widen = column.type, True
+                elif _is_number(field.type) and _is_number(column.type):
+                    target, widen = pa.float64(), True
+                else:
+                    self.fallback = f"column '{field.name}' changes type from {field.type} to {column.type}"
+                    return None
+            fields.append(pa.field(field.name, target))
+            columns.append(column.cast(target))
+        schema = pa.schema(fields, metadata=self._schema.metadata)
+        if widen:
+            # The pandas metadata describes the first chunk's dtypes; readers infer from Arrow instead
+            schema = schema.with_metadata({k: v for k, v in self._schema.metadata.items() if k != b"pandas"})
+            self._rewrite(schema)
+        return pa.Table.from_arrays(columns, schema=schema)
+
+    def _rewrite(self, schema: pa.Schema):
+        # Rare (at most once per widened column): re-cast what is on disk so far
+        self._writer.close()
+        previous = f"{self.path}.prev"
+        os.replace(self.path, previous)
+        self._schema = schema
+        self._writer = pq.ParquetWriter(self.path, schema)
+        for batch in pq.ParquetFile(previous).iter_batches(batch_size=STREAM_CHUNK_ROWS):
+            columns = [
+                column.cast(field.type) if field.name in self._has_values else pa.nulls(len(column), field.type)
+                for field, column in zip(schema, batch.columns)
+            ]
+            self._writer.write_table(pa.Table.from_arrays(columns, schema=schema), row_group_size=STREAM_CHUNK_ROWS)
+        os.remove(previous)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def discard(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def write_chunks(chunks, path: str, version: int = 1) -> Optional[StreamResult]:
+    """
+    Columnar copy of a chunked reader's output, built in bounded memory.
+    Returns None (and leaves nothing behind) when the chunks do not fit one
+    schema or the reader gives up midway.
+    """
+    from app.engine.readers import NotStreamable
+
+    writer = ColumnarChunkWriter(path, version)
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+            if writer.fallback is not None:
+                break
+        writer.close()
+    except NotStreamable as e:
+        writer.fallback = str(e)
+    except BaseException:
+        writer.discard()
+        raise
+    if writer.fallback is not None or writer.rows == 0:
+        if writer.fallback is not None:
+            print(f"Chunked columnar copy not used: {writer.fallback}")
+        writer.discard()
+        return None
+    return StreamResult(path, writer.builder, writer.rows)
+
+
+class StreamingIngest:
+    def __init__(self, file_type: str, work_dir: str, version: int = 1, codec: str = None):
+        self.file_type = file_type
+        self._gunzip = GzipFeed() if codec == "gzip" else None
+        self.error = None  # reason to reject
+        self.result = None
+        self._writer = ColumnarChunkWriter(os.path.join(work_dir, f"{uuid.uuid4().hex}.parquet"), version)
+        self._cancelled = False
+        self._pipe = _Pipe()
+        self._alive = threading.Event()
+        self._alive.set()
+        os.makedirs(work_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._parse, name="stream-ingest", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def for_type(cls, file_type: str, work_dir: str, codec: str = None) -> Optional["StreamingIngest"]:
+        if file_type not in STREAMABLE_TYPES or codec == "zip":
+            return None
+        return cls(file_type, work_dir, codec=codec)
+
+    @property
+    def fallback(self) -> Optional[str]:
+        return self._writer.fallback
+
+    def _parse(self):
+        try:
+            # Parsing continues after a fallback: a malformed row further on still rejects the file
+            for chunk in pd.read_csv(self._pipe, encoding='utf-8', chunksize=STREAM_CHUNK_ROWS):
+                if self._cancelled:
+                    break
+                self._writer.write(chunk)
+        except Exception as e:
+            if _reject_error(e):
+                self.error = str(e)
+            elif self._writer.fallback is None:
+                # e.g. UnicodeDecodeError: the full load retries as latin1
+                self._writer.fallback = str(e)
+        finally:
+            self._alive.clear()
+            self._writer.close()
+
+    def feed(self, data: bytes):
+        """Pass on a buffer written to disk. Raises InvalidFile as soon as the parser has rejected the stream."""
+        if self.error is not None:
+            raise InvalidFile(self.error)
+        if data and self._gunzip is not None:
+            try:
+                data = self._gunzip.decompress(bytes(data))
+            except zlib.error as e:
+                self.error = f"Not a valid gzip file: {e}"
+                raise InvalidFile(self.error)
+        if data and self._alive.is_set():
+            self._pipe.put(bytes(data), self._alive)
+
+    def finish(self) -> Optional[StreamResult]:
+        """
+        End of upload. Returns the one-pass result, or None when the file must
+        be ingested the regular way. Raises InvalidFile for a rejected file.
+        """
+        self._pipe.put(None, self._alive)
+        self._thread.join()
+        if self.error is None and self._gunzip is not None and not self._gunzip.complete:
+            self.error = "Compressed file is truncated"
+        if self.error is not None:
+            self._writer.discard()
+            raise InvalidFile(self.error)
+        if self.fallback is not None:
+            print(f"Single-pass ingest not used: {self.fallback}")
+            self._writer.discard()
+            return None
+        self.result = StreamResult(self._writer.path, self._writer.builder, self._writer.rows)
+        return self.result
+
+    def abort(self):
+        if self.result is not None:
+            return  # Finished: the caller owns the Parquet file
+        self._cancelled = True
+        self._pipe.put(None, self._alive)
+        self._thread.join()
+        self._writer.discard()
+
+
+def validate_head(head: bytes, file_type: str, complete: bool = False, codec: str = None):
+    """
+    Parse the leading bytes of an upload (all of it when `complete`); raises
+    InvalidFile if a full load would fail on them.
+    """
+    if file_type not in STREAMABLE_TYPES or codec == "zip":
+        return
+    if codec == "gzip":
+        try:
+            head = GzipFeed().decompress(head)
+        except zlib.error as e:
+            raise InvalidFile(f"Not a valid gzip file: {e}")
+    if not head.strip():
+        if complete:
+            raise InvalidFile("File is empty")
+        return
+    sample = head
+    if not complete:
+        # Only whole lines: the head may end mid-row
+        sample = head[:head.rfind(b"\n") + 1] or head
+    try:
+        # latin1 decodes anything; encoding problems are left to the full load
+        pd.read_csv(io.BytesIO(sample), encoding='latin1')
+    except Exception as e:
+        # A quoted field may run past the end of a partial head
+        if _reject_error(e) and (complete or "EOF inside string" not in str(e)):
+            raise InvalidFile(str(e))
@@ -0,0 +1,88 @@
+import io
+import os
+from typing import Iterator, Optional
+import pandas as pd
+import pyarrow as pa
+from fastapi.responses import StreamingResponse
+from app.core.serialization import COLUMNAR_MEDIA_TYPE, dumps, encode_records
+from app.engine.columnar_store import arrow_safe_frame
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Rows serialized per batch; bounds serializer memory regardless of the limit requested
+STREAM_BATCH_ROWS = int(os.getenv("STREAM_BATCH_ROWS", "5000"))
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """
+    Pick the response format from the Accept header.
+    Returns "ndjson", "arrow", "columnar" (compact buffered JSON) or "json"
+    (the default, row-oriented buffered format).
+    """
+    if not accept:
+        return "json"
+    accept = accept.lower()
+    if COLUMNAR_MEDIA_TYPE in accept:
+        return "columnar"
+    if ARROW_STREAM_MEDIA_TYPE in accept:
+        return "arrow"
+    if NDJSON_MEDIA_TYPE in accept or "application/ndjson" in accept:
+        return "ndjson"
+    return "json"
+
+
+def _batches(df: pd.DataFrame, batch_size: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(df), batch_size):
+        yield df.iloc[start:start + batch_size]
+
+
+def iter_ndjson(df: pd.DataFrame, batch_size: int = STREAM_BATCH_ROWS) -> Iterator[bytes]:
+    for batch in _batches(df, batch_size):
+        # Same encoder as the JSON endpoints, one batch at a time
+        yield b"\n".join(dumps(row) for row in encode_records(batch)) + b"\n"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_arrow_ipc(df: pd.DataFrame, batch_size: int = STREAM_BATCH_ROWS) -> Iterator[bytes]:
+    try:
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = arrow_safe_frame(df)
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+    # Schema message first so the client can start decoding immediately
+    yield sink.drain()
+    try:
+        for batch in _batches(df, batch_size):
+            writer.write_batch(pa.RecordBatch.from_pandas(batch, schema=schema, preserve_index=False))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def streaming_response(df: pd.DataFrame, fmt: str, headers: Optional[dict] = None) -> StreamingResponse:
+    if fmt == "arrow":
+        return StreamingResponse(iter_arrow_ipc(df), media_type=ARROW_STREAM_MEDIA_TYPE, headers=headers)
+    return StreamingResponse(iter_ndjson(df), media_type=NDJSON_MEDIA_TYPE, headers=headers)
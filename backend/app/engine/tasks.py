@@ -0,0 +1,156 @@
+import os
+import uuid
+from typing import Callable, List
+from sqlalchemy.orm import Session
+from app.core.jobs import job_handler
+from app.models.data_source import DataSource
+
+# Work shared by request handlers and background jobs. Each function takes an
+# optional `progress(fraction, message)` callback.
+
+
+def _noop(fraction: float, message: str = None):
+    pass
+
+
+def _source(db: Session, job) -> DataSource:
+    data_source = db.query(DataSource).filter(DataSource.id == job.data_source_id).first()
+    if data_source is None:
+        raise ValueError(f"Data source {job.data_source_id} no longer exists")
+    return data_source
+
+
+def _publish_columnar(db: Session, data_source, result, shared: str = None) -> dict:
+    """Install a columnar copy built chunk by chunk (StreamResult) and catalog it from its sketches."""
+    from app.engine import columnar_store, upload_store
+    from app.engine.catalog import catalog_from_builder
+
+    path = columnar_store.base_path(data_source.id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(result.parquet_path, path)
+    if shared and not os.path.exists(shared):
+        upload_store.link_or_copy(path, shared)
+    return catalog_from_builder(db, data_source, result.builder)
+
+
+def _shared_columnar(data_source):
+    from app.engine import upload_store
+    from app.engine.readers import reader_options
+
+    config = data_source.connection_config or {}
+    # A sheet or record path picks part of the file: that copy is not the file's
+    if not config.get('sha256') or reader_options(config):
+        return None
+    return upload_store.columnar_blob_path(config['sha256'])
+
+
+def ingest_source(db: Session, data_source, progress: Callable = None) -> dict:
+    """
+    Parse an uploaded file once: build the columnar sidecar (so the first
+    /rows page never pays a full parse) and the metadata catalog (so /preview
+    never loads data), then queue the column profile. Large files are read
+    chunk by chunk and never held whole.
+    """
+    from app.engine import columnar_store, upload_store
+    from app.engine.catalog import is_large, refresh_catalog, schedule_profile
+    from app.engine.loader import cache_dataframe, get_cached_dataframe, iter_dataframe_chunks, load_dataframe
+    from app.engine.stream_ingest import STREAM_CHUNK_ROWS, write_chunks
+    from app.engine.versions import reader_options
+
+    progress = progress or _noop
+    file_path = (data_source.connection_config or {}).get('file_path')
+    options = reader_options(data_source)
+    shared = _shared_columnar(data_source)
+    # Identical uploads share one blob path, hence one cache entry as well
+    df = get_cached_dataframe(file_path, data_source.type, options)
+    if shared and os.path.exists(shared) and columnar_store.sidecar_version(shared) == data_source.version:
+        progress(0.1, "Reusing the columnar copy of an identical upload")
+        upload_store.link_or_copy(shared, columnar_store.base_path(data_source.id))
+        if df is None:
+            df = columnar_store.read_columns(shared, None)
+            cache_dataframe(file_path, data_source.type, df, options)
+    else:
+        if df is None and is_large(data_source):
+            progress(0.05, "Writing columnar copy from chunks")
+            path = columnar_store.base_path(data_source.id)
+            chunks = iter_dataframe_chunks(file_path, data_source.type, STREAM_CHUNK_ROWS, options)
+            result = write_chunks(chunks, f"{path}.{uuid.uuid4().hex}.tmp", data_source.version)
+            if result is not None:
+                progress(0.8, "Building catalog")
+                profile = _publish_columnar(db, data_source, result, shared)
+                return {"rows": profile["total_rows"], "columns": list(profile["column_stats"])}
+        if df is None:
+            progress(0.05, "Parsing file")
+            df = load_dataframe(file_path, data_source.type, limit=None, options=options)
+        progress(0.5, "Writing columnar copy")
+        path = columnar_store.ensure_columnar(data_source, df=df)
+        if shared and path and not os.path.exists(shared):
+            upload_store.link_or_copy(path, shared)
+    progress(0.8, "Building catalog")
+    entry = refresh_catalog(db, data_source, df)
+    schedule_profile(data_source, df)
+    return {"rows": entry.row_count, "columns": entry.column_names}
+
+
+def ingest_streamed(db: Session, data_source, result) -> dict:
+    """
+    Finish an upload that was parsed while it streamed in (StreamingIngest):
+    the columnar copy and sketches already exist, so only the catalog is
+    written. Returns the schema and basic stats for the upload response.
+    """
+    profile = _publish_columnar(db, data_source, result, _shared_columnar(data_source))
+    columns = profile["column_stats"]
+    return {
+        "schema": [{"name": name, "dtype": stats["type"]} for name, stats in columns.items()],
+        "stats": {
+            "rows": profile["total_rows"],
+            "duplicate_rows": profile["duplicate_rows"],
+            "columns": {
+                name: {"missing": stats["missing"], "missing_pct": stats["missing_pct"], "distinct": stats["distinct"]}
+                for name, stats in columns.items()
+            }
+        }
+    }
+
+
+def clean_source(db: Session, data_source, operations: List[dict], progress: Callable = None) -> dict:
+    """Apply cleaning steps to the current version as a new version."""
+    from app.engine import columnar_store
+    from app.engine.catalog import refresh_catalog, schedule_profile
+    from app.engine.cleaning import apply_operations
+    from app.engine.row_hash import get_row_index, publish_row_index
+    from app.engine.versions import create_version, load_source
+
+    progress = progress or _noop
+    # One writer per dataset. Readers keep using the current version until
+    # the new one is fully written and committed, then find it in the cache.
+    with columnar_store.writer_lock(data_source.id):
+        db.refresh(data_source)  # Another writer may have committed a newer version
+        progress(0.1, "Loading current version")
+        # The current version is never modified: the steps produce a new
+        # version that shares untouched columns with this one
+        parent_df = load_source(data_source)
+        progress(0.3, f"Applying {len(operations)} operations")
+        df, origins, row_index = apply_operations(parent_df, operations, lambda: get_row_index(data_source, parent_df))
+
+        progress(0.7, "Writing version")
+        record = create_version(db, data_source, operations, parent_df, df, origins)
+        if row_index is not None:
+            publish_row_index(data_source, row_index)
+        refresh_catalog(db, data_source, df)
+    schedule_profile(data_source, df)
+    return {
+        "message": f"Applied {len(operations)} operations",
+        "version": record.version,
+        "parent_version": record.parent_version
+    }
+
+
+@job_handler("ingest")
+def _ingest_job(db: Session, job, progress: Callable) -> dict:
+    return ingest_source(db, _source(db, job), progress)
+
+
+@job_handler("clean")
+def _clean_job(db: Session, job, progress: Callable) -> dict:
+    return clean_source(db, _source(db, job), job.params["operations"], progress)
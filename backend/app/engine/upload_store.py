@@ -0,0 +1,375 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import BinaryIO, Optional, Tuple
+from app.engine import columnar_store, compression
+
+# Content-addressed storage for uploaded files plus resumable upload sessions.
+#
+#   uploads/blobs/<sha256><ext>[.zst]  file bytes, stored once however often uploaded
+#                                      (compressed, see app.engine.compression)
+#   uploads/blobs/<sha256>.parquet     columnar copy of the root version, shared the same way
+#   uploads/blobs/.locks/<xx>.lock     lock files for blob_lock
+#   uploads/incoming/<id>.part|.json   upload session: bytes so far and its state
+#   uploads/incoming/<uuid>.staged     a finished upload waiting for stored_blob
+#
+# Hashes are computed over the bytes as sent, while they stream in; a session
+# resumed in another process rehashes its partial file once. Storing a blob
+# and releasing it take the digest's lock, and DataSource.sha256 (indexed)
+# says whether any data source still holds it.
+UPLOAD_ROOT = os.getenv("UPLOAD_DIR", "uploads")
+BLOB_DIR = os.path.join(UPLOAD_ROOT, "blobs")
+INCOMING_DIR = os.path.join(UPLOAD_ROOT, "incoming")
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(8 * 1024 * 1024)))
+# Unfinished sessions are discarded after this long
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", str(24 * 3600)))
+_COPY_BUFFER = 1024 * 1024
+
+
+def blob_path(digest: str, ext: str) -> str:
+    return os.path.join(BLOB_DIR, f"{digest}{ext.lower()}")
+
+
+def columnar_blob_path(digest: str) -> str:
+    return os.path.join(BLOB_DIR, f"{digest}.parquet")
+
+
+def is_blob(path: Optional[str]) -> bool:
+    return bool(path) and os.path.dirname(os.path.abspath(path)) == os.path.abspath(BLOB_DIR)
+
+
+def _copy_hashing(src: BinaryIO, dst: BinaryIO, hasher, tee=None) -> int:
+    written = 0
+    while True:
+        buf = src.read(_COPY_BUFFER)
+        if not buf:
+            return written
+        hasher.update(buf)
+        dst.write(buf)
+        if tee is not None:
+            tee.feed(buf)
+        written += len(buf)
+
+
+def find_blob(digest: str, ext: str) -> Optional[str]:
+    # Stored with whichever codec was configured at the time
+    for suffix in ("", ".zst", ".gz"):
+        path = blob_path(digest, ext + suffix)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _store(tmp_path: str, digest: str, ext: str, suffix: str) -> Tuple[str, bool]:
+    """Move a fully written temp file (compressed with `suffix`) into the blob store. Returns (path, reused)."""
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    existing = find_blob(digest, ext)
+    if existing is not None:
+        os.remove(tmp_path)
+        return existing, True
+    path = blob_path(digest, ext + suffix)
+    os.replace(tmp_path, path)
+    return path, False
+
+
+_blob_locks = {}
+_blob_locks_guard = threading.Lock()
+
+
+@contextmanager
+def blob_lock(digest: str):
+    """
+    Serialize storing and releasing the blob of one digest: a thread lock plus
+    an advisory file lock for other worker processes, striped over 256 lock
+    files by the first byte of the digest.
+    """
+    stripe = digest[:2]
+    with _blob_locks_guard:
+        lock = _blob_locks.setdefault(stripe, threading.Lock())
+    with lock:
+        try:
+            import fcntl
+        except ImportError:  # Windows: in-process lock only
+            yield
+            return
+        lock_dir = os.path.join(BLOB_DIR, ".locks")
+        os.makedirs(lock_dir, exist_ok=True)
+        with open(os.path.join(lock_dir, f"{stripe}.lock"), "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+@contextmanager
+def stored_blob(staged: str, suffix: str, digest: str, ext: str):
+    """
+    Move a staged upload into the blob store and yield (path, reused) under the
+    digest's lock. Commit the data source that points at the blob inside the
+    block: release_blob cannot remove the bytes in between. A blob stored by
+    this block is removed again when the block raises.
+    """
+    with blob_lock(digest):
+        path, reused = _store(staged, digest, ext, suffix)
+        try:
+            yield path, reused
+        except BaseException:
+            if not reused and os.path.exists(path):
+                os.remove(path)
+            raise
+
+
+def store_stream(fileobj: BinaryIO, ext: str, tee=None) -> Tuple[str, str, str, int]:
+    """
+    Single-request upload: stream to disk while hashing. Returns (staged, suffix,
+    sha256, size); put the staged file in place with stored_blob.
+    `tee` (a StreamingIngest) parses the same bytes as they are written; a file
+    it rejects raises before anything reaches the blob store.
+    """
+    os.makedirs(INCOMING_DIR, exist_ok=True)
+    tmp_path = os.path.join(INCOMING_DIR, f"{uuid.uuid4().hex}.part")
+    suffix = compression.storage_suffix(ext)
+    hasher = hashlib.sha256()
+    try:
+        with compression.compressing_writer(open(tmp_path, "wb"), suffix) as out:
+            size = _copy_hashing(fileobj, out, hasher, tee)
+        if tee is not None:
+            tee.finish()
+    except BaseException:
+        if tee is not None:
+            tee.abort()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return tmp_path, suffix, hasher.hexdigest(), size
+
+
+def link_or_copy(src: str, dst: str):
+    # Hard links share the bytes; fall back to a copy across filesystems
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp = f"{dst}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def release_blob(db, data_source):
+    """
+    Remove the blob of a data source being deleted (and its columnar copy)
+    unless another data source still holds the same content.
+    """
+    from app.models.data_source import DataSource
+
+    path = (data_source.connection_config or {}).get('file_path')
+    if not is_blob(path):
+        return
+    digest = os.path.basename(path).split(".")[0]
+    with blob_lock(digest):
+        still_used = db.query(DataSource.id).filter(
+            DataSource.sha256 == digest, DataSource.id != data_source.id
+        ).first() is not None
+        if still_used:
+            return
+        for target in (path, columnar_blob_path(digest)):
+            if os.path.exists(target):
+                os.remove(target)
+
+
+# --- Resumable sessions --------------------------------------------------
+
+_hashers = {}  # upload_id -> (offset, hasher) for sessions written by this process
+_session_locks = {}
+_session_locks_guard = threading.Lock()
+
+
+class UploadError(ValueError):
+    """Client-side problem with an upload session (wrong offset, size or checksum)."""
+
+
+def _state_path(upload_id: str) -> str:
+    return os.path.join(INCOMING_DIR, f"{upload_id}.json")
+
+
+def _part_path(upload_id: str) -> str:
+    return os.path.join(INCOMING_DIR, f"{upload_id}.part")
+
+
+@contextmanager
+def _session_lock(upload_id: str):
+    with _session_locks_guard:
+        lock = _session_locks.setdefault(upload_id, threading.Lock())
+    with lock:
+        try:
+            import fcntl
+        except ImportError:  # Windows: in-process lock only
+            yield
+            return
+        with open(_part_path(upload_id), "ab") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _save_state(state: dict):
+    with columnar_store.atomic_open(_state_path(state["upload_id"])) as f:
+        f.write(json.dumps(state).encode("utf-8"))
+
+
+def get_session(upload_id: str) -> Optional[dict]:
+    path = _state_path(upload_id)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _purge_expired():
+    if not os.path.isdir(INCOMING_DIR):
+        return
+    cutoff = time.time() - UPLOAD_SESSION_TTL
+    for name in os.listdir(INCOMING_DIR):
+        path = os.path.join(INCOMING_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+    # Per-session state of this process for sessions that are gone (expired, finished elsewhere)
+    for upload_id in list(_hashers):
+        if not os.path.exists(_state_path(upload_id)):
+            _hashers.pop(upload_id, None)
+    with _session_locks_guard:
+        for upload_id, lock in list(_session_locks.items()):
+            if not lock.locked() and not os.path.exists(_state_path(upload_id)):
+                del _session_locks[upload_id]
+
+
+def create_session(user_id: int, project_id: int, filename: str, file_type: str, size: Optional[int],
+                   options: dict = None) -> dict:
+    _purge_expired()
+    os.makedirs(INCOMING_DIR, exist_ok=True)
+    state = {
+        "upload_id": uuid.uuid4().hex,
+        "user_id": user_id,
+        "project_id": project_id,
+        "filename": filename,
+        "type": file_type,
+        "size": size,
+        "options": options or {},
+        "offset": 0,
+        "created_at": time.time()
+    }
+    open(_part_path(state["upload_id"]), "wb").close()
+    _save_state(state)
+    return state
+
+
+def read_head(upload_id: str, size: int) -> bytes:
+    with open(_part_path(upload_id), "rb") as f:
+        return f.read(size)
+
+
+def _resume_hasher(upload_id: str, offset: int):
+    cached = _hashers.get(upload_id)
+    if cached is not None and cached[0] == offset:
+        return cached[1]
+    # Session written by another process (or before a restart): rehash what is on disk
+    hasher = hashlib.sha256()
+    with open(_part_path(upload_id), "rb") as f:
+        remaining = offset
+        while remaining:
+            buf = f.read(min(_COPY_BUFFER, remaining))
+            if not buf:
+                break
+            hasher.update(buf)
+            remaining -= len(buf)
+    return hasher
+
+
+def write_chunk(upload_id: str, offset: int, fileobj: BinaryIO) -> dict:
+    """
+    Append one chunk at `offset`, which must equal the bytes received so far
+    (after a dropped connection, ask for the session's offset and resend from there).
+    """
+    if get_session(upload_id) is None:
+        raise KeyError(upload_id)
+    with _session_lock(upload_id):
+        state = get_session(upload_id)
+        if state is None:
+            raise KeyError(upload_id)
+        if offset != state["offset"]:
+            raise UploadError(f"Expected offset {state['offset']}, got {offset}")
+
+        # A copy: a chunk cut off midway must not leave its bytes in the cached state
+        hasher = _resume_hasher(upload_id, offset).copy()
+        part = _part_path(upload_id)
+        with open(part, "r+b") as out:
+            out.seek(offset)
+            out.truncate()  # Drop the tail of an interrupted earlier attempt
+            written = _copy_hashing(fileobj, out, hasher)
+            out.flush()
+            os.fsync(out.fileno())
+        new_offset = offset + written
+        if state["size"] is not None and new_offset > state["size"]:
+            with open(part, "r+b") as out:
+                out.truncate(offset)
+            raise UploadError(f"Chunk runs past the declared size of {state['size']} bytes")
+
+        state["offset"] = new_offset
+        _save_state(state)
+        _hashers[upload_id] = (new_offset, hasher)
+        return state
+
+
+def finish_session(upload_id: str, sha256: Optional[str] = None) -> Tuple[dict, str, str, str]:
+    """
+    Verify size and checksum and stage the bytes for the blob store.
+    Returns (state, staged, suffix, digest); put the staged file in place with stored_blob.
+    """
+    if get_session(upload_id) is None:
+        raise KeyError(upload_id)
+    with _session_lock(upload_id):
+        state = get_session(upload_id)
+        if state is None:
+            raise KeyError(upload_id)
+        if state["size"] is not None and state["offset"] != state["size"]:
+            raise UploadError(f"Upload incomplete: {state['offset']} of {state['size']} bytes received")
+        digest = _resume_hasher(upload_id, state["offset"]).hexdigest()
+        if sha256 and sha256.lower() != digest:
+            # Corrupted in transit: the bytes cannot be trusted, start over
+            abort_session(upload_id)
+            raise UploadError(f"Checksum mismatch: received content hashes to {digest}; the upload was discarded")
+        ext = compression.upload_ext(state["filename"])
+        part, suffix = _part_path(upload_id), compression.storage_suffix(ext)
+        if suffix and find_blob(digest, ext) is None:
+            # Chunks land uncompressed (they are appended at offsets); compress once, at the end
+            packed = f"{part}{suffix}"
+            with open(part, "rb") as src, compression.compressing_writer(open(packed, "wb"), suffix) as out:
+                shutil.copyfileobj(src, out, _COPY_BUFFER)
+            os.remove(part)
+            part = packed
+        else:
+            # Left as received: the blob is already stored (or nothing is compressed)
+            suffix = ""
+        staged = os.path.join(INCOMING_DIR, f"{uuid.uuid4().hex}.staged")
+        os.replace(part, staged)  # Out of the session: abort or expiry no longer touches it
+        os.remove(_state_path(upload_id))
+        _hashers.pop(upload_id, None)
+    return state, staged, suffix, digest
+
+
+def abort_session(upload_id: str):
+    _hashers.pop(upload_id, None)
+    for path in (_part_path(upload_id), _state_path(upload_id)):
+        if os.path.exists(path):
+            os.remove(path)
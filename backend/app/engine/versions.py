@@ -0,0 +1,441 @@
+from typing import List, Optional, Tuple
+import pandas as pd
+from sqlalchemy.orm import Session, object_session
+from app.engine import columnar_store
+from app.models.dataset_version import DatasetVersion
+
+# Non-destructive cleaning, appends and SQL refreshes. The raw upload is never
+# rewritten: each /clean, /append or scheduled refresh creates a new
+# DataSource.version whose DatasetVersion row records the parent and the
+# operations applied to it. The result is materialized as per-column Parquet
+# files; columns a step did not touch point at the parent's file.
+# A version whose files are missing is rebuilt by replaying its log from the
+# nearest materialized ancestor (ultimately the raw upload).
+
+
+def _cache_key(source_id: int, version: int) -> str:
+    return f"ds_{source_id}_v{version}"
+
+
+def _raw_source(data_source):
+    config = data_source.connection_config or {}
+    return config if data_source.type in ['postgres', 'mysql'] else config.get('file_path')
+
+
+def reader_options(data_source) -> dict:
+    from app.engine.readers import reader_options as _options
+    return _options(data_source.connection_config)
+
+
+def _record(data_source, version: int) -> Optional[DatasetVersion]:
+    db = object_session(data_source)
+    if db is None:
+        return None
+    return db.query(DatasetVersion).filter(
+        DatasetVersion.data_source_id == data_source.id, DatasetVersion.version == version
+    ).first()
+
+
+def _lineage(data_source, version: int):
+    """(parent_version, operations, manifest) of a version; parent is None for the raw upload."""
+    manifest = columnar_store.read_manifest(data_source.id, version)
+    if manifest is not None:
+        return manifest.get("parent"), manifest.get("operations") or [], manifest
+    record = _record(data_source, version)
+    if record is not None:
+        return record.parent_version, record.operations or [], None
+    # Versions from before the log existed (or SQL sources) are the source itself
+    return None, [], None
+
+
+def is_derived(data_source, version: int = None) -> bool:
+    parent, _, _ = _lineage(data_source, data_source.version if version is None else version)
+    return parent is not None
+
+
+def get_cached_source(data_source) -> Optional[pd.DataFrame]:
+    """Peek at the in-memory frame of the current version without loading it."""
+    from app.core.memory_cache import df_cache
+    from app.engine.loader import get_cached_dataframe
+
+    df = df_cache.get(_cache_key(data_source.id, data_source.version))
+    if df is not None or is_derived(data_source):
+        return df
+    return get_cached_dataframe(_raw_source(data_source), data_source.type, reader_options(data_source))
+
+
+def load_version(data_source, version: int) -> pd.DataFrame:
+    from app.core.memory_cache import df_cache
+    from app.engine.loader import load_dataframe
+
+    parent, operations, manifest = _lineage(data_source, version)
+    if parent is None and not columnar_store.has_columns(data_source.id, manifest):
+        # Only an unmaterialized root goes back to the source (re-running the query for SQL)
+        return load_dataframe(_raw_source(data_source), data_source.type, limit=None, options=reader_options(data_source))
+
+    key = _cache_key(data_source.id, version)
+    df = df_cache.get(key)
+    if df is not None:
+        return df
+
+    if columnar_store.has_columns(data_source.id, manifest):
+        df = columnar_store.read_version(data_source.id, manifest)
+    else:
+        # Lazy replay: rebuild from the parent and store the result again
+        print(f"Replaying version {version} of data source {data_source.id} from version {parent}")
+        parent_df = load_version(data_source, parent)
+        df, origins = _replay(data_source, parent_df, operations)
+        _materialize(data_source, version, parent, operations, df, origins, parent_df)
+    df_cache.set(key, df)
+    return df
+
+
+def load_source(data_source, limit: int = None) -> pd.DataFrame:
+    """Frame of the source's current version: the raw upload, a SQL result or a cleaned version."""
+    df = load_version(data_source, data_source.version)
+    return df.head(limit) if limit else df
+
+
+def sample_source(data_source, rows: int) -> tuple:
+    """
+    Up to `rows` rows of the current version for estimates, read as cheaply
+    as possible: the cached frame, spread-out row groups of the Parquet
+    sidecar, or the first chunk of the raw file. Returns (frame, method).
+    """
+    from app.engine.loader import iter_dataframe_chunks
+
+    def _random(df):
+        if len(df) <= rows:
+            return df, "full"
+        return df.sample(n=rows, random_state=0).sort_index().reset_index(drop=True), "random"
+
+    cached = get_cached_source(data_source)
+    if cached is not None:
+        return _random(cached)
+    if columnar_store.is_fresh(data_source):
+        df, total = columnar_store.sample_row_groups(columnar_store.base_path(data_source.id), rows)
+        return df, "full" if len(df) >= total else "row_groups"
+    if not is_derived(data_source) and data_source.type in columnar_store.FILE_TYPES:
+        # Raw file with no sidecar yet: the leading chunk, parsed incrementally
+        file_path = data_source.connection_config.get('file_path')
+        chunks = iter_dataframe_chunks(file_path, data_source.type, rows, reader_options(data_source))
+        head = next(iter(chunks), pd.DataFrame())
+        return head, "head"
+    return _random(load_source(data_source))
+
+
+def _materialize(data_source, version: int, parent: Optional[int], operations: list,
+                 df: pd.DataFrame, origins: dict = None, parent_df: pd.DataFrame = None) -> dict:
+    """Write the manifest for `version`, storing only columns that differ from the parent."""
+    shared = {}
+    if parent is not None:
+        parent_manifest = columnar_store.read_manifest(data_source.id, parent)
+        if not columnar_store.has_columns(data_source.id, parent_manifest) and parent_df is not None:
+            # First derivation from this parent: store its columns so children can share them
+            parent_manifest = _materialize(data_source, parent, *_lineage(data_source, parent)[:2], parent_df)
+        if columnar_store.has_columns(data_source.id, parent_manifest):
+            shared = {entry["name"]: columnar_store.column_files(entry) for entry in parent_manifest["columns"]}
+
+    columns = []
+    for col in df.columns:
+        origin = (origins or {}).get(str(col))
+        if origin is not None and origin in shared:
+            columns.append({"name": str(col), "files": shared[origin]})
+        else:
+            columns.append({"name": str(col), "files": [columnar_store.write_column(data_source.id, df[col])]})
+
+    manifest = {"parent": parent, "operations": operations, "rows": len(df), "columns": columns}
+    columnar_store.write_manifest(data_source.id, version, manifest)
+    return manifest
+
+
+def _ensure_root(db: Session, data_source, rows: int, columns: list):
+    # The first derived version records the version it started from as the root
+    if _record(data_source, data_source.version) is not None:
+        return
+    parent, operations, _ = _lineage(data_source, data_source.version)
+    db.add(DatasetVersion(
+        data_source_id=data_source.id,
+        version=data_source.version,
+        parent_version=parent,
+        operations=operations,
+        row_count=rows,
+        column_names=[str(c) for c in columns]
+    ))
+
+
+def _next_version(db: Session, data_source) -> int:
+    return max([v.version for v in list_versions(db, data_source)] + [data_source.version]) + 1
+
+
+def _commit_version(db: Session, data_source, version: int, operations: list, rows: int, columns: list,
+                    df: Optional[pd.DataFrame]) -> DatasetVersion:
+    from app.core.memory_cache import df_cache
+
+    record = DatasetVersion(
+        data_source_id=data_source.id,
+        version=version,
+        parent_version=data_source.version,
+        operations=operations,
+        row_count=rows,
+        column_names=[str(c) for c in columns]
+    )
+    db.add(record)
+    data_source.version = version
+    # Warm before the commit so no reader ever sees the new version cold
+    key = _cache_key(data_source.id, version)
+    if df is not None:
+        df_cache.set(key, df)
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        df_cache.invalidate(key)  # The number will be reused by the next attempt
+        raise
+    return record
+
+
+def create_version(db: Session, data_source, operations: list, parent_df: pd.DataFrame,
+                   df: pd.DataFrame, origins: dict) -> DatasetVersion:
+    """
+    Record `df` (the result of `operations` on the current version) as a new
+    version, make it current and warm it into the cache.
+    """
+    parent = data_source.version
+    _ensure_root(db, data_source, len(parent_df), list(parent_df.columns))
+    version = _next_version(db, data_source)
+    _materialize(data_source, version, parent, operations, df, origins, parent_df)
+    return _commit_version(db, data_source, version, operations, len(df), list(df.columns), df)
+
+
+def align_batch(batch: pd.DataFrame, columns: List[str], dtypes: dict) -> pd.DataFrame:
+    """
+    Reorder and cast an appended batch to the current schema (column names
+    and catalog dtypes). Raises ValueError listing every mismatch.
+    """
+    batch = batch.copy(deep=False)
+    batch.columns = [str(c) for c in batch.columns]
+    missing = [c for c in columns if c not in batch.columns]
+    unexpected = [c for c in batch.columns if c not in columns]
+    if missing or unexpected:
+        raise ValueError(f"Schema mismatch. Missing columns: {missing or 'none'}; unexpected columns: {unexpected or 'none'}")
+    batch = batch[columns]
+
+    problems = []
+    for col in columns:
+        series = batch[col]
+        try:
+            target = pd.api.types.pandas_dtype(dtypes.get(col))
+        except TypeError:
+            continue
+        if series.dtype == target:
+            continue
+        present = series.notna()
+        if pd.api.types.is_bool_dtype(target):
+            converted = series
+            invalid = present & ~series.isin([True, False])
+        elif pd.api.types.is_numeric_dtype(target):
+            converted = pd.to_numeric(series, errors='coerce')
+            invalid = present & converted.isna()
+            if not converted.isna().any():
+                converted = converted.astype(target)
+        elif pd.api.types.is_datetime64_any_dtype(target):
+            converted = pd.to_datetime(series, errors='coerce')
+            invalid = present & converted.isna()
+        else:
+            # Text columns: values keep their text form, nulls stay null
+            converted = series.where(~present, series.astype(str))
+            invalid = pd.Series(False, index=series.index)
+        if invalid.any():
+            problems.append(f"{col}: {int(invalid.sum())} values are not {target}")
+        else:
+            batch[col] = converted
+    if problems:
+        raise ValueError("Type mismatch. " + "; ".join(problems))
+    return batch.reset_index(drop=True)
+
+
+def _link_root(data_source, version: int) -> Optional[dict]:
+    """
+    Manifest of an upload's version made of the columns of its Parquet sidecar,
+    so the first append neither re-parses nor rewrites the existing rows.
+    None when the version is derived or the sidecar does not hold it.
+    """
+    if is_derived(data_source, version) or version != data_source.version or not columnar_store.is_fresh(data_source):
+        return None
+    segments = columnar_store.link_sidecar(data_source.id)
+    if segments is None:
+        return None
+    manifest = {
+        "parent": None, "operations": [],
+        "rows": columnar_store.row_count(columnar_store.base_path(data_source.id)),
+        "columns": [{"name": name, "files": [segment]} for name, segment in segments]
+    }
+    columnar_store.write_manifest(data_source.id, version, manifest)
+    return manifest
+
+
+def _write_segments(data_source, batch: pd.DataFrame) -> dict:
+    return {str(col): columnar_store.write_column(data_source.id, batch[col]) for col in batch.columns}
+
+
+def append_rows(db: Session, data_source, batch: pd.DataFrame,
+                operation: dict = None) -> Tuple[DatasetVersion, Optional[pd.DataFrame]]:
+    """
+    Record current version + `batch` (already aligned to the current schema)
+    as a new version. Only the batch is written: every column gains one
+    segment, and trailing segments are merged as they pile up (see
+    columnar_store). The cached frame, when present, is extended rather than reloaded.
+    `operation` overrides the logged step (default: an "append").
+    Returns (record, new frame or None when the parent was not in memory).
+    """
+    parent = data_source.version
+    parent_df = get_cached_source(data_source)
+    manifest = columnar_store.read_manifest(data_source.id, parent)
+    if not columnar_store.has_columns(data_source.id, manifest):
+        manifest = _link_root(data_source, parent)
+    if manifest is None:
+        # Once per lineage: the raw upload has no column segments to extend yet
+        if parent_df is None:
+            parent_df = load_source(data_source)
+        parent_ops = _lineage(data_source, parent)
+        manifest = _materialize(data_source, parent, parent_ops[0], parent_ops[1], parent_df)
+    _ensure_root(db, data_source, manifest["rows"], [entry["name"] for entry in manifest["columns"]])
+
+    segments = _write_segments(data_source, batch)
+    operation = operation or {"type": "append", "params": {}}
+    operations = [{"type": operation["type"], "params": {**operation["params"], "rows": len(batch), "segments": segments}}]
+    columns = [
+        {"name": entry["name"],
+         "files": columnar_store.compact_segments(data_source.id, columnar_store.column_files(entry) + [segments[entry["name"]]])}
+        for entry in manifest["columns"]
+    ]
+    rows = manifest["rows"] + len(batch)
+    version = _next_version(db, data_source)
+    columnar_store.write_manifest(data_source.id, version, {
+        "parent": parent, "operations": operations, "rows": rows, "columns": columns
+    })
+
+    df = pd.concat([parent_df, batch], ignore_index=True) if parent_df is not None else None
+    record = _commit_version(db, data_source, version, operations, rows, [entry["name"] for entry in columns], df)
+    return record, df
+
+
+def merge_rows(parent_df: pd.DataFrame, batch: pd.DataFrame, mode: str = "append", key: str = None) -> pd.DataFrame:
+    """
+    Combine a version with fetched rows: "append" adds them, "upsert" replaces
+    rows with the same `key` and adds the rest, "replace" keeps only the batch.
+    """
+    if mode == "replace":
+        return batch.reset_index(drop=True)
+    batch = batch[list(parent_df.columns)]
+    if mode == "upsert":
+        batch = batch.drop_duplicates(subset=[key], keep="last")
+        parent_df = parent_df[~parent_df[key].isin(batch[key])]
+    return pd.concat([parent_df, batch], ignore_index=True)
+
+
+def refresh_rows(db: Session, data_source, batch: pd.DataFrame,
+                 params: dict) -> Tuple[DatasetVersion, Optional[pd.DataFrame]]:
+    """
+    Record rows fetched from a SQL source (already aligned to the current
+    schema) as a new version. `params` carries the mode (see merge_rows) and
+    the watermark; the fetched rows are kept as segments so the version can be
+    replayed. Appends only add segments; upserts and replacements rewrite
+    the columns. Returns (record, new frame or None when not in memory).
+    """
+    mode = params.get("mode", "append")
+    if mode == "append":
+        return append_rows(db, data_source, batch, {"type": "refresh", "params": params})
+
+    parent = data_source.version
+    parent_df = get_cached_source(data_source)
+    if parent_df is None and mode == "upsert":
+        parent_df = load_source(data_source)
+    if parent_df is not None:
+        _ensure_root(db, data_source, len(parent_df), list(parent_df.columns))
+    else:
+        manifest = columnar_store.read_manifest(data_source.id, parent) or {}
+        _ensure_root(db, data_source, manifest.get("rows"), [entry["name"] for entry in manifest.get("columns") or []])
+
+    segments = _write_segments(data_source, batch)
+    operations = [{"type": "refresh", "params": {**params, "rows": len(batch), "segments": segments}}]
+    df = merge_rows(parent_df, batch, mode, params.get("key")) if parent_df is not None else batch.reset_index(drop=True)
+    version = _next_version(db, data_source)
+    if mode == "replace":
+        # The fetched rows are the version: its columns are the segments themselves
+        columnar_store.write_manifest(data_source.id, version, {
+            "parent": parent, "operations": operations, "rows": len(df),
+            "columns": [{"name": name, "files": [file]} for name, file in segments.items()]
+        })
+    else:
+        _materialize(data_source, version, parent, operations, df, None, parent_df)
+    record = _commit_version(db, data_source, version, operations, len(df), list(df.columns), df)
+    return record, df
+
+
+def _replay(data_source, parent_df: pd.DataFrame, operations: list):
+    from app.engine.cleaning import apply_operations
+
+    if operations and operations[0]["type"] in ("append", "refresh"):
+        # Appended or fetched rows survive as their own segments
+        params = operations[0]["params"]
+        batch = pd.DataFrame({name: columnar_store.read_column(data_source.id, file) for name, file in params["segments"].items()})
+        return merge_rows(parent_df, batch, params.get("mode", "append"), params.get("key")), None
+    df, origins, _ = apply_operations(parent_df, operations)
+    return df, origins
+
+
+def iter_operations(data_source):
+    """Operations that produced the current version, newest first, back to the root."""
+    version = data_source.version
+    while version is not None:
+        parent, operations, _ = _lineage(data_source, version)
+        yield from reversed(operations)
+        version = parent
+
+
+def list_versions(db: Session, data_source) -> List[DatasetVersion]:
+    return db.query(DatasetVersion).filter(DatasetVersion.data_source_id == data_source.id).order_by(DatasetVersion.version).all()
+
+
+def _is_refresh(record: DatasetVersion) -> bool:
+    return bool(record.operations) and record.operations[0]["type"] == "refresh"
+
+
+def prune_refreshes(db: Session, data_source, keep: int) -> List[int]:
+    """
+    Drop refresh versions older than the `keep` newest ones, with the column
+    files only they used; `keep` <= 0 keeps them all. The current version and
+    versions a cleaning step or append branched from are kept. The oldest kept
+    version reads from its own files, so nothing is replayed from a dropped one.
+    Returns the dropped version numbers. Call under the writer lock.
+    """
+    from app.core.memory_cache import df_cache
+
+    if keep <= 0:
+        return []
+    records = list_versions(db, data_source)
+    refreshes = [r for r in records if _is_refresh(r)]
+    branched = {r.parent_version for r in records if not _is_refresh(r)}
+    doomed = [r for r in refreshes[:-keep] if r.version != data_source.version and r.version not in branched]
+    if not doomed:
+        return []
+    for record in doomed:
+        db.delete(record)
+    db.commit()
+    versions = [r.version for r in doomed]
+    columnar_store.remove_versions(data_source.id, versions)
+    for version in versions:
+        df_cache.invalidate(_cache_key(data_source.id, version))
+    print(f"Dropped refresh versions {versions} of data source {data_source.id}")
+    return versions
+
+
+def checkout(db: Session, data_source, version: int) -> pd.DataFrame:
+    """Make an earlier (or later) recorded version current again; nothing is re-uploaded."""
+    if _record(data_source, version) is None:
+        raise KeyError(version)
+    data_source.version = version
+    db.commit()
+    return load_source(data_source)
@@ -10,7 +10,7 @@ import os
 # Load environment variables
 load_dotenv()
 
-from app.api.v1 import auth, projects, query, data_sources, ai, analysis, monitoring, users, dashboards
+from app.api.v1 import auth, projects, query, data_sources, ai, analysis, monitoring, users, dashboards, jobs
 
 limiter = Limiter(key_func=get_remote_address, default_limits=["200/minute"])
 app = FastAPI(title="Analytics Platform API")
@@ -54,6 +54,21 @@ app.include_router(ai.router, prefix="/api/v1/ai", tags=["AI Insights"])
 app.include_router(monitoring.router, prefix="/api/v1/monitoring", tags=["Monitoring"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(dashboards.router, prefix="/api/v1/dashboards", tags=["Dashboards"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["Jobs"])
+
+@app.on_event("startup")
+def start_background_work():
+    from app.core.jobs import recover_jobs
+    from app.engine.refresher import refresher
+    recover_jobs()
+    refresher.start()
+
+@app.on_event("shutdown")
+def shutdown_execution_lanes():
+    from app.engine.refresher import refresher
+    from app.core.scheduler import scheduler
+    refresher.stop()
+    scheduler.shutdown()
 
 @app.get("/")
 def read_root():
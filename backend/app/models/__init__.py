@@ -1,3 +1,6 @@
 from .project import Project
 from .data_source import DataSource
 from .dashboard import Dashboard, Widget
+from .catalog import DatasetCatalog
+from .dataset_version import DatasetVersion
+from .job import Job
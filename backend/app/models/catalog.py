@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, BigInteger, ForeignKey, JSON, DateTime
+from sqlalchemy.orm import relationship, backref
+from datetime import datetime
+from app.core.database import Base
+
+class DatasetCatalog(Base):
+    __tablename__ = "dataset_catalog"
+
+    id = Column(Integer, primary_key=True, index=True)
+    data_source_id = Column(Integer, ForeignKey("data_sources.id", ondelete="CASCADE"), unique=True, index=True)
+    row_count = Column(BigInteger)
+    column_names = Column(JSON) # ordered list of column names
+    dtypes = Column(JSON) # { column: dtype string }
+    byte_size = Column(BigInteger) # raw file size, or in-memory size for SQL sources
+    head_sample = Column(JSON) # first rows, JSON-safe records
+    profile = Column(JSON) # canonical column profile (the /statistics payload)
+    profile_version = Column(Integer) # DataSource.version the profile was computed for
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    data_source = relationship("DataSource", backref=backref("catalog", uselist=False, cascade="all, delete-orphan"))
@@ -10,5 +10,7 @@ class DataSource(Base):
     type = Column(String) # postgres, csv, etc
     connection_config = Column(JSON)
     refresh_schedule = Column(String, nullable=True)
+    version = Column(Integer, default=1, server_default="1", nullable=False) # bumped whenever the data changes
+    sha256 = Column(String, nullable=True, index=True) # content digest of an uploaded file; blobs are shared by digest
 
     project = relationship("Project", backref="data_sources")
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, BigInteger, ForeignKey, JSON, DateTime, UniqueConstraint
+from sqlalchemy.orm import relationship, backref
+from datetime import datetime
+from app.core.database import Base
+
+class DatasetVersion(Base):
+    __tablename__ = "dataset_versions"
+    __table_args__ = (UniqueConstraint("data_source_id", "version", name="uq_dataset_versions_source_version"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    data_source_id = Column(Integer, ForeignKey("data_sources.id", ondelete="CASCADE"), index=True)
+    version = Column(Integer, nullable=False) # DataSource.version this entry materializes
+    parent_version = Column(Integer, nullable=True) # None for the raw upload
+    operations = Column(JSON) # cleaning steps applied to the parent, in order
+    row_count = Column(BigInteger)
+    column_names = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    data_source = relationship("DataSource", backref=backref("versions", cascade="all, delete-orphan", order_by="DatasetVersion.version"))
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, JSON, DateTime, Text, Index, text
+from sqlalchemy.orm import relationship, backref
+from datetime import datetime
+from app.core.database import Base
+
+class Job(Base):
+    __tablename__ = "jobs"
+    # At most one pending/running job per dedupe key, enforced by the database
+    __table_args__ = (Index(
+        "uq_jobs_active_dedupe_key", "dedupe_key", unique=True,
+        sqlite_where=text("status IN ('pending', 'running')"),
+        postgresql_where=text("status IN ('pending', 'running')")
+    ),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    data_source_id = Column(Integer, ForeignKey("data_sources.id", ondelete="CASCADE"), nullable=True, index=True)
+    type = Column(String, nullable=False) # ingest, clean, ...
+    status = Column(String, default="pending", nullable=False, index=True) # pending, running, succeeded, failed
+    params = Column(JSON)
+    dedupe_key = Column(String, index=True) # identical pending/running jobs share one row
+    progress = Column(Float, default=0.0)
+    message = Column(String, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    worker = Column(String, nullable=True) # host:pid of the process running it
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    data_source = relationship("DataSource", backref=backref("jobs", cascade="all, delete-orphan", passive_deletes=True))
@@ -0,0 +1,50 @@
+"""
+Serial compute_statistics vs column-partitioned profiling across a process
+pool, on a wide frame, for a range of worker counts.
+
+Run from backend/:  python -m benchmarks.bench_parallel_profile
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+import pandas as pd
+from app.engine import parallel_profile
+from app.engine.statistics import compute_statistics
+
+
+def make_frame(rows: int, numeric: int, text: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    columns = {}
+    for i in range(numeric):
+        values = rng.normal(size=rows)
+        values[rng.random(rows) < 0.05] = np.nan
+        columns[f"num_{i}"] = values
+    for i in range(text):
+        columns[f"cat_{i}"] = rng.choice(["North", "South", "East", "West", None], size=rows)
+    return pd.DataFrame(columns)
+
+
+def best_of(fn, repeat=3) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    df = make_frame(rows=200_000, numeric=96, text=32)
+    print(f"{df.shape[0]} rows x {df.shape[1]} columns, {os.cpu_count()} CPUs")
+    serial = best_of(lambda: compute_statistics(df, parallel=False))
+    print(f"serial     {serial * 1000:8.1f} ms")
+
+    context = multiprocessing.get_context("forkserver")
+    for workers in (1, 2, 4, 8):
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            parallel_profile._pool = lambda: pool
+            compute_statistics(df, parallel=True)  # Warm up the workers
+            elapsed = best_of(lambda: compute_statistics(df, parallel=True))
+        print(f"{workers} workers  {elapsed * 1000:8.1f} ms  speedup {serial / elapsed:5.1f}x")
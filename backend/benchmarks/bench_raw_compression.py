@@ -0,0 +1,77 @@
+"""
+Cold-load throughput of raw uploads stored uncompressed, zstd- and
+gzip-compressed, for CSV and JSON. The page cache is dropped for each file
+before every load, so the disk read is part of the timing.
+
+Run from backend/:  python -m benchmarks.bench_raw_compression
+"""
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from app.engine import compression
+from app.engine.loader import load_dataframe
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    return pd.DataFrame({
+        "id": np.arange(rows),
+        "amount": rng.normal(100, 25, size=rows).round(2),
+        "quantity": rng.integers(1, 50, size=rows),
+        "region": rng.choice(["North", "South", "East", "West"], size=rows),
+        "status": rng.choice(["open", "closed", "pending", None], size=rows),
+        "created": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365 * 86400, size=rows), unit="s"),
+    })
+
+
+def write_raw(plain: str, suffix: str) -> str:
+    path = plain + suffix
+    with open(plain, "rb") as src, compression.compressing_writer(open(path, "wb"), suffix) as out:
+        shutil.copyfileobj(src, out, 1024 * 1024)
+    return path
+
+
+def drop_cache(path: str):
+    # Cold read: the bytes have to come from the disk again
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def best_of(fn, path: str, repeat=3) -> float:
+    timings = []
+    for _ in range(repeat):
+        drop_cache(path)
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    df = make_frame(rows=1_000_000)
+    work_dir = tempfile.mkdtemp(prefix="bench_raw_")
+    try:
+        for file_type, ext, write in (
+            ("csv", ".csv", lambda path: df.to_csv(path, index=False)),
+            ("json", ".json", lambda path: df.to_json(path, orient="records", lines=True, date_format="iso")),
+        ):
+            plain = os.path.join(work_dir, f"data{ext}")
+            write(plain)
+            size = os.path.getsize(plain)
+            print(f"{file_type}: {len(df)} rows, {size / 1e6:.1f} MB uncompressed")
+            baseline = None
+            for label, suffix in (("none", ""), ("zstd", ".zst"), ("gzip", ".gz")):
+                path = write_raw(plain, suffix) if suffix else plain
+                elapsed = best_of(lambda: load_dataframe(path, file_type, limit=None, cache=False), path)
+                baseline = baseline or elapsed
+                print(f"  {label:5s} {os.path.getsize(path) / 1e6:8.1f} MB  ratio {size / os.path.getsize(path):5.2f}x"
+                      f"  {elapsed * 1000:8.1f} ms  {size / 1e6 / elapsed:7.1f} MB/s  vs none {baseline / elapsed:5.2f}x")
+    finally:
+        shutil.rmtree(work_dir)
@@ -1,5 +1,5 @@
 from app.core.database import engine, Base
-from app.models import Dashboard, Widget, User, Project, DataSource
+from app.models import Dashboard, Widget, User, Project, DataSource, DatasetCatalog, DatasetVersion, Job
 
 def create_tables():
     print("Creating all tables...")
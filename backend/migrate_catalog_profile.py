@@ -0,0 +1,19 @@
+from sqlalchemy import text
+from app.core.database import engine
+
+def migrate():
+    with engine.connect() as conn:
+        for statement in (
+            "ALTER TABLE dataset_catalog ADD COLUMN profile JSON",
+            "ALTER TABLE dataset_catalog ADD COLUMN profile_version INTEGER",
+        ):
+            try:
+                conn.execute(text(statement))
+                conn.commit()
+                print(f"Applied: {statement}")
+            except Exception as e:
+                print(f"Migration result: {e}")
+                # Likely "duplicate column name" if already exists
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,28 @@
+import json
+from sqlalchemy import text
+from app.core.database import engine
+
+def migrate():
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("ALTER TABLE data_sources ADD COLUMN sha256 VARCHAR"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_data_sources_sha256 ON data_sources (sha256)"))
+            conn.commit()
+            print("Successfully added sha256 column.")
+        except Exception as e:
+            print(f"Migration result: {e}")
+            # Likely "duplicate column name" if already exists
+            conn.rollback()
+
+        # Uploads so far keep their digest in connection_config
+        rows = conn.execute(text("SELECT id, connection_config FROM data_sources WHERE sha256 IS NULL")).fetchall()
+        for id, config in rows:
+            if isinstance(config, str):
+                config = json.loads(config)
+            digest = (config or {}).get("sha256")
+            if digest:
+                conn.execute(text("UPDATE data_sources SET sha256 = :digest WHERE id = :id"), {"digest": digest, "id": id})
+        conn.commit()
+
+if __name__ == "__main__":
+    migrate()
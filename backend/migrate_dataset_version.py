@@ -0,0 +1,16 @@
+from sqlalchemy import text
+from app.core.database import engine
+
+def migrate():
+    with engine.connect() as conn:
+        try:
+            # Existing sources start at version 1
+            conn.execute(text("ALTER TABLE data_sources ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+            conn.commit()
+            print("Successfully added version column.")
+        except Exception as e:
+            print(f"Migration result: {e}")
+            # Likely "duplicate column name" if already exists
+
+if __name__ == "__main__":
+    migrate()
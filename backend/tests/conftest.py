@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core import database
+from app.models import analysis, user  # noqa: F401  (every mapped table)
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    """In-memory metadata DB, also behind SessionLocal for code that opens its own sessions."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    database.Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    monkeypatch.setattr(database, "SessionLocal", factory)
+    return factory
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(session_factory, tmp_path, monkeypatch):
+    """API client on the in-memory DB; uploads and columnar files go under tmp_path."""
+    from fastapi.testclient import TestClient
+    from app.core.memory_cache import df_cache, result_cache
+    from app.main import app
+
+    monkeypatch.chdir(tmp_path)
+
+    def get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[database.get_db] = get_db
+    # Every test's DB numbers its sources from 1: cached frames and results must not carry over
+    df_cache.clear()
+    result_cache.clear()
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        df_cache.clear()
+        result_cache.clear()
+
+
+@pytest.fixture
+def auth(client) -> dict:
+    """Headers of a signed-up user and the id of their project."""
+    credentials = {"email": "owner@example.com", "password": "Passw0rd!x"}
+    client.post("/api/v1/auth/signup", json={**credentials, "first_name": "Owner"})
+    token = client.post("/api/v1/auth/login", json=credentials).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    project = client.post("/api/v1/projects/", json={"name": "tests"}, headers=headers).json()
+    return {"headers": headers, "project_id": project["id"]}
+
+
+@pytest.fixture
+def upload(client, auth):
+    """upload(filename, content) -> id of the new data source."""
+    def _upload(filename: str, content) -> int:
+        response = client.post("/api/v1/data-sources/upload", files={"file": (filename, content)},
+                               data={"project_id": auth["project_id"]}, headers=auth["headers"])
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+    return _upload
@@ -0,0 +1,16 @@
+import pandas as pd
+from app.core.serialization import encode_records
+from app.engine.catalog import _json_records
+
+
+def test_head_sample_matches_the_preview_encoding():
+    df = pd.DataFrame({
+        "tiny": [1e-12, 123456789.123456789, float("nan")],
+        "when": pd.to_datetime(["2024-01-01 00:00:00", "2024-01-02 03:04:05", None]),
+        "n": pd.array([1, None, 3], dtype="Int64"),
+        "s": ["a", None, "c"],
+    })
+    stored = _json_records(df)
+    assert stored == encode_records(df)
+    assert stored[0]["tiny"] == 1e-12
+    assert stored[1]["when"] == "2024-01-02T03:04:05"
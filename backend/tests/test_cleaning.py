@@ -0,0 +1,16 @@
+CSV = "a,b\n1,x\n2,\n2,\n"
+
+
+def test_unknown_operation_is_rejected_before_a_version_is_written(client, auth, upload):
+    source_id = upload("t.csv", CSV)
+    headers = auth["headers"]
+    for dry_run in (True, False):
+        response = client.post(f"/api/v1/data-sources/{source_id}/clean", headers=headers, json={
+            "operations": [{"type": "drop_duplicates", "params": {}}, {"type": "dropna", "params": {}}],
+            "dry_run": dry_run
+        })
+        assert response.status_code == 400
+        assert "dropna" in response.json()["detail"]
+    versions = client.get(f"/api/v1/data-sources/{source_id}/versions", headers=headers).json()
+    assert versions["current_version"] == 1
+    assert all(v["version"] == 1 for v in versions["versions"])
@@ -0,0 +1,63 @@
+from app.engine import catalog
+
+
+def post_clean(client, auth, source_id, operations, **options) -> dict:
+    response = client.post(f"/api/v1/data-sources/{source_id}/clean", headers=auth["headers"],
+                           json={"operations": operations, **options})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def current_rows(client, auth, source_id, end: int = 100) -> dict:
+    response = client.get(f"/api/v1/data-sources/{source_id}/rows?end={end}", headers=auth["headers"])
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_dry_run_over_the_whole_dataset_matches_the_apply(client, auth, upload, monkeypatch):
+    monkeypatch.setattr(catalog, "schedule_profile", lambda *args, **kwargs: None)
+    source_id = upload("t.csv", "a,b,c\n1,x,1.0\n1,x,1.0\n2,,2.0\n3,z,\n4,w,5.0\n3,z,\n")
+    operations = [
+        {"type": "drop_duplicates", "params": {}},
+        {"type": "drop_na", "params": {"columns": ["b"]}},
+        {"type": "fill_na", "params": {"columns": ["c"], "method": "mean"}},
+        {"type": "rename_col", "params": {"mapper": {"a": "id"}}},
+    ]
+    estimate = post_clean(client, auth, source_id, operations, dry_run=True)
+    assert estimate["exact"] is True
+    assert [step["projected"]["rows_removed"] for step in estimate["steps"]] == [2, 1, 0, 0]
+    assert estimate["steps"][2]["projected"]["values_filled"] == {"c": 1}
+
+    # The dry run wrote nothing; the apply produces exactly what it previewed
+    assert current_rows(client, auth, source_id)["total_rows"] == 6
+    assert post_clean(client, auth, source_id, operations)["version"] == 2
+    applied = current_rows(client, auth, source_id)
+    assert applied["total_rows"] == estimate["projected_rows_after"] == 3
+    assert list(applied["rows"][0]) == estimate["columns_after"] == ["id", "b", "c"]
+    assert applied["rows"] == estimate["preview"]
+
+
+def test_sampled_dry_run_projects_onto_the_full_dataset(client, auth, upload, monkeypatch, session_factory):
+    from app.models.data_source import DataSource
+    monkeypatch.setattr(catalog, "schedule_profile", lambda *args, **kwargs: None)
+    # 5000 rows, 1000 distinct; b is missing on a fifth of them
+    lines = "".join(f"{i % 1000},{'' if i % 5 == 0 else 'v'}\n" for i in range(5000))
+    source_id = upload("t.csv", "a,b\n" + lines)
+    # What the background profile does: it leaves the row-hash index behind
+    db = session_factory()
+    data_source = db.get(DataSource, source_id)
+    catalog.refresh_profile(db, data_source, catalog._load_full(data_source))
+    db.close()
+
+    dedupe = [{"type": "drop_duplicates", "params": {}}]
+    estimate = post_clean(client, auth, source_id, dedupe, dry_run=True, sample_rows=500)
+    assert estimate["exact"] is False and estimate["sampled_rows"] == 500
+    # Duplicates come from the full dataset's row-hash index, not the sample
+    assert estimate["projected_rows_after"] == 1000
+
+    drop_na = [{"type": "drop_na", "params": {"columns": ["b"]}}]
+    estimate = post_clean(client, auth, source_id, drop_na, dry_run=True, sample_rows=500)
+    post_clean(client, auth, source_id, drop_na)
+    applied = current_rows(client, auth, source_id)["total_rows"]
+    assert applied == 4000
+    assert abs(estimate["projected_rows_after"] - applied) <= 0.05 * 5000
@@ -0,0 +1,61 @@
+import os
+import pandas as pd
+import pytest
+from app.engine import columnar_store
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar_store, "COLUMNAR_DIR", str(tmp_path))
+
+
+def test_appends_keep_few_segments_in_order():
+    files, values = [], []
+    for i in range(200):
+        batch = pd.Series(range(i * 10, i * 10 + 10))
+        values.extend(batch)
+        files = columnar_store.compact_segments(1, files + [columnar_store.write_column(1, batch)])
+        rows = [columnar_store.segment_rows(1, name) for name in files]
+        # Each segment is more than twice the size of the next one
+        assert all(a > 2 * b for a, b in zip(rows, rows[1:]))
+    assert len(files) <= 11
+    merged = pd.concat([columnar_store.read_column(1, name) for name in files], ignore_index=True)
+    assert merged.tolist() == values
+
+
+def test_sidecar_link_reads_single_columns():
+    df = pd.DataFrame({"a": [1, 2, 3], "b#1": ["x", None, "z"]})
+    columnar_store.write_parquet(df, columnar_store.base_path(1), version=1)
+    segments = dict(columnar_store.link_sidecar(1))
+    # Replacing the sidecar leaves the linked version intact
+    columnar_store.write_parquet(df.head(1), columnar_store.base_path(1), version=2)
+    manifest = {"rows": 3, "columns": [{"name": name, "files": [segment]} for name, segment in segments.items()]}
+    assert columnar_store.has_columns(1, manifest)
+    pd.testing.assert_frame_equal(columnar_store.read_version(1, manifest), df)
+
+
+def test_remove_versions_keeps_files_still_needed():
+    shared = columnar_store.write_column(1, pd.Series([1, 2]))
+    own = columnar_store.write_column(1, pd.Series([3]))
+    batch = columnar_store.write_column(1, pd.Series([4]))
+    columnar_store.write_manifest(1, 2, {"parent": 1, "operations": [{"type": "refresh", "params": {"segments": {"x": batch}}}],
+                                         "rows": 3, "columns": [{"name": "x", "files": [shared, own]}]})
+    columnar_store.write_manifest(1, 3, {"parent": 2, "operations": [], "rows": 2, "columns": [{"name": "x", "files": [shared]}]})
+    columnar_store.remove_versions(1, [2])
+    assert columnar_store.read_manifest(1, 2) is None
+    assert sorted(os.listdir(columnar_store.columns_dir(1))) == [shared]
+
+
+def test_untagged_sidecar_is_rebuilt(tmp_path):
+    from types import SimpleNamespace
+    source = tmp_path / "t.csv"
+    source.write_text("a\n1\n2\n")
+    data_source = SimpleNamespace(id=1, type="csv", version=1, connection_config={"file_path": str(source)})
+    df = pd.DataFrame({"a": [1, 2]})
+    columnar_store.write_parquet(df.head(1), columnar_store.base_path(1))
+    assert not columnar_store.is_fresh(data_source)
+
+    path = columnar_store.ensure_columnar(data_source, df=df)
+    assert columnar_store.sidecar_version(path) == 1
+    assert columnar_store.is_fresh(data_source)
+    pd.testing.assert_frame_equal(pd.read_parquet(path), df)
@@ -0,0 +1,54 @@
+import gzip
+import zipfile
+import pytest
+from app.engine import compression
+
+
+DATA = b"a,b\n" + b"".join(b"%d,value %d\n" % (i, i % 7) for i in range(5000))
+
+
+def write_compressed(path, suffix: str):
+    with compression.compressing_writer(open(path, "wb"), suffix) as f:
+        f.write(DATA)
+
+
+@pytest.mark.parametrize("suffix", [".zst", ".gz", ""])
+def test_stored_uploads_read_back_unchanged(tmp_path, suffix):
+    path = str(tmp_path / f"blob.csv{suffix}")
+    write_compressed(path, suffix)
+    if suffix:
+        assert len(open(path, "rb").read()) < len(DATA)
+    with compression.open_raw(path) as f:
+        assert f.read() == DATA
+    assert compression.logical_ext(path) == ".csv"
+
+
+def test_multi_member_gzip_reads_whole(tmp_path):
+    path = str(tmp_path / "blob.csv.gz")
+    half = len(DATA) // 2
+    with open(path, "wb") as f:
+        f.write(gzip.compress(DATA[:half]) + gzip.compress(DATA[half:]))
+    with compression.open_raw(path) as f:
+        assert f.read() == DATA
+
+    feed = compression.GzipFeed()
+    raw = open(path, "rb").read()
+    pieces = [feed.decompress(raw[i:i + 1000]) for i in range(0, len(raw), 1000)]
+    assert b"".join(pieces) == DATA and feed.complete
+
+
+def test_zip_reads_its_single_data_file(tmp_path):
+    path = str(tmp_path / "upload.zip")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("export/", b"")
+        archive.writestr("__MACOSX/export/._data.csv", b"resource fork")
+        archive.writestr("export/.DS_Store", b"")
+        archive.writestr("export/data.csv", DATA)
+    with compression.open_raw(path) as f:
+        assert f.read() == DATA
+    assert compression.logical_ext(path) == ".csv"
+
+    with zipfile.ZipFile(path, "a") as archive:
+        archive.writestr("export/more.csv", DATA)
+    with pytest.raises(ValueError):
+        compression.open_raw(path)
@@ -0,0 +1,29 @@
+from app.engine import catalog
+
+
+CSV = "a,b\n1,x\n2,\n3,z\n"
+
+
+def test_preview_revalidates_until_the_version_changes(client, auth, upload, monkeypatch):
+    monkeypatch.setattr(catalog, "schedule_profile", lambda *args, **kwargs: None)
+    source_id = upload("t.csv", CSV)
+    headers = auth["headers"]
+    url = f"/api/v1/data-sources/{source_id}/preview"
+
+    first = client.get(url, headers=headers)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.json()["total_rows"] == 3
+    again = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert again.status_code == 304 and again.headers["etag"] == etag and not again.content
+
+    cleaned = client.post(f"/api/v1/data-sources/{source_id}/clean", headers=headers,
+                          json={"operations": [{"type": "drop_na", "params": {}}]})
+    assert cleaned.status_code == 200, cleaned.text
+    second = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert second.status_code == 200 and second.json()["total_rows"] == 2
+    assert second.headers["etag"] != etag
+
+    # Back on the first version the first validator is good again
+    assert client.post(f"/api/v1/data-sources/{source_id}/versions/1/checkout", headers=headers).status_code == 200
+    assert client.get(url, headers={**headers, "If-None-Match": etag}).status_code == 304
+    assert client.get(url, headers={**headers, "If-None-Match": second.headers["etag"]}).status_code == 200
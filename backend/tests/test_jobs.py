@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+import pytest
+from app.core import jobs
+from app.models import Job
+
+
+@pytest.fixture(autouse=True)
+def no_workers(monkeypatch):
+    # Jobs are run by the tests themselves
+    monkeypatch.setattr(jobs, "_enqueue", lambda job_id, delay=0: None)
+
+
+def add_job(db, **fields) -> Job:
+    job = Job(**{"type": "ingest", "status": "pending", "params": {}, "attempts": 0, "max_attempts": 3, **fields})
+    db.add(job)
+    db.commit()
+    return job
+
+
+def test_only_one_active_job_per_dedupe_key(db):
+    first = jobs.submit_job(db, "ingest", 1, data_source_id=7)
+    # As if a concurrent request had passed the check before the first insert
+    db.add(Job(type="ingest", status="pending", params={}, attempts=0, max_attempts=3, dedupe_key=first.dedupe_key))
+    with pytest.raises(Exception):
+        db.commit()
+    db.rollback()
+    assert jobs.submit_job(db, "ingest", 1, data_source_id=7).id == first.id
+
+    first.status = "failed"
+    db.commit()
+    assert jobs.submit_job(db, "ingest", 1, data_source_id=7).id != first.id
+
+
+def test_recover_fails_orphans_without_attempts_left(db):
+    stale = datetime.utcnow() - timedelta(seconds=jobs.JOB_STALE_SECONDS + 60)
+    spent = add_job(db, status="running", attempts=3, heartbeat_at=stale)
+    retry = add_job(db, status="running", attempts=1, heartbeat_at=stale)
+    jobs.recover_jobs()
+    db.expire_all()
+    assert spent.status == "failed" and spent.finished_at is not None
+    assert retry.status == "pending"
+
+
+def test_claim_refuses_jobs_without_attempts_left(db):
+    job = add_job(db, attempts=3)
+    jobs.run_job(job.id)
+    db.expire_all()
+    assert job.status == "failed"
+    assert job.attempts == 3
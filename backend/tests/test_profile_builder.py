@@ -0,0 +1,88 @@
+import json
+import numpy as np
+import pandas as pd
+from app.engine.profile_builder import ProfileBuilder
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=rows)
+    values[rng.random(rows) < 0.05] = np.nan
+    return pd.DataFrame({
+        "x": values,
+        "n": rng.integers(0, 1000, size=rows),
+        "cat": rng.choice(["a", "b", "c", None], size=rows),
+    })
+
+
+def chunks(df: pd.DataFrame, size: int):
+    return [df.iloc[i:i + size] for i in range(0, len(df), size)]
+
+
+def build(parts) -> ProfileBuilder:
+    builder = ProfileBuilder()
+    for part in parts:
+        builder.update(part)
+    return builder
+
+
+def test_merge_matches_single_pass():
+    df = make_frame(20_000)
+    parts = chunks(df, 3_000)
+    merged = build(parts[:3]).merge(build(parts[3:]))
+    single = build(parts).result()
+    result = merged.result()
+    assert result["total_rows"] == single["total_rows"] == len(df)
+    for col in ("x", "n"):
+        for key in ("count", "missing", "min", "max"):
+            assert result["column_stats"][col][key] == single["column_stats"][col][key]
+        assert np.isclose(result["column_stats"][col]["sum"], single["column_stats"][col]["sum"])
+        assert np.isclose(result["column_stats"][col]["mean"], df[col].mean())
+    assert result["column_stats"]["cat"]["missing"] == int(df["cat"].isna().sum())
+
+
+def test_state_round_trip():
+    df = make_frame(10_000)
+    builder = build(chunks(df, 2_500))
+    restored = ProfileBuilder.from_state(json.loads(json.dumps(builder.to_state())))
+    assert restored.result() == builder.result()
+
+    # A restored builder keeps extending like the original
+    more = make_frame(5_000, seed=1)
+    assert restored.update(more).result() == builder.update(more).result()
+
+
+def test_state_holds_no_row_hashes():
+    builder = build(chunks(make_frame(50_000), 10_000))
+    # Sketch state is bounded by the column count, not the row count
+    assert len(json.dumps(builder.to_state())) < 2_000_000
+    assert "row_hashes" not in builder.to_state()
+
+
+def test_duplicate_rows_within_stated_error():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({"k": rng.integers(0, 40_000, size=100_000)})
+    result = build(chunks(df, 10_000)).result()
+    exact = int(df.duplicated().sum())
+    assert abs(result["duplicate_rows"] - exact) <= result["duplicate_rows_error"]
+    assert build([df]).result(duplicate_rows=exact)["duplicate_rows_error"] == 0
+
+
+def test_outlier_count_within_stated_error():
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({"v": rng.normal(size=300_000)})
+    stats = build(chunks(df, 50_000)).result()["column_stats"]["v"]
+    outliers = stats["outliers"]
+    exact = int(((df["v"] < outliers["lower_bound"]) | (df["v"] > outliers["upper_bound"])).sum())
+    assert outliers["count_error"] > 0
+    assert abs(outliers["count"] - exact) <= outliers["count_error"]
+
+
+def test_text_in_numeric_column_counts_as_missing():
+    first = pd.DataFrame({"v": [1.0, 2.0, 3.0]})
+    second = pd.DataFrame({"v": ["4", "oops", None]})
+    stats = build([first, second]).result()["column_stats"]["v"]
+    assert stats["non_numeric"] == 1
+    assert stats["missing"] == 2
+    assert stats["count"] == 4
+    assert stats["mean"] == 2.5
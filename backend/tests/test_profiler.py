@@ -0,0 +1,21 @@
+import threading
+from app.engine.profiler import QueryProfiler
+
+
+def test_profiled_queries_run_one_at_a_time():
+    first = QueryProfiler("explain").start()
+    second = QueryProfiler("explain")
+    started = threading.Event()
+    waiting = threading.Thread(target=lambda: (second.start(), started.set()))
+    waiting.start()
+    assert not started.wait(0.2)
+    # Unprofiled queries are not held up
+    QueryProfiler(None).start().stop()
+
+    with first.stage("load") as st:
+        st["rows_out"] = len(bytearray(1 << 20))
+    assert first.report()["stages"][0]["bytes_allocated"] >= 1 << 20
+    first.stop()  # Repeated stop (the endpoints' finally) is harmless
+    assert started.wait(5)
+    second.stop()
+    waiting.join()
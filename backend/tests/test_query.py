@@ -0,0 +1,16 @@
+from app.models.data_source import DataSource
+
+
+def test_numeric_filter_leaves_the_cached_frame_alone(client, auth, upload, session_factory):
+    from app.engine.versions import load_source
+    source_id = upload("t.csv", "a,b\n1,x\n2,y\n3,z\n")
+    response = client.post(f"/api/v1/data-sources/{source_id}/query", headers=auth["headers"], json={
+        "filters": [{"column": "b", "operator": "gt", "value": 1}]
+    })
+    assert response.status_code == 200, response.text
+
+    # The string column was coerced to numbers for the filter, only in the query's own frame
+    db = session_factory()
+    df = load_source(db.get(DataSource, source_id))
+    db.close()
+    assert df["b"].tolist() == ["x", "y", "z"]
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+from app.engine.loader import iter_dataframe_chunks, load_dataframe
+from app.engine.readers import NotStreamable
+from app.engine.stream_ingest import write_chunks
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+@pytest.fixture
+def wide_row_workbook(tmp_path):
+    # 300 rows; row 250 carries one cell more than the header
+    book = openpyxl.Workbook()
+    sheet = book.active
+    sheet.append(["id", "name"])
+    for i in range(300):
+        sheet.append([i, f"n{i}"] + (["extra"] if i == 249 else []))
+    path = str(tmp_path / "wide.xlsx")
+    book.save(path)
+    return path
+
+
+def test_wide_row_midway_asks_for_a_full_read(wide_row_workbook):
+    chunks = iter_dataframe_chunks(wide_row_workbook, "excel", 100)
+    assert len(next(chunks)) == 100
+    with pytest.raises(NotStreamable):
+        list(chunks)
+
+
+def test_chunked_copy_falls_back_and_full_read_matches_pandas(wide_row_workbook, tmp_path):
+    path = str(tmp_path / "copy.parquet")
+    assert write_chunks(iter_dataframe_chunks(wide_row_workbook, "excel", 100), path) is None
+    assert not (tmp_path / "copy.parquet").exists()
+
+    df = load_dataframe(wide_row_workbook, "excel", cache=False)
+    pd.testing.assert_frame_equal(df, pd.read_excel(wide_row_workbook))
+    assert df.shape == (300, 3)
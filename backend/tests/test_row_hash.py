@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.engine.row_hash import RowHashIndex, row_hashes
+
+MIXED = [1, "1", 1.0, True, "True", None, "None", np.nan]
+
+
+@pytest.mark.parametrize("df", [
+    pd.DataFrame({"x": pd.Series(MIXED, dtype=object)}),
+    pd.DataFrame({"x": pd.Series(MIXED, dtype=object), "y": [0, 0, 0, 0, 0, 0, 0, 0]}),
+    pd.DataFrame({"x": pd.Series(MIXED * 2, dtype=object), "y": [None, np.nan] * 8}),
+    pd.DataFrame({"x": [0.0, -0.0, np.nan, np.nan, 1.5], "y": ["a", "a", None, None, "b"]}),
+    pd.DataFrame({"n": [1, 2, 1, 2, 3], "s": ["a", "b", "a", "c", None]}),
+])
+def test_duplicate_mask_matches_pandas(df):
+    index = RowHashIndex.build(df)
+    np.testing.assert_array_equal(index.duplicate_mask(df), df.duplicated(keep="first").to_numpy())
+
+
+def test_mixed_object_values_hash_by_equality():
+    hashes = row_hashes(pd.DataFrame({"x": pd.Series(MIXED, dtype=object)}))
+    # 1, 1.0 and True are equal for pandas; the strings '1', 'True' and 'None' are not
+    assert hashes[0] == hashes[2] == hashes[3]
+    assert len({hashes[0], hashes[1], hashes[4], hashes[6]}) == 4
+
+
+def test_collisions_are_confirmed_against_the_data():
+    df = pd.DataFrame({"n": [1, 2, 3, 4]})
+    # Every row hashes the same, as if all of them collided
+    index = RowHashIndex(np.zeros(len(df), dtype="uint64"))
+    assert index.duplicate_mask().sum() == 3
+    assert not index.duplicate_mask(df).any()
+
+
+def test_append_and_filter_keep_row_order():
+    df = pd.DataFrame({"a": [1, 1, 2], "b": ["x", "x", "y"]})
+    batch = pd.DataFrame({"a": [2, 3], "b": ["y", "z"]})
+    index = RowHashIndex.build(df).append(batch)
+    full = pd.concat([df, batch], ignore_index=True)
+    np.testing.assert_array_equal(index.hashes, row_hashes(full))
+    keep = ~index.duplicate_mask(full)
+    assert index.filter(keep).duplicate_count() == 0
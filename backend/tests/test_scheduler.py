@@ -0,0 +1,23 @@
+import asyncio
+import threading
+from app.core.scheduler import ExecutionLane
+
+
+def test_per_user_slots_are_dropped_when_idle():
+    lane = ExecutionLane("test", max_workers=4, per_user=1)
+    release = threading.Event()
+
+    async def main():
+        # Two requests from one user: the second waits for the first's slot
+        first = asyncio.ensure_future(lane.run(1, release.wait, 5))
+        second = asyncio.ensure_future(lane.run(1, lambda: "done"))
+        await asyncio.sleep(0.1)
+        assert lane.stats()["users"] == 1 and not second.done()
+        release.set()
+        return await first, await second
+
+    try:
+        assert asyncio.run(main()) == (True, "done")
+        assert lane.stats()["users"] == 0
+    finally:
+        lane.shutdown()
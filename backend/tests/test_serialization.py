@@ -0,0 +1,36 @@
+import json
+import numpy as np
+import pandas as pd
+from app.core.serialization import dumps, encode_records
+
+
+def reference_records(df: pd.DataFrame) -> list:
+    # The replace(inf) + where(notnull) + to_dict path encode_records replaced
+    clean = df.replace([np.inf, -np.inf], np.nan)
+    clean = clean.astype(object).where(clean.notnull(), None)
+    records = clean.to_dict(orient="records")
+    return json.loads(json.dumps(records, default=lambda v: v.isoformat() if hasattr(v, "isoformat") else v.item()))
+
+
+def test_matches_to_dict_for_missing_values_and_ints():
+    df = pd.DataFrame({
+        "i": [1, 2, 2**40],
+        "f": [1.5, np.nan, np.inf],
+        "n": pd.array([1, None, 3], dtype="Int64"),
+        "s": ["a", None, "c"],
+        "b": [True, False, True],
+        "t": pd.to_datetime(["2024-01-02 03:04:05", None, "2024-01-03 00:00:00"]),
+    })
+    records = encode_records(df)
+    assert records == reference_records(df)
+    # Native Python values: ints stay ints, NaN/Inf/NA/NaT become None
+    assert [type(r["i"]) for r in records] == [int, int, int]
+    assert [r["f"] for r in records] == [1.5, None, None]
+    assert [r["n"] for r in records] == [1, None, 3]
+    assert [r["t"] for r in records] == ["2024-01-02T03:04:05", None, "2024-01-03T00:00:00"]
+    assert json.loads(dumps(records)) == records
+
+
+def test_fractional_seconds_switch_the_column_to_microseconds():
+    df = pd.DataFrame({"t": pd.to_datetime(["2024-01-02 03:04:05.250", "2024-01-02 03:04:06.000"])})
+    assert [r["t"] for r in encode_records(df)] == ["2024-01-02T03:04:05.250000", "2024-01-02T03:04:06.000000"]
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.engine.statistics import HISTOGRAM_BINS, numeric_kernel
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        "normal": rng.normal(10, 3, 500),
+        "ints": rng.integers(0, 6, 500).astype("float64"),
+        "sparse": rng.exponential(2, 500),
+        "constant": np.full(500, 4.0),
+        "tiny": np.nan,
+        "empty": np.nan,
+    })
+    df.loc[rng.choice(500, 120, replace=False), "sparse"] = np.nan
+    df.loc[:2, "tiny"] = [1.0, 2.0, 2.0]
+    return df
+
+
+def test_matches_pandas(frame):
+    stats = numeric_kernel(frame.to_numpy())
+    expected = {
+        "count": frame.count(), "sum": frame.sum(), "mean": frame.mean(), "std": frame.std(),
+        "min": frame.min(), "25%": frame.quantile(0.25), "50%": frame.median(), "75%": frame.quantile(0.75),
+        "max": frame.max(), "skew": frame.skew(), "kurtosis": frame.kurt(), "distinct": frame.nunique(),
+        "zeros": (frame == 0).sum(),
+    }
+    for name, reference in expected.items():
+        np.testing.assert_allclose(stats[name], reference.to_numpy(dtype="float64"), rtol=1e-9, atol=1e-12,
+                                   equal_nan=True, err_msg=name)
+    # Smallest value on mode ties, as Series.mode()[0]
+    modes = [frame[c].mode().iloc[0] if frame[c].notna().any() else np.nan for c in frame.columns]
+    np.testing.assert_array_equal(stats["mode"], modes)
+
+
+def test_histogram_and_outliers_count_every_value(frame):
+    stats = numeric_kernel(frame.to_numpy())
+    np.testing.assert_array_equal(stats["hist"].sum(axis=1), frame.count().to_numpy())
+    assert stats["hist"].shape == (frame.shape[1], HISTOGRAM_BINS)
+    for i, column in enumerate(frame.columns):
+        series = frame[column]
+        q1, q3 = series.quantile(0.25), series.quantile(0.75)
+        fences = (series < q1 - 1.5 * (q3 - q1)) | (series > q3 + 1.5 * (q3 - q1))
+        assert stats["outlier_count"][i] == fences.sum(), column
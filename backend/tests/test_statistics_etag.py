@@ -0,0 +1,28 @@
+from app.engine import catalog
+
+
+CSV = "a,b\n" + "".join(f"{i},{i * 0.5}\n" for i in range(40))
+
+
+def test_exact_profile_replaces_a_cached_sketch_profile(client, auth, upload, monkeypatch, session_factory):
+    # Keep the background exact profile from running: the sketch profile stays stored
+    monkeypatch.setattr(catalog, "schedule_profile", lambda *args, **kwargs: None)
+    source_id = upload("t.csv", CSV)
+    headers = auth["headers"]
+    first = client.get(f"/api/v1/data-sources/{source_id}/statistics", headers=headers)
+    assert first.json()["approximate"] is True
+    etag = first.headers["etag"]
+    assert client.get(f"/api/v1/data-sources/{source_id}/statistics",
+                      headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    # What the background job does once the exact profile is ready
+    from app.models.data_source import DataSource
+    db = session_factory()
+    data_source = db.get(DataSource, source_id)
+    catalog.refresh_profile(db, data_source, catalog._load_full(data_source))
+    db.close()
+
+    second = client.get(f"/api/v1/data-sources/{source_id}/statistics", headers={**headers, "If-None-Match": etag})
+    assert second.status_code == 200
+    assert "approximate" not in second.json()
+    assert second.headers["etag"] != etag
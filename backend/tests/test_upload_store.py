@@ -0,0 +1,64 @@
+import hashlib
+import io
+import os
+import threading
+import pytest
+from app.engine import upload_store
+from app.models import DataSource
+
+
+@pytest.fixture(autouse=True)
+def store_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_store, "BLOB_DIR", str(tmp_path / "blobs"))
+    monkeypatch.setattr(upload_store, "INCOMING_DIR", str(tmp_path / "incoming"))
+
+
+def stage(data: bytes):
+    staged, suffix, digest, _ = upload_store.store_stream(io.BytesIO(data), ".csv")
+    return staged, suffix, digest
+
+
+def add_source(db, path: str, digest: str) -> DataSource:
+    source = DataSource(type="csv", sha256=digest, connection_config={"file_path": path, "sha256": digest})
+    db.add(source)
+    db.commit()
+    return source
+
+
+def test_failed_block_removes_the_new_blob():
+    staged, suffix, digest = stage(b"a,b\n1,2\n")
+    with pytest.raises(RuntimeError):
+        with upload_store.stored_blob(staged, suffix, digest, ".csv") as (path, reused):
+            assert not reused and os.path.exists(path)
+            raise RuntimeError("invalid archive")
+    assert upload_store.find_blob(digest, ".csv") is None
+
+
+def test_release_waits_for_an_upload_reusing_the_blob(db):
+    data = b"a,b\n1,2\n"
+    staged, suffix, digest = stage(data)
+    with upload_store.stored_blob(staged, suffix, digest, ".csv") as (path, _):
+        first = add_source(db, path, digest)
+
+    staged, suffix, digest = stage(data)
+    with upload_store.stored_blob(staged, suffix, digest, ".csv") as (path, reused):
+        assert reused
+        # Deleting the first source now must wait for this upload's row
+        deleting = threading.Thread(target=upload_store.release_blob, args=(db, first))
+        deleting.start()
+        deleting.join(0.2)
+        assert deleting.is_alive()
+        add_source(db, path, digest)
+    deleting.join()
+    assert os.path.exists(path)
+    assert hashlib.sha256(upload_store.compression.open_raw(path).read()).hexdigest() == digest
+
+
+def test_purge_drops_state_of_finished_sessions():
+    state = upload_store.create_session(1, 1, "t.csv", "csv", 4)
+    upload_store.write_chunk(state["upload_id"], 0, io.BytesIO(b"a\n1\n"))
+    upload_store.finish_session(state["upload_id"])
+    upload_store._hashers["gone"] = (0, hashlib.sha256())
+    upload_store._purge_expired()
+    assert state["upload_id"] not in upload_store._session_locks
+    assert "gone" not in upload_store._hashers
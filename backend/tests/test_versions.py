@@ -0,0 +1,50 @@
+import os
+from app.engine import catalog, columnar_store
+from app.models.data_source import DataSource
+
+
+CSV = "a,b\n1,x\n2,\n3,z\n"
+
+
+def clean(client, auth, source_id, *operations) -> int:
+    response = client.post(f"/api/v1/data-sources/{source_id}/clean", headers=auth["headers"],
+                           json={"operations": list(operations)})
+    assert response.status_code == 200, response.text
+    return response.json()["version"]
+
+
+def rows(client, auth, source_id) -> list:
+    response = client.get(f"/api/v1/data-sources/{source_id}/rows", headers=auth["headers"])
+    assert response.status_code == 200, response.text
+    return response.json()["rows"]
+
+
+def test_checkout_and_replay(client, auth, upload, monkeypatch, session_factory):
+    from app.core.memory_cache import df_cache
+    from app.engine.versions import load_source
+    monkeypatch.setattr(catalog, "schedule_profile", lambda *args, **kwargs: None)
+    source_id = upload("t.csv", CSV)
+    filled = clean(client, auth, source_id, {"type": "fill_na", "params": {"columns": ["b"], "method": "constant", "value": "?"}})
+    renamed = clean(client, auth, source_id, {"type": "rename_col", "params": {"mapper": {"a": "id"}}})
+    assert (filled, renamed) == (2, 3)
+    assert rows(client, auth, source_id) == [{"id": 1, "b": "x"}, {"id": 2, "b": "?"}, {"id": 3, "b": "z"}]
+
+    # Every version stays readable; the raw upload is untouched
+    for version, expected in ((1, [{"a": 1, "b": "x"}, {"a": 2, "b": None}, {"a": 3, "b": "z"}]),
+                              (2, [{"a": 1, "b": "x"}, {"a": 2, "b": "?"}, {"a": 3, "b": "z"}])):
+        response = client.post(f"/api/v1/data-sources/{source_id}/versions/{version}/checkout", headers=auth["headers"])
+        assert response.status_code == 200, response.text
+        assert rows(client, auth, source_id) == expected
+    assert client.post(f"/api/v1/data-sources/{source_id}/versions/9/checkout", headers=auth["headers"]).status_code == 404
+
+    # Version 2's own files lost: it is replayed from the raw upload and stored again
+    manifest = columnar_store.read_manifest(source_id, 2)
+    for name in columnar_store.manifest_files(manifest) - columnar_store.manifest_files(columnar_store.read_manifest(source_id, 1) or {}):
+        os.remove(os.path.join(columnar_store.columns_dir(source_id), name))
+    assert not columnar_store.has_columns(source_id, manifest)
+    df_cache.clear()
+    db = session_factory()
+    df = load_source(db.get(DataSource, source_id))
+    db.close()
+    assert df["b"].tolist() == ["x", "?", "z"]
+    assert columnar_store.has_columns(source_id, columnar_store.read_manifest(source_id, 2))
@@ -231,6 +231,8 @@ export default function MonitoringPage() {
                                             <td className="px-4 py-3">
                                                 {ds.quality === "healthy" ? (
                                                     <span className="flex items-center text-green-600"><CheckCircle className="w-4 h-4 mr-1" /> Passed</span>
+                                                ) : ds.quality === "pending" ? (
+                                                    <span className="flex items-center text-gray-500">Profiling…</span>
                                                 ) : (
                                                     <span className="flex items-center text-red-600"><AlertCircle className="w-4 h-4 mr-1" /> Critical</span>
                                                 )}
@@ -0,0 +1,67 @@
+// Decoder for the backend's compact columnar payload
+// (Accept: application/vnd.dataview.columnar+json).
+
+export const COLUMNAR_MEDIA_TYPE = "application/vnd.dataview.columnar+json";
+
+type ColumnarColumn =
+    | { name: string; encoding: "typed"; type: "float64" | "int32" | "uint8"; data: string }
+    | { name: string; encoding: "dictionary"; dictionary: any[]; codes: string }
+    | { name: string; encoding: "plain"; data: any[] };
+
+export interface ColumnarPayload {
+    format: "columnar";
+    length: number;
+    columns: ColumnarColumn[];
+}
+
+function base64ToBuffer(data: string): ArrayBuffer {
+    const binary = atob(data);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return bytes.buffer;
+}
+
+export function isColumnar(payload: any): payload is ColumnarPayload {
+    return payload !== null && typeof payload === "object" && payload.format === "columnar";
+}
+
+// Column name -> array of values (null for missing), without building row objects
+export function decodeColumns(payload: ColumnarPayload): Record<string, any[]> {
+    const out: Record<string, any[]> = {};
+    for (const col of payload.columns) {
+        if (col.encoding === "typed") {
+            const buffer = base64ToBuffer(col.data);
+            if (col.type === "float64") {
+                out[col.name] = Array.from(new Float64Array(buffer), v => (Number.isNaN(v) ? null : v));
+            } else if (col.type === "int32") {
+                out[col.name] = Array.from(new Int32Array(buffer));
+            } else {
+                // uint8 booleans: 2 marks null
+                out[col.name] = Array.from(new Uint8Array(buffer), v => (v === 2 ? null : v === 1));
+            }
+        } else if (col.encoding === "dictionary") {
+            const codes = new Int32Array(base64ToBuffer(col.codes));
+            out[col.name] = Array.from(codes, c => (c < 0 ? null : col.dictionary[c]));
+        } else {
+            out[col.name] = col.data;
+        }
+    }
+    return out;
+}
+
+// Row-oriented view for components that expect records
+export function decodeRows(payload: ColumnarPayload): Record<string, any>[] {
+    const columns = decodeColumns(payload);
+    const names = payload.columns.map(c => c.name);
+    const rows: Record<string, any>[] = new Array(payload.length);
+    for (let i = 0; i < payload.length; i++) {
+        const row: Record<string, any> = {};
+        for (const name of names) {
+            row[name] = columns[name][i];
+        }
+        rows[i] = row;
+    }
+    return rows;
+}
@@ -1,4 +1,5 @@
 import api from "@/lib/api";
+import { COLUMNAR_MEDIA_TYPE, decodeRows, isColumnar } from "@/lib/columnar";
 
 export interface DataSource {
     id: number;
@@ -36,8 +37,14 @@ export const dataSourceService = {
     },
 
     async queryData(id: number, query: { filters: any[], group_by?: string, agg_column?: string, agg_method?: string, limit?: number }) {
-        const response = await api.post(`/data-sources/${id}/query`, query);
-        return response.data;
+        const response = await api.post(`/data-sources/${id}/query`, query, {
+            headers: { Accept: COLUMNAR_MEDIA_TYPE },
+        });
+        const result = response.data;
+        if (isColumnar(result.data)) {
+            result.data = decodeRows(result.data);
+        }
+        return result;
     },
 
     getAll: async () => {
@@ -79,7 +86,13 @@ export const dataSourceService = {
     },
 
     getRows: async (id: number, start: number, end: number) => {
-        const response = await api.get(`/data-sources/${id}/rows?start=${start}&end=${end}`);
-        return response.data;
+        const response = await api.get(`/data-sources/${id}/rows?start=${start}&end=${end}`, {
+            headers: { Accept: COLUMNAR_MEDIA_TYPE },
+        });
+        const result = response.data;
+        if (isColumnar(result.rows)) {
+            result.rows = decodeRows(result.rows);
+        }
+        return result;
     }
 };